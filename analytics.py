@@ -0,0 +1,453 @@
+"""Append-only usage event log with incrementally maintained hourly/daily rollups.
+
+Events are packed into fixed-width binary records and appended to segment
+files. Rollups (count, latency sum, cache hits per bucket/language/domain/
+intent) are updated as events arrive and checkpointed together with the log
+position, so a restart replays only the events written since the last
+checkpoint and chart queries read O(buckets), never the raw log.
+
+Checkpoints are written by a background thread, never by the request that
+appends an event. Hourly buckets older than ``hour_retention`` seconds are
+dropped at each checkpoint; the daily buckets already hold their totals.
+
+EventLog belongs to a single process. When several workers run side by side
+(see cluster.py), set EVENT_LOG_DB and every worker writes the same rollups
+into one SQLite database instead (SqliteEventLog).
+"""
+import atexit
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+Event = namedtuple("Event", ["timestamp", "language", "domain", "intent", "latency_ms", "cache_hit"])
+
+# timestamp, language id, domain id, intent id, latency (ms), cache hit
+RECORD = struct.Struct("<dHHHfB")
+GRANULARITIES = {"hour": 3600, "day": 86400}
+
+SEGMENT_RECORDS = 1_000_000
+CHECKPOINT_EVERY = 10_000
+CHECKPOINT_SECONDS = 30.0
+# Hourly buckets kept for this long; older ones survive only in the daily rollups
+HOUR_RETENTION = float(os.environ.get("EVENT_LOG_HOUR_RETENTION_DAYS", "14")) * 86400
+
+EVENT_LOG_DIR = os.environ.get(
+    "EVENT_LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".analytics")
+)
+# Path of a SQLite database shared by all worker processes (unset: per-process EventLog)
+EVENT_LOG_DB = os.environ.get("EVENT_LOG_DB")
+
+
+def _write_json_atomic(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class EventLog:
+    def __init__(self, directory=EVENT_LOG_DIR, segment_records=SEGMENT_RECORDS,
+                 checkpoint_every=CHECKPOINT_EVERY, checkpoint_seconds=CHECKPOINT_SECONDS,
+                 hour_retention=HOUR_RETENTION):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self.hour_retention = hour_retention
+        self._lock = threading.Lock()
+        # Serializes checkpoint writers so an older snapshot never replaces a newer one
+        self._checkpoint_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._names = []
+        self._ids = {}
+        self._rollups = {name: {} for name in GRANULARITIES}
+        self._segment = 0
+        self._offset = 0
+        self._file = None
+        self._since_checkpoint = 0
+        self.version = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._checkpointer = threading.Thread(target=self._run_checkpoints, name="event-log-checkpoint",
+                                              daemon=True)
+        self._checkpointer.start()
+        atexit.register(self.close)
+
+    # Writing
+
+    def append(self, event):
+        with self._lock:
+            record = RECORD.pack(
+                event.timestamp,
+                self._intern(event.language or ""),
+                self._intern(event.domain or ""),
+                self._intern(event.intent or ""),
+                event.latency_ms,
+                1 if event.cache_hit else 0,
+            )
+            if self._offset >= self.segment_records * RECORD.size:
+                self._rotate()
+            if self._file is None:
+                self._file = open(self._segment_path(self._segment), "ab")
+            self._file.write(record)
+            self._file.flush()
+            self._offset += RECORD.size
+            self._apply(RECORD.unpack(record))
+            self.version += 1
+
+            self._since_checkpoint += 1
+            if self._since_checkpoint == self.checkpoint_every:
+                # The checkpoint thread otherwise wakes every checkpoint_seconds
+                self._wake.set()
+
+    def record(self, language, domain, intent, latency_ms, cache_hit, timestamp=None):
+        self.append(Event(timestamp or time.time(), language, domain, intent, latency_ms, cache_hit))
+
+    def flush(self):
+        self._checkpoint()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._checkpointer.join()
+        self._checkpoint()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # Reading (O(buckets))
+
+    def rollups(self, granularity="day", since=None):
+        with self._lock:
+            items = list(self._rollups[granularity].items())
+            names = list(self._names)
+        rows = []
+        for (bucket, language, domain, intent), (count, latency_sum, hits) in items:
+            if since is not None and bucket < since:
+                continue
+            rows.append({
+                "bucket": bucket,
+                "language": names[language],
+                "domain": names[domain],
+                "intent": names[intent],
+                "count": count,
+                "latency_ms_sum": latency_sum,
+                "cache_hits": hits,
+            })
+        rows.sort(key=lambda row: row["bucket"])
+        return rows
+
+    def totals(self):
+        with self._lock:
+            count = latency = hits = 0
+            for c, l, h in self._rollups["day"].values():
+                count += c
+                latency += l
+                hits += h
+        return {
+            "events": count,
+            "mean_latency_ms": latency / count if count else 0.0,
+            "cache_hit_rate": hits / count if count else 0.0,
+        }
+
+    # Internals (caller holds the lock)
+
+    def _intern(self, name):
+        index = self._ids.get(name)
+        if index is None:
+            index = len(self._names)
+            self._names.append(name)
+            self._ids[name] = index
+            _write_json_atomic(os.path.join(self.directory, "dictionary.json"), self._names)
+        return index
+
+    def _apply(self, fields):
+        timestamp, language, domain, intent, latency, hit = fields
+        for name, width in GRANULARITIES.items():
+            key = (int(timestamp // width) * width, language, domain, intent)
+            bucket = self._rollups[name].get(key)
+            if bucket is None:
+                self._rollups[name][key] = [1, latency, hit]
+            else:
+                bucket[0] += 1
+                bucket[1] += latency
+                bucket[2] += hit
+
+    def _segment_path(self, index):
+        return os.path.join(self.directory, f"events-{index:06d}.bin")
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segment += 1
+        self._offset = 0
+
+    def _prune(self, now=None):
+        cutoff = (now if now is not None else time.time()) - self.hour_retention
+        hourly = self._rollups["hour"]
+        for key in [key for key in hourly if key[0] < cutoff]:
+            del hourly[key]
+
+    def _snapshot(self):
+        self._prune()
+        self._since_checkpoint = 0
+        return {
+            "segment": self._segment,
+            "offset": self._offset,
+            "rollups": {
+                name: [[*key, *value] for key, value in buckets.items()]
+                for name, buckets in self._rollups.items()
+            },
+        }
+
+    # Checkpointing (takes the lock only to copy the rollups)
+
+    def _run_checkpoints(self):
+        while not self._closed:
+            self._wake.wait(self.checkpoint_seconds)
+            self._wake.clear()
+            if self._closed:
+                return
+            with self._lock:
+                idle = self._since_checkpoint == 0
+            if not idle:
+                try:
+                    self._checkpoint()
+                except OSError:
+                    # Retried at the next wake-up; replay covers the gap after a crash
+                    with self._lock:
+                        self._since_checkpoint += 1
+
+    def _checkpoint(self):
+        with self._checkpoint_lock:
+            with self._lock:
+                payload = self._snapshot()
+            _write_json_atomic(os.path.join(self.directory, "rollups.json"), payload)
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.directory, "dictionary.json"), encoding="utf-8") as f:
+                self._names = json.load(f)
+        except (OSError, ValueError):
+            self._names = []
+        self._ids = {name: index for index, name in enumerate(self._names)}
+
+        segment, offset = 0, 0
+        try:
+            with open(os.path.join(self.directory, "rollups.json"), encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            for name, rows in checkpoint["rollups"].items():
+                self._rollups[name] = {tuple(row[:4]): list(row[4:]) for row in rows}
+            segment, offset = checkpoint["segment"], checkpoint["offset"]
+        except (OSError, ValueError, KeyError):
+            self._rollups = {name: {} for name in GRANULARITIES}
+
+        # Replay only what was appended after the checkpoint
+        while os.path.exists(self._segment_path(segment)):
+            path = self._segment_path(segment)
+            size = os.path.getsize(path)
+            usable = size - size % RECORD.size
+            if usable != size:
+                # Drop a torn trailing record from an interrupted write
+                with open(path, "r+b") as f:
+                    f.truncate(usable)
+            if usable > offset:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read(usable - offset)
+                for fields in RECORD.iter_unpack(data):
+                    self._apply(fields)
+            self._segment, self._offset = segment, usable
+            segment, offset = segment + 1, 0
+        self.version = sum(bucket[0] for bucket in self._rollups["day"].values())
+        _write_json_atomic(os.path.join(self.directory, "rollups.json"), self._snapshot())
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    latency_ms_sum REAL NOT NULL,
+    cache_hits INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, language, domain, intent)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+"""
+
+SQLITE_UPSERT = """
+INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, bucket, language, domain, intent) DO UPDATE SET
+    count = count + excluded.count,
+    latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+    cache_hits = cache_hits + excluded.cache_hits
+"""
+
+
+class SqliteEventLog:
+    """EventLog-compatible rollups in one SQLite database shared across processes.
+
+    Each process buffers rollup increments in memory and a background thread
+    folds them into the database in one transaction every ``flush_seconds``
+    (sooner after ``flush_every`` events), so writers rarely contend for the
+    lock and an idle worker's last events still reach the database. Only the
+    aggregates are stored; there is no raw event log to replay. Hourly rows
+    older than ``hour_retention`` seconds are deleted as part of each flush.
+    """
+
+    def __init__(self, path=EVENT_LOG_DB, flush_every=200, flush_seconds=1.0, hour_retention=HOUR_RETENTION):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.hour_retention = hour_retention
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pending = {}
+        self._pending_events = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SQLITE_SCHEMA)
+        self._flusher = threading.Thread(target=self._run_flushes, name="event-log-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # Writing
+
+    def append(self, event):
+        with self._lock:
+            for name, width in GRANULARITIES.items():
+                key = (name, int(event.timestamp // width) * width,
+                       event.language or "", event.domain or "", event.intent or "")
+                bucket = self._pending.get(key)
+                if bucket is None:
+                    self._pending[key] = [1, event.latency_ms, 1 if event.cache_hit else 0]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += event.latency_ms
+                    bucket[2] += 1 if event.cache_hit else 0
+            self._pending_events += 1
+            if self._pending_events == self.flush_every:
+                self._wake.set()
+
+    def record(self, language, domain, intent, latency_ms, cache_hit, timestamp=None):
+        self.append(Event(timestamp or time.time(), language, domain, intent, latency_ms, cache_hit))
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        with self._lock:
+            if self._db is not None:
+                self._flush()
+                self._db.close()
+                self._db = None
+
+    # Reading
+
+    @property
+    def version(self):
+        # Changes whenever any worker flushes (or this one has unflushed events)
+        with self._lock:
+            if self._db is None:
+                return self._pending_events
+            (value,) = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            return value + self._pending_events
+
+    def rollups(self, granularity="day", since=None):
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                "SELECT bucket, language, domain, intent, count, latency_ms_sum, cache_hits "
+                "FROM rollups WHERE granularity = ? AND bucket >= ? ORDER BY bucket",
+                (granularity, since if since is not None else -1),
+            ).fetchall()
+        return [
+            {"bucket": bucket, "language": language, "domain": domain, "intent": intent,
+             "count": count, "latency_ms_sum": latency_sum, "cache_hits": hits}
+            for bucket, language, domain, intent, count, latency_sum, hits in rows
+        ]
+
+    def totals(self):
+        with self._lock:
+            self._flush()
+            count, latency, hits = self._db.execute(
+                "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(latency_ms_sum), 0), "
+                "COALESCE(SUM(cache_hits), 0) FROM rollups WHERE granularity = 'day'"
+            ).fetchone()
+        return {
+            "events": count,
+            "mean_latency_ms": latency / count if count else 0.0,
+            "cache_hit_rate": hits / count if count else 0.0,
+        }
+
+    def _flush(self):
+        # Caller holds the lock
+        if not self._pending or self._db is None:
+            return
+        rows = [(*key, *value) for key, value in self._pending.items()]
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(SQLITE_UPSERT, rows)
+            # A range scan of the primary key; usually deletes nothing
+            self._db.execute("DELETE FROM rollups WHERE granularity = 'hour' AND bucket < ?",
+                             (time.time() - self.hour_retention,))
+            self._db.execute("UPDATE meta SET value = value + ? WHERE name = 'version'",
+                             (self._pending_events,))
+            self._db.execute("COMMIT")
+        except sqlite3.Error:
+            self._db.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+        self._pending_events = 0
+
+    def _run_flushes(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except sqlite3.Error:
+                # Still pending; retried at the next wake-up
+                pass
+
+
+def open_event_log():
+    # Shared SQLite rollups when EVENT_LOG_DB is set (multi-worker), else the local log
+    if EVENT_LOG_DB:
+        return SqliteEventLog(EVENT_LOG_DB)
+    return EventLog()
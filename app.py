@@ -1,10 +1,145 @@
-import streamlit as st
-from gtts import gTTS
-import pandas as pd
-import numpy as np
-import plotly.express as px
+import functools
+import io
 import os
-import tempfile
+import pstats
+import time
+import uuid
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from analytics import open_event_log
+from blob_store import BlobStore
+from charts import build_analytics_df, build_analytics_figures
+from contributions import ContributionQueue
+from conversation import ASSISTANT, USER, ConversationHistory
+from engine import create_engine
+from metrics import TRACER, Timings
+from prefetch import Prefetcher
+from resources import LANGUAGE_RESOURCES
+from styles import APP_CSS, FLAG_DATA_URI, LITE_CSS
+from tts import AUDIO_EXTENSIONS, audio_mime
+
+script_started = time.perf_counter()
+
+# Set SHARED_CACHE=0 to rebuild session-independent data on every rerun (for before/after timing)
+SHARED_CACHE = os.environ.get("SHARED_CACHE", "1") != "0"
+# Base URL of a running service.py sharing the audio cache dir (AUDIO_CACHE_DIR); audio is then played
+# straight from it. service.py always scans that dir for clips written by other processes
+AUDIO_BASE_URL = os.environ.get("AUDIO_BASE_URL", "").rstrip("/")
+# Low-bandwidth mode: "auto" (Save-Data / slow ECT client hints), "on" or "off"; ?lite=1 overrides per session
+LOW_BANDWIDTH = os.environ.get("LOW_BANDWIDTH", "auto")
+SLOW_CONNECTIONS = ("slow-2g", "2g", "3g")
+# Quick Action intent and label per domain key
+QUICK_ACTIONS = {
+    "agriculture": ("pests", "🐜 Ask about pests"),
+    "healthcare": ("hygiene", "🧼 Ask about hygiene"),
+}
+# Set FRAGMENTS=0 to rerun the whole script on every interaction (for before/after timing)
+FRAGMENTS = os.environ.get("FRAGMENTS", "1") != "0"
+
+def shared_resource(**options):
+    def decorate(func):
+        return st.cache_resource(func, **options) if SHARED_CACHE else func
+    return decorate
+
+def shared_data(**options):
+    def decorate(func):
+        return st.cache_data(func, **options) if SHARED_CACHE else func
+    return decorate
+
+def rerunnable(func):
+    # A region whose own widgets rerun only that region, measured like a full run
+    if not FRAGMENTS:
+        return func
+
+    @functools.wraps(func)
+    def region(*args, **kwargs):
+        meter_payload()
+        func(*args, **kwargs)
+        if fragment_rerun_root():
+            record_interaction("fragment")
+
+    return st.fragment(region)
+
+def rerun_region():
+    # Fragment scope is only valid in a fragment rerun; a click handled during a
+    # full run (merged into a pending rerun, or replayed by AppTest) reruns everything
+    if FRAGMENTS and fragment_rerun_root():
+        st.rerun(scope="fragment")
+    st.rerun()
+
+def fragment_rerun_root():
+    # True in the fragment a partial rerun was started for (not in fragments nested in it)
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run
+                and ctx.current_fragment_id in ctx.fragment_ids_this_run)
+
+class PayloadMeter:
+    """Wraps the run context's message queue to measure each interaction.
+
+    Counts delta messages and their serialized size before websocket
+    compression; audio is served over HTTP, so the script adds each new clip
+    itself. An interaction lasts from the first run after the previous
+    ``take()`` to the next one, so runs cut short by st.rerun() count
+    towards the run that follows.
+    """
+
+    def __init__(self, enqueue):
+        self.enqueue = enqueue
+        self.started = None
+        self.messages = 0
+        self.bytes = 0
+
+    def __call__(self, msg):
+        self.messages += 1
+        self.bytes += msg.ByteSize()
+        self.enqueue(msg)
+
+    def take(self):
+        seconds = time.perf_counter() - self.started if self.started is not None else 0.0
+        result = (seconds, self.messages, self.bytes)
+        self.started = None
+        self.messages = self.bytes = 0
+        return result
+
+def meter_payload():
+    # The context outlives a single run, so the meter is installed once per session
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    if not isinstance(ctx._enqueue, PayloadMeter):
+        ctx._enqueue = PayloadMeter(ctx._enqueue)
+    meter = ctx._enqueue
+    if meter.started is None:
+        meter.started = time.perf_counter()
+    return meter
+
+def record_interaction(scope):
+    # Script time, delta messages and bytes of the interaction that just finished
+    meter = meter_payload()
+    if meter is None:
+        return None
+    seconds, messages, sent = meter.take()
+    st.session_state.bytes_sent += sent
+    st.session_state.last_interaction = {
+        "scope": scope, "ms": seconds * 1000, "messages": messages, "bytes": sent,
+    }
+    if TRACER.enabled:
+        TRACER.observe(f"app.interaction.{scope}", seconds)
+    return st.session_state.last_interaction
+
+def detect_low_bandwidth():
+    lite = st.query_params.get("lite")
+    if lite is not None:
+        return lite.lower() not in ("0", "false", "off")
+    if LOW_BANDWIDTH != "auto":
+        return LOW_BANDWIDTH == "on"
+    headers = st.context.headers
+    return (headers.get("Save-Data", "").lower() == "on"
+            or headers.get("ECT", "").lower() in SLOW_CONNECTIONS)
+
+meter_payload()
 
 # App configuration
 st.set_page_config(
@@ -14,310 +149,144 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Modern UI with new color scheme
-st.markdown("""
-<style>
-    :root {
-        --primary: #4CAF50;
-        --secondary: #4DB6AC;
-        --accent: #C0CA33;
-        --vibrant1: #4DB6AC;
-        --vibrant2: #263238;
-        --background: #FFFFFF;
-        --card: #FFFFFF;
-        --text: #263238;
-        --success: #4CAF50;
-        --warning: #FFC107;
-    }
-    
-    [data-testid="stAppViewContainer"] {
-        background-color: var(--background);
-        background-image: linear-gradient(135deg, #FFFFFF 0%, #E0E0E0 100%);
-        animation: gradientBG 15s ease infinite;
-        background-size: 400% 400%;
-    }
-    
-    @keyframes gradientBG {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    .st-bb {background-color: var(--card);}
-    
-    header[data-testid="stHeader"] {
-        background: rgba(255,255,255,0.9);
-        backdrop-filter: blur(10px);
-        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-    }
-    
-    .stButton>button {
-        background: linear-gradient(135deg, var(--primary), var(--secondary));
-        color: white;
-        border-radius: 15px;
-        padding: 12px 24px;
-        font-weight: 600;
-        transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-        border: none;
-        box-shadow: 0 6px 12px rgba(76, 175, 80, 0.3);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-4px) scale(1.02);
-        box-shadow: 0 12px 20px rgba(76, 175, 80, 0.4);
-    }
-    
-    .stButton>button:after {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-        transition: 0.5s;
-    }
-    
-    .stButton>button:hover:after {
-        left: 100%;
-    }
-    
-    .stTextInput>div>div>input, .stTextArea>div>div>textarea {
-        border-radius: 15px;
-        padding: 14px 18px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
-        border: 2px solid #e0e0e0;
-        transition: all 0.3s ease;
-    }
-    
-    .stTextInput>div>div>input:focus, .stTextArea>div>div>textarea:focus {
-        border-color: var(--primary);
-        box-shadow: 0 0 0 3px rgba(76, 175, 80, 0.2);
-        transform: scale(1.01);
-    }
-    
-    .stRadio>div {
-        flex-direction: row;
-        gap: 20px;
-    }
-    
-    .stRadio>div>label {
-        background: var(--card);
-        padding: 18px 24px;
-        border-radius: 15px;
-        box-shadow: 0 6px 15px rgba(0,0,0,0.08);
-        transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-        border: 2px solid transparent;
-        cursor: pointer;
-    }
-    
-    .stRadio>div>label:hover {
-        transform: translateY(-5px) scale(1.03);
-        box-shadow: 0 10px 25px rgba(0,0,0,0.15);
-        border-color: var(--primary);
-    }
-    
-    .stRadio>div>label[data-baseweb="radio"]:has(> div:first-child[aria-checked="true"]) {
-        background: linear-gradient(135deg, rgba(76, 175, 80, 0.1), rgba(77, 182, 172, 0.15));
-        border-color: var(--primary);
-        transform: translateY(-3px);
-    }
-    
-    .card {
-        background: var(--card);
-        border-radius: 20px;
-        padding: 30px;
-        box-shadow: 0 8px 30px rgba(0,0,0,0.08);
-        margin-bottom: 30px;
-        transition: all 0.5s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-        border: 1px solid rgba(0,0,0,0.03);
-        overflow: hidden;
-        position: relative;
-    }
-    
-    .card:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 5px;
-        height: 100%;
-        background: linear-gradient(to bottom, var(--vibrant1), var(--vibrant2));
-        transition: width 0.5s ease;
-    }
-    
-    .card:hover {
-        transform: translateY(-8px) scale(1.01);
-        box-shadow: 0 15px 40px rgba(0,0,0,0.15);
-    }
-    
-    .card:hover:before {
-        width: 8px;
-    }
-    
-    .language-badge {
-        padding: 10px 22px;
-        border-radius: 50px;
-        font-weight: bold;
-        display: inline-block;
-        margin-bottom: 20px;
-        background: linear-gradient(135deg, var(--vibrant1), var(--vibrant2));
-        color: white;
-        box-shadow: 0 6px 15px rgba(77, 182, 172, 0.3);
-        animation: pulse 2s infinite;
-    }
-    
-    @keyframes pulse {
-        0% { box-shadow: 0 0 0 0 rgba(77, 182, 172, 0.5); }
-        70% { box-shadow: 0 0 0 15px rgba(77, 182, 172, 0); }
-        100% { box-shadow: 0 0 0 0 rgba(77, 182, 172, 0); }
-    }
-    
-    .user-msg {
-        background: linear-gradient(135deg, var(--primary), var(--secondary));
-        color: white;
-        border-radius: 22px 22px 5px 22px;
-        padding: 18px 24px;
-        margin: 15px 0;
-        max-width: 80%;
-        align-self: flex-end;
-        box-shadow: 0 8px 20px rgba(76, 175, 80, 0.25);
-        animation: slideInRight 0.5s ease;
-    }
-    
-    .assistant-msg {
-        background: white;
-        color: var(--text);
-        border-radius: 22px 22px 22px 5px;
-        padding: 18px 24px;
-        margin: 15px 0;
-        max-width: 80%;
-        align-self: flex-start;
-        box-shadow: 0 8px 20px rgba(0,0,0,0.08);
-        border: 1px solid #f0f0f0;
-        animation: slideInLeft 0.5s ease;
-    }
-    
-    @keyframes slideInLeft {
-        from { opacity: 0; transform: translateX(-30px); }
-        to { opacity: 1; transform: translateX(0); }
-    }
-    
-    @keyframes slideInRight {
-        from { opacity: 0; transform: translateX(30px); }
-        to { opacity: 1; transform: translateX(0); }
-    }
-    
-    .tab-content {
-        animation: fadeIn 0.5s ease;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .glowing-border {
-        position: relative;
-        box-shadow: 0 0 10px var(--accent);
-        animation: glow 1.5s infinite alternate;
-    }
-    
-    @keyframes glow {
-        from { box-shadow: 0 0 10px -10px var(--accent); }
-        to { box-shadow: 0 0 10px 10px rgba(192, 202, 51, 0.3); }
-    }
-    
-    .floating {
-        animation: float 6s ease-in-out infinite;
-    }
-    
-    @keyframes float {
-        0% { transform: translateY(0px); }
-        50% { transform: translateY(-20px); }
-        100% { transform: translateY(0px); }
-    }
-    
-    .icon-hover {
-        transition: all 0.5s ease;
-    }
-    
-    .icon-hover:hover {
-        transform: rotate(15deg) scale(1.2);
-        filter: drop-shadow(0 5px 15px rgba(0,0,0,0.2));
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Initialize session state
+if 'low_bandwidth' not in st.session_state or 'lite' in st.query_params:
+    st.session_state.low_bandwidth = detect_low_bandwidth()
+if 'bytes_sent' not in st.session_state:
+    st.session_state.bytes_sent = 0
+    st.session_state.last_interaction = None
+    st.session_state.metered_audio_key = None
 if 'conversation' not in st.session_state:
-    st.session_state.conversation = []
+    st.session_state.conversation = ConversationHistory()
+if 'conversation_page' not in st.session_state:
+    st.session_state.conversation_page = 0
 if 'selected_language' not in st.session_state:
     st.session_state.selected_language = "Zulu"
-if 'audio_response' not in st.session_state:
-    st.session_state.audio_response = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'audio_key' not in st.session_state:
+    st.session_state.audio_key = None
+if 'audio_mime' not in st.session_state:
+    st.session_state.audio_mime = None
 if 'domain' not in st.session_state:
     st.session_state.domain = "Healthcare"
 if 'user_input' not in st.session_state:
     st.session_state.user_input = ""
+if 'profile_next' not in st.session_state:
+    st.session_state.profile_next = False
+if 'last_profile' not in st.session_state:
+    st.session_state.last_profile = None
+if 'prefetched_for' not in st.session_state:
+    st.session_state.prefetched_for = None
 
-# Load language resources
-LANGUAGE_RESOURCES = {
-    "Zulu": {
-        "greeting": "Sawubona! Ngingakusiza ngani namuhla?",
-        "agriculture": {
-            "pests": "Ukulwa nezinambuzane, sebenzisa i-organic pesticide. Hlola izitshalo nsuku zonke.",
-            "planting": "Isikhathi esihle sokutshala u-September kuya ku-October emaphandleni aseNingizimu Afrika.",
-            "soil": "Hlola umhlabathi wakho ngonyaka. Geza ngomquba wemvelo ukuze uthuthukise isimo somhlabathi.",
-            "water": "Qinisekisa ukuthi izitshalo zakho zithola amanzi anele, ikakhulukazi ehlobo."
-        },
-        "healthcare": {
-            "symptoms": "Uma unezimpawu ezingajwayelekile, xhumana nogoti wezempilo ngokushesha.",
-            "medication": "Ungaphuze umuthi ngaphandle kokweluleka kudokotela.",
-            "hygiene": "Geza izandla zakho qhaba ngesikhathi eside ukuze uvimbele ukusakazeka kwegciwane.",
-            "nutrition": "Idla ukudla okunomsoco okuhlanganisa imifino, izithelo kanye namaprotheni."
-        }
-    },
-    "Tswana": {
-        "greeting": "Dumela! O ka thusa jang kajeno?",
-        "agriculture": {
-            "pests": "Go lwa le disenyi, dirisa di-pesticide tsa tlhago. Sekaseka dimela letsatsi le letsatsi.",
-            "planting": "Nako e e siameng go jala ke September go ya go October mo mafelong a Aforika Borwa.",
-            "soil": "Sekaseka mmu wa gago ngwaga le ngwaga. O ka dirisa motswako wa tlhago go tokafatsa mmu.",
-            "water": "Netefatsa gore dimela tsa gago di na le metsi a lekaneng, bogolo segologolo mo marung."
-        },
-        "healthcare": {
-            "symptoms": "Fa o na le matshwao a a sa tlwaelegang, ikopanye le moapei wa tsa boitekanelo ka bonako.",
-            "medication": "O se ka wa nwa ditlhare ntle le go laola ngaka.",
-            "hygiene": "Hlatswa diatla tsa gago ka nako e telele go thibela phetiso ya diruiwa.",
-            "nutrition": "Ja dijo tse di nonneng tse di akaretsang merogo, maungo le diprotein."
-        }
-    }
-}
+lite = st.session_state.low_bandwidth
 
-# Generate audio response with correct language codes
-def generate_audio_response(text, language):
-    try:
-        # Correct language codes: Zulu = 'zu', Tswana = 'ts'
-        lang_code = "zu" if language == "Zulu" else "ts"
-        tts = gTTS(text=text, lang=lang_code, slow=False)
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-            tts.save(tmp.name)
-            audio_bytes = tmp.read()
-        
-        return audio_bytes
-    except Exception as e:
-        st.error(f"Audio generation failed: {str(e)}")
+# Modern UI with new color scheme; a small static sheet in low-bandwidth mode
+st.markdown(LITE_CSS if lite else APP_CSS, unsafe_allow_html=True)
+
+# Shared across sessions and reruns so repeat responses never hit the network
+@st.cache_resource
+def get_event_log():
+    return open_event_log()
+
+@st.cache_resource
+def get_engine():
+    return create_engine(events=get_event_log())
+
+# Audio bytes shared by reference; session state only keeps the key
+@st.cache_resource
+def get_audio_blobs():
+    return BlobStore()
+
+# Submissions are appended to a log; a background thread dedups and merges them
+@st.cache_resource
+def get_contributions():
+    return ContributionQueue().start()
+
+# One background pool per process, so prefetch stays within a fixed TTS budget
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher(get_engine())
+
+@st.cache_resource
+def get_script_timings():
+    return Timings()
+
+# Keyed by the event log version so charts refresh only when new events arrive
+@shared_data(max_entries=4)
+def load_analytics_data(data_version):
+    return build_analytics_df(get_event_log().rollups("day"))
+
+@shared_resource(max_entries=4)
+def load_analytics_figures(data_version):
+    return build_analytics_figures(load_analytics_data(data_version))
+
+def invalidate_shared_caches():
+    # Drop process-wide cached data so the next rerun rebuilds it
+    if SHARED_CACHE:
+        load_analytics_data.clear()
+        load_analytics_figures.clear()
+    LANGUAGE_RESOURCES.invalidate()
+    # Matchers compiled from the dropped entries go too, rather than relying on version checks alone
+    get_engine().matchers.clear()
+
+def set_audio(response=None):
+    # Swap the session's lease from the previous audio to this response's audio
+    blobs = get_audio_blobs()
+    session_id = st.session_state.session_id
+    if st.session_state.audio_key is not None:
+        blobs.release(st.session_state.audio_key, session_id)
+    st.session_state.audio_key = None
+    st.session_state.audio_mime = None
+    if response is not None and response.audio is not None:
+        key = get_engine().audio_key(response.text, st.session_state.selected_language)
+        if AUDIO_BASE_URL:
+            st.session_state.audio_key = key
+            # MP3 from gTTS, WAV from espeak; the player needs to know which without the bytes
+            st.session_state.audio_mime = audio_mime(response.audio)
+        else:
+            st.session_state.audio_key = blobs.put(response.audio, key=key, holder=session_id)
+
+def current_audio():
+    # Bytes for the session's audio key, re-read from the audio cache if the blob expired
+    key = st.session_state.audio_key
+    if key is None:
         return None
+    audio = get_audio_blobs().get(key, holder=st.session_state.session_id)
+    if audio is None:
+        audio = get_engine().audio_cache.lookup(key)
+        if audio is not None:
+            get_audio_blobs().put(audio, key=key, holder=st.session_state.session_id)
+    return audio
+
+def quick_action(domain):
+    # Unknown domains fall back to the healthcare action, as before
+    return QUICK_ACTIONS.get(domain.lower(), QUICK_ACTIONS["healthcare"])
+
+def prefetch_selection():
+    # Warm the audio this session is likely to ask for next, once per language/domain choice
+    language, domain = st.session_state.selected_language, st.session_state.domain
+    if st.session_state.prefetched_for == (language, domain):
+        return
+    st.session_state.prefetched_for = (language, domain)
+    intents = [quick_action(domain)[0], None, *LANGUAGE_RESOURCES[language].get(domain.lower(), {})]
+    get_prefetcher().select(st.session_state.session_id, language, domain, intents)
+
+def show_response(response, user_text=None):
+    # Record one exchange in the session and surface audio errors
+    conversation = st.session_state.conversation
+    if user_text is not None:
+        conversation.append(USER, user_text)
+    conversation.append(ASSISTANT, response.text, response.intent)
+    st.session_state.conversation_page = 0
+    set_audio(response)
+    if response.error:
+        st.error(f"Audio generation failed: {response.error}")
 
 # App layout
 st.title("🌍 Indigenous Language Assistant")
 st.markdown("""
-<div style="font-size:1.1rem; color:#555; margin-bottom:30px; animation: fadeIn 1.5s ease;">
+<div style="font-size:1.1rem; color:#555; margin-bottom:30px;">
 Empowering communication in Zulu and Tswana through accessible language technology
 </div>
 """, unsafe_allow_html=True)
@@ -325,18 +294,29 @@ Empowering communication in Zulu and Tswana through accessible language technolo
 # Sidebar with modern design
 with st.sidebar:
     st.markdown("<div style='text-align:center; margin-bottom:30px;'>"
-                "<div class='floating' style='margin-bottom:20px;'>"
-                "<img src='https://upload.wikimedia.org/wikipedia/commons/thumb/6/69/Flag_of_South_Africa.svg/1200px-Flag_of_South_Africa.svg.png' width='80' style='border-radius:50%; box-shadow:0 10px 30px rgba(0,0,0,0.2);'>"
+                f"<div class='{'' if lite else 'floating'}' style='margin-bottom:20px;'>"
+                f"<img src='{FLAG_DATA_URI}' width='80' height='80' alt='Flag of South Africa' "
+                "style='border-radius:50%; object-fit:cover;'>"
                 "</div>"
                 "<h2 style='margin-top:10px;'>Settings</h2></div>", 
                 unsafe_allow_html=True)
     
+    st.session_state.low_bandwidth = st.toggle(
+        "📶 Low-bandwidth mode",
+        value=lite,
+        help="Lighter styling, no animations and charts only on request. Add ?lite=1 to the URL to start in it."
+    )
+    if st.session_state.low_bandwidth != lite:
+        # Keep the URL in step so reloading or sharing it keeps the mode
+        st.query_params["lite"] = "1" if st.session_state.low_bandwidth else "0"
+        st.rerun()
+    
     with st.container():
         st.subheader("Language Preference")
         st.session_state.selected_language = st.radio(
             "Select Language",
-            ["Zulu", "Tswana"],
-            index=0 if st.session_state.selected_language == "Zulu" else 1,
+            LANGUAGE_RESOURCES.languages(),
+            index=LANGUAGE_RESOURCES.languages().index(st.session_state.selected_language),
             label_visibility="collapsed"
         )
     
@@ -364,16 +344,85 @@ with st.sidebar:
         </div>
         """, unsafe_allow_html=True)
         
+        cache_stats = get_engine().audio_cache.stats()
+        st.caption(f"🎧 Audio cache: {cache_stats['hits']} hits • {cache_stats['misses']} misses")
+        
+        with st.expander("⏱️ Performance"):
+            timings = get_script_timings().summary()
+            st.caption(
+                f"Script run: last {timings['last_ms']:.1f} ms • p50 {timings['p50_ms']:.1f} ms • "
+                f"p95 {timings['p95_ms']:.1f} ms over {timings['count']} runs "
+                f"({'shared cache on' if SHARED_CACHE else 'shared cache off'})"
+            )
+            if TRACER.enabled:
+                stages = TRACER.summary()
+                if stages:
+                    st.dataframe(
+                        [{"stage": name, **{k: round(v, 2) for k, v in stats.items()}}
+                         for name, stats in stages.items()],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+            prefetch = get_prefetcher().stats()
+            st.caption(
+                f"Prefetch: {prefetch['completed']} warmed • {prefetch['cached']} already cached • "
+                f"{prefetch['cancelled']} cancelled • {prefetch['pending']} pending"
+            )
+            backend_stats = getattr(get_engine().audio_cache.synthesize, "stats", None)
+            if backend_stats is not None:
+                st.dataframe(
+                    [{"backend": name, **{k: round(v, 1) if isinstance(v, float) else v for k, v in stats.items()}}
+                     for name, stats in backend_stats().items()],
+                    hide_index=True,
+                    use_container_width=True
+                )
+            st.session_state.profile_next = st.checkbox(
+                "🔬 Profile next request",
+                value=st.session_state.profile_next
+            )
+            if st.session_state.last_profile:
+                st.code(st.session_state.last_profile, language="text")
+            if st.button("♻️ Refresh shared data", use_container_width=True):
+                invalidate_shared_caches()
+                st.rerun()
+        
         st.markdown("""
         <div style='margin-top:30px; text-align:center; color:#777; font-size:0.9rem;'>
         © 2023 | Bridging language barriers
         </div>
         """, unsafe_allow_html=True)
 
-# Main content tabs
-tab1, tab2, tab3 = st.tabs(["Assistant", "Resources", "Analytics"])
+@rerunnable
+def conversation_view():
+    # Paging through older messages reruns only this view
+    chat_container = st.container()
+    
+    # Display only the visible page of the conversation
+    conversation = st.session_state.conversation
+    if conversation:
+        pages = conversation.page_count()
+        page = min(st.session_state.conversation_page, pages - 1)
+        if pages > 1:
+            older_col, position_col, newer_col = chat_container.columns([1, 2, 1])
+            if older_col.button("⬆️ Older", disabled=page >= pages - 1, use_container_width=True):
+                st.session_state.conversation_page = page + 1
+                rerun_region()
+            if newer_col.button("⬇️ Newer", disabled=page == 0, use_container_width=True):
+                st.session_state.conversation_page = page - 1
+                rerun_region()
+            dropped = f" ({conversation.dropped} older messages dropped)" if conversation.dropped else ""
+            position_col.caption(f"Page {pages - page} of {pages}{dropped}")
+        chat_container.markdown("".join(
+            f"<div class='user-msg'><b>You:</b> {turn.text}</div>" if turn.speaker == USER
+            else f"<div class='assistant-msg'><b>Assistant:</b> {turn.text}</div>"
+            for turn in conversation.page(page)
+        ), unsafe_allow_html=True)
+    else:
+        chat_container.info("✨ Start a conversation by typing a message below")
 
-with tab1:
+@rerunnable
+def assistant_panel():
+    # Send, Quick Actions and Clear rerun this panel only, not the sidebar or header
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -383,19 +432,7 @@ with tab1:
         
         # Chat container
         with st.container():
-            chat_container = st.container()
-            
-            # Display conversation
-            if st.session_state.conversation:
-                for msg in st.session_state.conversation:
-                    if msg['speaker'] == "User":
-                        chat_container.markdown(f"<div class='user-msg'><b>You:</b> {msg['text']}</div>", 
-                                              unsafe_allow_html=True)
-                    else:
-                        chat_container.markdown(f"<div class='assistant-msg'><b>Assistant:</b> {msg['text']}</div>", 
-                                              unsafe_allow_html=True)
-            else:
-                chat_container.info("✨ Start a conversation by typing a message below")
+            conversation_view()
         
         # Input area
         with st.form("input_form", clear_on_submit=True):
@@ -405,52 +442,22 @@ with tab1:
             submit_button = st.form_submit_button("🚀 Send", use_container_width=True)
             
             if submit_button and user_input:
-                st.session_state.user_input = user_input
-                
-                # Process query
-                domain_key = st.session_state.domain.lower()
-                lang_data = LANGUAGE_RESOURCES[st.session_state.selected_language]
-                
-                # Enhanced intent recognition with multiple keywords
-                user_text = user_input.lower()
-                response = lang_data['greeting']
-                
-                # Agriculture intents
-                if any(word in user_text for word in ["pest", "insect", "bug", "zinambuzane", "disenyi"]):
-                    response = lang_data[domain_key]['pests']
-                elif any(word in user_text for word in ["plant", "grow", "seed", "tshala", "jala"]):
-                    response = lang_data[domain_key]['planting']
-                elif any(word in user_text for word in ["soil", "dirt", "earth", "umhlabathi", "mmu"]):
-                    response = lang_data[domain_key]['soil']
-                elif any(word in user_text for word in ["water", "irrigate", "rain", "amanzi", "metsi"]):
-                    response = lang_data[domain_key]['water']
-                    
-                # Healthcare intents
-                elif any(word in user_text for word in ["symptom", "pain", "fever", "impawu", "matshwao"]):
-                    response = lang_data[domain_key]['symptoms']
-                elif any(word in user_text for word in ["medic", "pill", "drug", "umuthi", "dithlare"]):
-                    response = lang_data[domain_key]['medication']
-                elif any(word in user_text for word in ["hygiene", "clean", "wash", "hlanza", "hlatswa"]):
-                    response = lang_data[domain_key]['hygiene']
-                elif any(word in user_text for word in ["nutrition", "food", "diet", "ukudla", "dijo"]):
-                    response = lang_data[domain_key]['nutrition']
-                
-                st.session_state.conversation.append({
-                    "speaker": "User",
-                    "text": user_input
-                })
-                
-                st.session_state.conversation.append({
-                    "speaker": "Assistant",
-                    "text": response
-                })
-                
-                # Generate audio response
-                st.session_state.audio_response = generate_audio_response(
-                    response, 
-                    st.session_state.selected_language
-                )
-                st.rerun()
+                with TRACER.profile("respond", enabled=st.session_state.profile_next) as profiler:
+                    with TRACER.span("app.submit"):
+                        response = get_engine().respond(
+                            user_input,
+                            st.session_state.selected_language,
+                            st.session_state.domain
+                        )
+                        show_response(response, user_text=user_input)
+                if profiler is not None:
+                    report = io.StringIO()
+                    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(15)
+                    st.session_state.last_profile = report.getvalue()
+                    st.session_state.profile_next = False
+                    # The report is shown in the sidebar, outside this panel
+                    st.rerun()
+                rerun_region()
     
     with col2:
         st.markdown("### 🔊 Audio Response")
@@ -460,15 +467,30 @@ with tab1:
             card = st.container()
             card.markdown("<div class='card'>", unsafe_allow_html=True)
             
-            if st.session_state.audio_response:
-                card.audio(st.session_state.audio_response, format="audio/mp3")
-                card.download_button(
-                    label="📥 Download Audio",
-                    data=st.session_state.audio_response,
-                    file_name=f"{st.session_state.selected_language}_response.mp3",
-                    mime="audio/mp3",
-                    use_container_width=True
-                )
+            audio_key = st.session_state.audio_key
+            if audio_key and AUDIO_BASE_URL:
+                # Served by reference: no bytes pass through this process
+                audio_url = f"{AUDIO_BASE_URL}/audio/{audio_key}"
+                card.audio(audio_url, format=st.session_state.audio_mime or "audio/mpeg")
+                card.link_button("📥 Download Audio", audio_url, use_container_width=True)
+            elif audio_key and (audio := current_audio()) is not None:
+                # The BlobStore hands every session the same buffer, and the media manager
+                # keys files by content, so sessions playing one clip share one copy
+                meter = meter_payload()
+                if meter is not None and audio_key != st.session_state.metered_audio_key:
+                    # The browser fetches each new clip once (and again on download)
+                    st.session_state.metered_audio_key = audio_key
+                    meter.bytes += len(audio)
+                with TRACER.span("app.render_audio"):
+                    mime = audio_mime(audio)
+                    card.audio(audio, format=mime)
+                    card.download_button(
+                        label="📥 Download Audio",
+                        data=audio,
+                        file_name=f"{st.session_state.selected_language}_response.{AUDIO_EXTENSIONS[mime]}",
+                        mime=mime,
+                        use_container_width=True
+                    )
             else:
                 card.info("🎤 Submit a message to generate an audio response")
             
@@ -481,50 +503,49 @@ with tab1:
             card = st.container()
             card.markdown("<div class='card'>", unsafe_allow_html=True)
             
-            domain_key = st.session_state.domain.lower()
-            lang_data = LANGUAGE_RESOURCES[st.session_state.selected_language]
-            
-            # Fixed KeyError by using appropriate keys for each domain
-            if domain_key == 'agriculture':
-                action_key = 'pests'
-                action_label = "🐜 Ask about pests"
-            else:
-                action_key = 'hygiene'
-                action_label = "🧼 Ask about hygiene"
+            action_key, action_label = quick_action(st.session_state.domain)
             
             if card.button(action_label, use_container_width=True):
-                response = lang_data[domain_key][action_key]
-                st.session_state.conversation.append({
-                    "speaker": "Assistant",
-                    "text": response
-                })
-                st.session_state.audio_response = generate_audio_response(
-                    response, 
-                    st.session_state.selected_language
-                )
-                st.rerun()
+                show_response(get_engine().respond_intent(
+                    st.session_state.selected_language,
+                    st.session_state.domain,
+                    action_key
+                ))
+                rerun_region()
                 
             if card.button("👋 Request greeting", use_container_width=True):
-                response = lang_data['greeting']
-                st.session_state.conversation.append({
-                    "speaker": "Assistant",
-                    "text": response
-                })
-                st.session_state.audio_response = generate_audio_response(
-                    response, 
-                    st.session_state.selected_language
-                )
-                st.rerun()
+                show_response(get_engine().respond_intent(
+                    st.session_state.selected_language,
+                    st.session_state.domain
+                ))
+                rerun_region()
                 
             if card.button("🗑️ Clear Conversation", use_container_width=True):
-                st.session_state.conversation = []
-                st.session_state.audio_response = None
-                st.session_state.user_input = ""
-                st.rerun()
+                st.session_state.conversation.clear()
+                st.session_state.conversation_page = 0
+                set_audio(None)
+                rerun_region()
             
             card.markdown("</div>", unsafe_allow_html=True)
 
-with tab2:
+prefetch_selection()
+
+# Main sections: st.tabs would run every section's body on each rerun, so
+# only the selected one is rendered (Analytics work never delays a reply)
+SECTIONS = ["Assistant", "Resources", "Analytics"]
+section = st.radio(
+    "Section",
+    SECTIONS,
+    horizontal=True,
+    key="active_section",
+    format_func={"Assistant": "💬 Assistant", "Resources": "📚 Resources", "Analytics": "📊 Analytics"}.get,
+    label_visibility="collapsed"
+)
+
+if section == "Assistant":
+    assistant_panel()
+
+elif section == "Resources":
     st.subheader("Language Resources")
     st.markdown("""
     <div class="card">
@@ -615,16 +636,33 @@ with tab2:
         with cols[1]:
             email = st.text_input("Email")
         
-        language = st.selectbox("Language", ["Zulu", "Tswana"])
+        language = st.selectbox("Language", LANGUAGE_RESOURCES.languages())
+        topics = sorted({
+            (domain, intent)
+            for lang in LANGUAGE_RESOURCES.languages()
+            for domain, intents in LANGUAGE_RESOURCES.keywords(lang).items()
+            for intent in intents
+        })
+        topic = st.selectbox(
+            "Topic (optional)",
+            [None] + topics,
+            format_func=lambda t: "Not sure" if t is None else f"{t[0].title()} • {t[1].title()}",
+        )
         contribution = st.text_area("Contribution (phrase, translation, or resource)")
         
         submitted = st.form_submit_button("✨ Submit Contribution")
         if submitted:
-            st.success("🌟 Thank you for your contribution! Our language team will review it.")
+            if not contribution.strip():
+                st.warning("Please enter a phrase, translation or resource to contribute.")
+            else:
+                domain, intent = topic or (None, None)
+                get_contributions().submit(language, contribution, name=name, email=email,
+                                           domain=domain, intent=intent)
+                st.success("🌟 Thank you for your contribution! Our language team will review it.")
     
     st.markdown("</div>", unsafe_allow_html=True)
 
-with tab3:
+elif section == "Analytics":
     st.subheader("Usage Analytics")
     st.markdown("""
     <div class="card">
@@ -633,100 +671,50 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
     
-    # Generate mock analytics data
-    languages = ["Zulu", "Tswana", "Zulu", "Tswana", "Zulu", "Tswana", "Zulu"]
-    domains = ["Healthcare", "Agriculture", "Healthcare", "Agriculture", "Healthcare", "Agriculture", "Healthcare"]
-    regions = ["KwaZulu-Natal", "North West", "Gauteng", "Limpopo", "Eastern Cape", "Free State", "Western Cape"]
-    usage = [150, 95, 120, 85, 140, 90, 130]
+    event_log = get_event_log()
+    totals = event_log.totals()
     
-    analytics_df = pd.DataFrame({
-        "Language": languages,
-        "Domain": domains,
-        "Region": regions,
-        "Usage": usage
-    })
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        with st.container():
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("#### Language Distribution")
-            lang_counts = analytics_df["Language"].value_counts().reset_index()
-            fig1 = px.pie(
-                lang_counts, 
-                names="Language", 
-                values="count",
-                color="Language",
-                color_discrete_map={"Zulu": "#4DB6AC", "Tswana": "#263238"},
-                hole=0.3
-            )
-            fig1.update_traces(textposition='inside', textinfo='percent+label')
-            fig1.update_layout(showlegend=False)
-            st.plotly_chart(fig1, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+    if not totals["events"]:
+        st.info("📭 No usage recorded yet. Charts appear once people start asking questions.")
+    else:
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Queries answered", f"{totals['events']:,}")
+        metric_cols[1].metric("Mean response time", f"{totals['mean_latency_ms']:.0f} ms")
+        metric_cols[2].metric("Audio cache hit rate", f"{totals['cache_hit_rate']:.0%}")
         
-        with st.container():
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("#### Regional Adoption")
-            region_counts = analytics_df.groupby("Region")["Usage"].sum().reset_index()
-            fig2 = px.bar(
-                region_counts, 
-                x="Region", 
-                y="Usage",
-                color="Region",
-                color_discrete_sequence=["#4CAF50", "#4DB6AC", "#C0CA33", "#263238", "#E0E0E0"],
-                title="Usage by Region",
-                height=350
-            )
-            fig2.update_layout(showlegend=False)
-            st.plotly_chart(fig2, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-    
-    with col2:
-        with st.container():
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("#### Domain Usage")
-            domain_counts = analytics_df["Domain"].value_counts().reset_index()
-            fig3 = px.pie(
-                domain_counts, 
-                names="Domain", 
-                values="count",
-                color="Domain",
-                color_discrete_map={"Healthcare": "#4CAF50", "Agriculture": "#4DB6AC"},
-                title="Usage by Application Domain",
-                hole=0.3
-            )
-            fig3.update_traces(textposition='inside', textinfo='percent+label')
-            fig3.update_layout(showlegend=False)
-            st.plotly_chart(fig3, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+    # Four plotly figures are re-sent on every rerun, so they are opt-in when bandwidth is scarce
+    if totals["events"] and lite and not st.toggle("📈 Show charts", key="show_charts"):
+        st.caption("Charts are hidden in low-bandwidth mode.")
+    elif totals["events"]:
+        figures = load_analytics_figures(event_log.version)
         
-        with st.container():
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown("#### Monthly Growth")
-            months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
-            zulu_growth = [80, 110, 150, 190, 240, 300]
-            tswana_growth = [50, 75, 110, 150, 190, 240]
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            with st.container():
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("#### Language Distribution")
+                st.plotly_chart(figures["languages"], use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
             
-            fig4 = px.line(
-                x=months,
-                y=[zulu_growth, tswana_growth],
-                title="Monthly Active Users",
-                labels={"x": "Month", "value": "Users"},
-                color_discrete_sequence=["#4DB6AC", "#263238"]
-            )
-            fig4.update_layout(
-                showlegend=True,
-                legend_title="Language",
-                yaxis_title="Users",
-                xaxis_title="Month",
-                height=350
-            )
-            fig4.data[0].name = "Zulu"
-            fig4.data[1].name = "Tswana"
-            st.plotly_chart(fig4, use_container_width=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+            with st.container():
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("#### Popular Topics")
+                st.plotly_chart(figures["intents"], use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            with st.container():
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("#### Domain Usage")
+                st.plotly_chart(figures["domains"], use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            with st.container():
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("#### Daily Growth")
+                st.plotly_chart(figures["growth"], use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
 
 # Footer
 st.divider()
@@ -738,3 +726,19 @@ st.markdown("""
     <a href="#" style="color:#4CAF50;">Community Guidelines</a>
 </div>
 """, unsafe_allow_html=True)
+
+# Bytes this interaction sent to the browser; many users pay per MB.
+# Fragment reruns record their own (see assistant_panel) and show up here next time.
+interaction = record_interaction("script")
+if interaction is not None:
+    st.sidebar.caption(
+        f"📶 This update: {interaction['bytes'] / 1024:.1f} KB • "
+        f"session: {st.session_state.bytes_sent / 1024:.0f} KB"
+    )
+
+# Per-rerun script execution time, shared across sessions
+script_seconds = time.perf_counter() - script_started
+get_script_timings().record(script_seconds)
+if TRACER.enabled:
+    TRACER.observe("app.script", script_seconds)
+TRACER.export_if_due()
@@ -0,0 +1,411 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from metrics import TRACER
+from tts import (audio_mime, join_audio, same_format, split_sentences, split_wav, stream_voiced, synthesize_voiced,
+                 voice_id, voice_ids, wav_bytes)
+
+
+def cache_key(text, lang_code, slow=False, voice=""):
+    # Content-addressed key: same backend voice, text, language and speed always map to the same audio
+    payload = f"{voice}\0{lang_code}\0{int(bool(slow))}\0{text}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class AudioCache:
+    """Two-tier (memory LRU + disk) cache in front of a TTS synthesize callable.
+
+    ``synthesize(text, lang_code, slow)`` must return the audio bytes; swap it for
+    ``tts.FakeSynthesizer`` in tests to avoid network calls. If it also has a
+    ``stream`` method, ``stream()`` yields chunks as the backend produces them.
+    """
+
+    def __init__(self, synthesize, cache_dir=None, memory_budget=16 * 1024 * 1024,
+                 disk_budget=256 * 1024 * 1024, shared=False):
+        self.synthesize = synthesize
+        self.cache_dir = cache_dir
+        # Several processes use cache_dir: look for files this process hasn't indexed
+        self.shared = shared
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    # Public API
+
+    def key(self, text, lang_code, slow=False, voice=None):
+        # Keys carry the backend identity, so one cache_dir can be shared by several engines;
+        # without a voice, the key of the backend that would be tried first
+        if voice is None:
+            voice = voice_id(self.synthesize, lang_code)
+        return cache_key(text, lang_code, slow, voice)
+
+    def cached_key(self, text, lang_code, slow=False):
+        # Key the audio for text is stored under: the preferred voice's, else a fallback's
+        for voice in voice_ids(self.synthesize, lang_code):
+            key = cache_key(text, lang_code, slow, voice)
+            if key in self:
+                return key
+        return None
+
+    def cached(self, text, lang_code, slow=False, voice=None):
+        # (voice, audio) from the cache, trying the preferred voice first; None on a miss
+        voices = voice_ids(self.synthesize, lang_code) if voice is None else [voice]
+        for candidate in voices:
+            data = self.lookup(cache_key(text, lang_code, slow, candidate))
+            if data is not None:
+                return candidate, data
+        return None
+
+    def get(self, text, lang_code, slow=False):
+        return self.render(text, lang_code, slow)[1]
+
+    def render(self, text, lang_code, slow=False, voice=None):
+        """Returns ``(voice, audio)``, synthesizing on a miss.
+
+        Audio is cached under the key of the voice that produced it, so a
+        fallback backend's answer never poses as the preferred backend's.
+        ``voice`` restricts both the lookup and the synthesis to one backend.
+        """
+        hit = self.cached(text, lang_code, slow, voice)
+        if hit is not None:
+            return hit
+
+        with self._lock:
+            self._counters["misses"] += 1
+        with TRACER.span("tts.synthesize"):
+            voice, data = synthesize_voiced(self.synthesize, text, lang_code, slow, voice)
+        self.put(cache_key(text, lang_code, slow, voice), data)
+        return voice, data
+
+    def stream(self, text, lang_code, slow=False, chunk_size=16 * 1024):
+        # Iterator form of get(): playback can start on the first chunk
+        hit = self.cached(text, lang_code, slow)
+        data = hit[1] if hit is not None else None
+        if data is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            if getattr(self.synthesize, "stream", None) is not None:
+                chunks = []
+                started = time.perf_counter()
+                voice, source = stream_voiced(self.synthesize, text, lang_code, slow)
+                backend_seconds = time.perf_counter() - started
+                while True:
+                    # Time only the backend, not the consumer between chunks
+                    started = time.perf_counter()
+                    chunk = next(source, None)
+                    backend_seconds += time.perf_counter() - started
+                    if chunk is None:
+                        break
+                    chunks.append(chunk)
+                    yield chunk
+                if TRACER.enabled:
+                    TRACER.observe("tts.synthesize", backend_seconds)
+                # Only fully streamed audio is cached
+                self.put(cache_key(text, lang_code, slow, voice), b"".join(chunks))
+                return
+            with TRACER.span("tts.synthesize"):
+                voice, data = synthesize_voiced(self.synthesize, text, lang_code, slow)
+            self.put(cache_key(text, lang_code, slow, voice), data)
+
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    def lookup(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return data
+            on_disk = key in self._disk
+
+        # A file missing from the index may have been written by another worker process
+        if not on_disk and not (self.shared and self.cache_dir):
+            return None
+        data = self._read_disk(key)
+        if data is None:
+            return None
+
+        evicted = []
+        with self._lock:
+            self._counters["disk_hits"] += 1
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            else:
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+                evicted = self._evict_disk()
+            self._remember(key, data)
+        for old_key in evicted:
+            self._remove_file(old_key)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+        if self.cache_dir:
+            self._write_disk(key, data)
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._memory or key in self._disk:
+                return True
+        return bool(self.shared and self.cache_dir) and os.path.exists(self._path(key))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["disk_entries"] = len(self._disk)
+            stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            keys = list(self._disk) if disk else []
+            if disk:
+                self._disk.clear()
+                self._disk_bytes = 0
+        for key in keys:
+            self._remove_file(key)
+
+    # Memory tier
+
+    def _remember(self, key, data):
+        # Caller holds the lock
+        size = len(data)
+        if size > self.memory_budget:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    # Disk tier
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _scan_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".mp3"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        # Oldest first so eviction order matches last access time
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        for key in self._evict_disk():
+            self._remove_file(key)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            evicted = self._evict_disk()
+        for old_key in evicted:
+            self._remove_file(old_key)
+
+    def _evict_disk(self):
+        # Caller holds the lock (or is the constructor); returns keys whose files must go
+        evicted = []
+        while self._disk_bytes > self.disk_budget and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._counters["disk_evictions"] += 1
+            evicted.append(key)
+        return evicted
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class ChunkedSynthesis:
+    """Sentence-level synthesis on top of an AudioCache.
+
+    Each sentence is synthesized (and cached) on its own, in parallel on a
+    bounded pool, then stitched back together in order. Sentences shared
+    between responses are reused, and ``stream`` yields the first sentence
+    as soon as it is ready. The stitched audio is cached under the full-text
+    key too, so whole-response lookups keep working. Concurrent ``get`` calls
+    for the same text (a click while prefetch.py is warming it) share one
+    synthesis.
+
+    Sentences can come from different backends when the router falls back
+    for some of them. ``get`` then voices the whole text on one backend, and
+    ``stream`` voices the rest of the text on the first sentence's backend,
+    so a response is never stitched from two voices or formats.
+    """
+
+    def __init__(self, cache, workers=4, min_chars=20, max_chars=200):
+        self.cache = cache
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-chunk")
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def get(self, text, lang_code, slow=False):
+        return self.render(text, lang_code, slow)[1]
+
+    def render(self, text, lang_code, slow=False):
+        # (voice, audio), like AudioCache.render
+        hit = self.cache.cached(text, lang_code, slow)
+        if hit is not None:
+            return hit
+        key = self.cache.key(text, lang_code, slow)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            result = self._synthesize(text, lang_code, slow)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _synthesize(self, text, lang_code, slow):
+        chunks = split_sentences(text, self.min_chars, self.max_chars)
+        if len(chunks) <= 1:
+            return self.cache.render(text, lang_code, slow)
+        parts = list(self._pool.map(lambda chunk: self.cache.render(chunk, lang_code, slow), chunks))
+        voices = {voice for voice, _ in parts}
+        if len(voices) > 1 or not same_format([part for _, part in parts]):
+            # Some sentences fell back to another backend (or came back in another
+            # format): one backend voices the whole text
+            return self.cache.render(text, lang_code, slow)
+        voice = voices.pop()
+        data = join_audio([part for _, part in parts])
+        self.cache.put(self.cache.key(text, lang_code, slow, voice), data)
+        return voice, data
+
+    def stream(self, text, lang_code, slow=False):
+        hit = self.cache.cached(text, lang_code, slow)
+        if hit is not None:
+            yield hit[1]
+            return
+
+        chunks = split_sentences(text, self.min_chars, self.max_chars)
+        if len(chunks) <= 1:
+            yield from self.cache.stream(text, lang_code, slow)
+            return
+
+        futures = [self._pool.submit(self.cache.render, chunk, lang_code, slow) for chunk in chunks]
+        parts = []
+        first_voice = None
+        wav = False
+        try:
+            for index, future in enumerate(futures):
+                voice, part = future.result()
+                # Every sentence is checked, not just the first, before it joins the stream
+                rest = bool(parts) and (voice != first_voice or not same_format([parts[0], part]))
+                if rest:
+                    voice, part = self._rest(text, chunks[index:], lang_code, slow, first_voice, parts[0])
+                parts.append(part)
+                if len(parts) == 1:
+                    first_voice = voice
+                    wav = audio_mime(part) == "audio/wav"
+                if not wav:
+                    yield part
+                elif len(parts) == 1:
+                    # One open-ended WAV header, then raw PCM for every sentence
+                    fmt, pcm = split_wav(part)
+                    yield wav_bytes(fmt, pcm, streaming=True)
+                else:
+                    yield split_wav(part)[1]
+                if rest:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+        self.cache.put(self.cache.key(text, lang_code, slow, first_voice), join_audio(parts))
+
+    def _rest(self, text, chunks, lang_code, slow, voice, first):
+        # A fallback answered a later sentence: the first sentence's backend voices the rest
+        # of the text, so the stream keeps one voice and format
+        try:
+            rest = self.cache.render(" ".join(chunks), lang_code, slow, voice)
+            if not same_format([first, rest[1]]):
+                raise ValueError(f"{voice} answered in another audio format mid-stream")
+            return rest
+        except Exception:
+            # That backend is down (say, its circuit opened mid-response) and the stream can't
+            # change format now. Cache the whole text from one backend so a retry plays it
+            self.cache.render(text, lang_code, slow)
+            raise
@@ -0,0 +1,163 @@
+"""Bulk query processing for CSV exports of (language, domain, text) rows.
+
+Usage:
+    python batch.py questions.csv -o answers.csv --audio-dir answers_audio
+    python batch.py questions.csv --engine fake      # no network
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from engine import create_engine
+from tts import AUDIO_EXTENSIONS, audio_mime, build_synthesizer
+
+BatchResult = namedtuple(
+    "BatchResult",
+    ["index", "language", "domain", "text", "intent", "response", "audio_key", "audio", "error"],
+)
+
+OUTPUT_FIELDS = ["index", "language", "domain", "text", "intent", "response", "audio_file", "error"]
+
+
+def read_rows(path):
+    # Accepts any CSV with language, domain and text columns (header names are case-insensitive)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            yield row.get("language", ""), row.get("domain", ""), row.get("text", "")
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchProcessor:
+    """Streams BatchResults for many rows, sharing one synthesis per distinct response."""
+
+    def __init__(self, engine, workers=4, chunk_size=1000):
+        self.engine = engine
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.stats = {"rows": 0, "syntheses": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    def process(self, rows):
+        started = time.perf_counter()
+        syntheses = {}
+        count = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                for chunk in _chunks(enumerate(rows), self.chunk_size):
+                    pending = defaultdict(list)
+                    for result in self._plan(chunk, pool, syntheses, pending):
+                        count += 1
+                        yield result
+                    # Results leave in completion order, not input order
+                    for future in as_completed(pending):
+                        audio, error = future.result()
+                        for result in pending[future]:
+                            count += 1
+                            yield result._replace(audio=audio, error=error)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats = {
+                "rows": count,
+                "syntheses": len(syntheses),
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+            }
+
+    def _plan(self, chunk, pool, syntheses, pending):
+        # Match intents per (language, domain) group, then queue one synthesis per distinct response
+        groups = defaultdict(list)
+        for index, (language, domain, text) in chunk:
+            groups[(language, domain)].append((index, text))
+
+        for (language, domain), items in groups.items():
+            if language not in self.engine.resources:
+                for index, text in items:
+                    yield BatchResult(index, language, domain, text, None, None, None, None,
+                                      f"Unsupported language: {language}")
+                continue
+
+            intents = self.engine.detect_intents([text for _, text in items], language, domain)
+            for (index, text), intent in zip(items, intents):
+                response = self.engine.lookup(language, domain, intent)
+                key = self.engine.audio_key(response, language)
+                if key is None:
+                    # No backend voices the language: text-only, with nothing to share or look up
+                    yield BatchResult(index, language, domain, text, intent, response, None, None,
+                                      f"No TTS voice available for {language}")
+                    continue
+                future = syntheses.get(key)
+                if future is None:
+                    future = pool.submit(self.engine.generate_audio_response, response, language)
+                    syntheses[key] = future
+                pending[future].append(
+                    BatchResult(index, language, domain, text, intent, response, key, None, None)
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a CSV of (language, domain, text) rows.")
+    parser.add_argument("input", help="CSV file with language, domain and text columns")
+    parser.add_argument("-o", "--output", help="output CSV (default: stdout)")
+    parser.add_argument("--audio-dir", help="write one audio file per distinct response here")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--engine", default="espeak,gtts",
+                        help="TTS backends in fallback order (espeak, gtts, fake)")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    synthesize = build_synthesizer(args.engine, fake_latency=args.fake_latency)
+    processor = BatchProcessor(create_engine(synthesize), workers=args.workers, chunk_size=args.chunk_size)
+    if args.audio_dir:
+        os.makedirs(args.audio_dir, exist_ok=True)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    written = set()
+    try:
+        writer = csv.DictWriter(out, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        for result in processor.process(read_rows(args.input)):
+            audio_file = ""
+            if args.audio_dir and result.audio is not None:
+                audio_file = f"{result.audio_key}.{AUDIO_EXTENSIONS[audio_mime(result.audio)]}"
+                if result.audio_key not in written:
+                    with open(os.path.join(args.audio_dir, audio_file), "wb") as f:
+                        f.write(result.audio)
+                    written.add(result.audio_key)
+            writer.writerow({
+                "index": result.index,
+                "language": result.language,
+                "domain": result.domain,
+                "text": result.text,
+                "intent": result.intent or "",
+                "response": result.response or "",
+                "audio_file": audio_file,
+                "error": result.error or "",
+            })
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    stats = processor.stats
+    print(f"{stats['rows']} rows, {stats['syntheses']} syntheses in {stats['seconds']}s "
+          f"({stats['rows_per_sec']} rows/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Per-interaction cost of the Streamlit app, with and without fragments.
+
+Drives app.py through AppTest and, for every interaction (first load, Send,
+each Quick Action, Clear), reports the wall time of the rerun plus what the
+app's PayloadMeter recorded: script time, delta messages and bytes sent to
+the browser, and whether it ran as a full script run or a fragment rerun.
+
+Each mode gets a fresh AppTest session: ``FRAGMENTS=1`` (the default app)
+and ``FRAGMENTS=0`` (every interaction reruns the whole script). The
+``scope`` column shows what actually ran; if AppTest replays a fragment
+interaction as a full run, both modes report ``script`` and similar numbers.
+
+    python -m benchmarks.app_interactions --messages 5
+"""
+import argparse
+import json
+import os
+import tempfile
+
+_SCRATCH = tempfile.mkdtemp(prefix="assistant-interactions-")
+os.environ.setdefault("TTS_ENGINE", "fake")
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(_SCRATCH, "audio"))
+os.environ.setdefault("PRERENDER_DIR", os.path.join(_SCRATCH, "prerendered"))
+os.environ.setdefault("EVENT_LOG_DIR", os.path.join(_SCRATCH, "analytics"))
+
+import time  # noqa: E402
+
+from benchmarks.run import MULTILINGUAL_MESSAGES, ROOT  # noqa: E402
+
+
+def _button(at, text):
+    return next(button for button in at.button if text in button.label)
+
+
+def interactions(messages):
+    # (name, action) pairs; each action mutates the AppTest and returns it ready to run()
+    steps = [("load", lambda at: at)]
+    for index, (language, domain, text) in enumerate(messages):
+        def send(at, text=text):
+            at.text_area(key="user_input").input(text)
+            return _button(at, "Send").click()
+        steps.append((f"send_{index}", send))
+    steps += [
+        ("quick_action", lambda at: _button(at, "Ask about").click()),
+        ("greeting", lambda at: _button(at, "Request greeting").click()),
+        ("clear", lambda at: _button(at, "Clear Conversation").click()),
+    ]
+    return steps
+
+
+def measure(fragments, messages):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["FRAGMENTS"] = "1" if fragments else "0"
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    rows = []
+    for name, action in interactions(messages):
+        action(at)
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        recorded = at.session_state["last_interaction"] or {}
+        rows.append({
+            "interaction": name,
+            "wall_ms": round(elapsed * 1000, 2),
+            "script_ms": round(recorded.get("ms", 0.0), 2),
+            "scope": recorded.get("scope"),
+            "messages": recorded.get("messages"),
+            "bytes": recorded.get("bytes"),
+        })
+    return rows
+
+
+def summarize(rows):
+    interactive = [row for row in rows if row["interaction"] != "load"]
+    return {
+        "mean_script_ms": sum(row["script_ms"] for row in interactive) / len(interactive),
+        "mean_messages": sum(row["messages"] or 0 for row in interactive) / len(interactive),
+        "mean_bytes": sum(row["bytes"] or 0 for row in interactive) / len(interactive),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Script time and delta messages per app interaction.")
+    parser.add_argument("--messages", type=int, default=3, help="chat messages to send per mode")
+    args = parser.parse_args(argv)
+
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        print(json.dumps({"skipped": "streamlit is not installed"}))
+        return
+
+    messages = MULTILINGUAL_MESSAGES[:args.messages]
+    report = {}
+    for label, fragments in (("fragments", True), ("full_rerun", False)):
+        rows = measure(fragments, messages)
+        report[label] = {"interactions": rows, "summary": summarize(rows)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Scaling test for cluster.py: sessions/sec as the worker count grows.
+
+For each worker count it starts a fresh cluster (fake TTS, throw-away cache
+and analytics dirs), drives it through the balancer for a fixed time and
+reports completed sessions per second:
+
+* ``--app streamlit``: a session opens the app websocket, runs the script
+  once to completion and disconnects (needs streamlit installed)
+* ``--app service``: a session is ``--requests-per-session`` POST /respond
+  calls pinned to one worker by the balancer cookie
+
+    python -m benchmarks.cluster_load --workers 1,2,4 --app service --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from cluster import serve_balancer, start_workers, stop_workers, wait_ready
+
+MESSAGES = [
+    ("Zulu", "Healthcare", "Nginezimpawu zomkhuhlane"),
+    ("Zulu", "Agriculture", "Izinambuzane zidla izitshalo zami"),
+    ("Tswana", "Healthcare", "Ke batla dijo tse di nonneng"),
+    ("Tswana", "Agriculture", "Disenyi di ja dimela"),
+]
+
+
+async def _http(host, port, payload, cookie=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"POST /respond HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    if cookie:
+        head += f"Cookie: {cookie}\r\n"
+    writer.write((head + "\r\n").encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    for line in response.split(b"\r\n\r\n", 1)[0].split(b"\r\n"):
+        if line.lower().startswith(b"set-cookie:"):
+            cookie = line.split(b":", 1)[1].split(b";", 1)[0].strip().decode("latin-1")
+    return status, cookie
+
+
+async def service_session(host, port, rng, requests_per_session=3):
+    cookie = None
+    for _ in range(requests_per_session):
+        language, domain, text = rng.choice(MESSAGES)
+        status, cookie = await _http(host, port, {"text": text, "language": language, "domain": domain}, cookie)
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+
+
+async def streamlit_session(host, port, rng, requests_per_session=None):
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    connection = await websocket_connect(f"ws://{host}:{port}/_stcore/stream", subprotocols=["streamlit"])
+    try:
+        rerun = BackMsg()
+        rerun.rerun_script.query_string = ""
+        rerun.rerun_script.page_script_hash = ""
+        await connection.write_message(rerun.SerializeToString(), binary=True)
+        while True:
+            data = await connection.read_message()
+            if data is None:
+                raise RuntimeError("Websocket closed before the script finished")
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            if message.WhichOneof("type") == "script_finished":
+                break
+    finally:
+        connection.close()
+
+
+async def drive(session, host, port, duration, concurrency, requests_per_session, seed=3):
+    rng = random.Random(seed)
+    completed = failed = 0
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        nonlocal completed, failed
+        while time.perf_counter() < deadline:
+            try:
+                await session(host, port, rng, requests_per_session)
+                completed += 1
+            except (OSError, RuntimeError):
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return completed, failed, time.perf_counter() - started
+
+
+def run(workers, app="service", duration=10.0, concurrency=32, requests_per_session=3, base_port=9600):
+    session = service_session if app == "service" else streamlit_session
+    results = []
+    for count in workers:
+        shared_dir = tempfile.mkdtemp(prefix="cluster-load-")
+        processes = start_workers(app, count, base_port, engine="fake", shared_dir=shared_dir)
+        try:
+            ports = [base_port + index for index in range(count)]
+            wait_ready(ports)
+
+            async def measure():
+                balancer, server = await serve_balancer([("127.0.0.1", port) for port in ports], "127.0.0.1", 0)
+                host, port = server.sockets[0].getsockname()[:2]
+                # Warm every worker's caches before timing
+                await drive(session, host, port, 1.0, count * 2, requests_per_session)
+                result = await drive(session, host, port, duration, concurrency, requests_per_session)
+                server.close()
+                await server.wait_closed()
+                # Let in-flight proxy connections finish before the loop shuts down
+                while any(balancer.active):
+                    await asyncio.sleep(0.05)
+                return result
+
+            completed, failed, elapsed = asyncio.run(measure())
+        finally:
+            stop_workers(processes)
+            shutil.rmtree(shared_dir, ignore_errors=True)
+        results.append({
+            "workers": count,
+            "sessions": completed,
+            "failed": failed,
+            "sessions_per_sec": round(completed / elapsed, 1),
+        })
+    baseline = results[0]["sessions_per_sec"] / results[0]["workers"] if results[0]["sessions_per_sec"] else 0
+    for row in results:
+        row["scaling_efficiency"] = round(row["sessions_per_sec"] / (baseline * row["workers"]), 2) if baseline else 0
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure sessions/sec against cluster.py for several worker counts.")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--app", choices=["streamlit", "service"], default="streamlit")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="simulated concurrent users")
+    parser.add_argument("--requests-per-session", type=int, default=3, help="service mode only")
+    parser.add_argument("--base-port", type=int, default=9600)
+    args = parser.parse_args(argv)
+
+    workers = [int(count) for count in args.workers.split(",")]
+    results = run(workers, args.app, args.duration, args.concurrency, args.requests_per_session, args.base_port)
+    print(json.dumps({"cpus": os.cpu_count(), "app": args.app, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Microbenchmark: compiled IntentMatcher vs the original chained any() scan.
+
+Also times the fuzzy/morphological stage on a large synthetic Nguni lexicon,
+querying inflected and misspelt forms the trie cannot match.
+
+Run from the repository root:
+    python -m benchmarks.intent_matching
+    python -m benchmarks.intent_matching --lexicon 50000
+"""
+import argparse
+import random
+import string
+import time
+import timeit
+
+from intent_matcher import IntentMatcher
+from morphology import NGUNI
+from resources import INTENT_KEYWORDS
+
+# The keyword chain app.py used before the compiled matcher
+LEGACY_CHAIN = [
+    ("pests", ["pest", "insect", "bug", "zinambuzane", "disenyi"]),
+    ("planting", ["plant", "grow", "seed", "tshala", "jala"]),
+    ("soil", ["soil", "dirt", "earth", "umhlabathi", "mmu"]),
+    ("water", ["water", "irrigate", "rain", "amanzi", "metsi"]),
+    ("symptoms", ["symptom", "pain", "fever", "impawu", "matshwao"]),
+    ("medication", ["medic", "pill", "drug", "umuthi", "dithlare"]),
+    ("hygiene", ["hygiene", "clean", "wash", "hlanza", "hlatswa"]),
+    ("nutrition", ["nutrition", "food", "diet", "ukudla", "dijo"]),
+]
+
+SAMPLE_MESSAGES = [
+    "Ngicela usizo nge zinambuzane ezidla izitshalo zami",
+    "My child has a fever and pain in the stomach",
+    "Ke batla go itse ka metsi a dimela",
+    "What food is good for a healthy diet?",
+    "When should I plant maize seeds this year?",
+    "Sawubona, unjani?",
+]
+
+
+def legacy_match(chain, text):
+    user_text = text.lower()
+    for intent, words in chain:
+        if any(word in user_text for word in words):
+            return intent
+    return None
+
+
+def synthetic_table(intents, keywords_per_intent, seed=7):
+    rng = random.Random(seed)
+    table = {}
+    for i in range(intents):
+        table[f"intent_{i}"] = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+            for _ in range(keywords_per_intent)
+        ]
+    return table
+
+
+def synthetic_messages(table, count, seed=11):
+    rng = random.Random(seed)
+    vocabulary = [word for words in table.values() for word in words]
+    filler = ["the", "my", "ngicela", "ke", "batla", "usizo", "please", "today", "kajeno"]
+    messages = []
+    for _ in range(count):
+        words = rng.choices(filler, k=rng.randint(6, 14))
+        words.insert(rng.randrange(len(words)), rng.choice(vocabulary))
+        messages.append(" ".join(words))
+    return messages
+
+
+def synthetic_lexicon(words, seed=5):
+    # Nguni-shaped nouns: class prefix + consonant-vowel root
+    rng = random.Random(seed)
+    prefixes = ["umu", "aba", "imi", "ili", "ama", "isi", "izi", "in", "ulu", "ubu", "uku"]
+    consonants = "bdfghjklmnpqstvwxyz"
+    lexicon = set()
+    while len(lexicon) < words:
+        root = "".join(rng.choice(consonants) + rng.choice("aeiou") for _ in range(rng.randint(3, 5)))
+        lexicon.add(rng.choice(prefixes) + root)
+    return sorted(lexicon)
+
+
+LOCATIVE_ENDINGS = {"a": "eni", "e": "eni", "i": "ini", "o": "weni", "u": "wini"}
+
+
+def inflect(word, rng):
+    # Locative form ("izinambuzane" -> "ezinambuzaneni") with one typo in the root
+    word = ("o" if word[:3] in ("ulu", "ubu", "uku") else "e") + word[1:]
+    word = word[:-1] + LOCATIVE_ENDINGS[word[-1]]
+    position = rng.randrange(4, len(word) - 4)
+    return word[:position] + rng.choice("bkmst") + word[position + 1:]
+
+
+def run_fuzzy(lexicon=50000, intents=500, queries=2000, seed=9):
+    rng = random.Random(seed)
+    words = synthetic_lexicon(lexicon)
+    table = {f"intent_{i}": words[i::intents] for i in range(intents)}
+    intent_of = {word: intent for intent, group in table.items() for word in group}
+
+    started = time.perf_counter()
+    matcher = IntentMatcher({}, stemmer=NGUNI, native_table=table)
+    build_seconds = time.perf_counter() - started
+
+    sample = rng.sample(words, queries)
+    forms = [inflect(word, rng) for word in sample]
+    # A single pass: every form is new to the matcher, so nothing is served from its memo
+    started = time.perf_counter()
+    for form in forms:
+        matcher.match(form)
+    lookup_seconds = time.perf_counter() - started
+    found = sum(1 for word, form in zip(sample, forms)
+                if intent_of[word] in (intent for intent, _ in matcher.match(form)))
+    return {
+        "lexicon": len(words),
+        "build_s": build_seconds,
+        "lookup_us": lookup_seconds / queries * 1e6,
+        "recall": found / queries,
+    }
+
+
+def _time(fn, messages, repeat):
+    best = min(timeit.repeat(lambda: [fn(m) for m in messages], number=1, repeat=repeat))
+    return best / len(messages) * 1e6
+
+
+def run(intents=200, keywords_per_intent=20, messages=500, repeat=5):
+    results = []
+
+    table = dict(INTENT_KEYWORDS["Zulu"]["agriculture"])
+    table.update(INTENT_KEYWORDS["Zulu"]["healthcare"])
+    matcher = IntentMatcher(table)
+    results.append({
+        "case": "app vocabulary",
+        "keywords": matcher.keyword_count,
+        "legacy_us": _time(lambda m: legacy_match(LEGACY_CHAIN, m), SAMPLE_MESSAGES, repeat),
+        "compiled_us": _time(matcher.best, SAMPLE_MESSAGES, repeat),
+    })
+
+    table = synthetic_table(intents, keywords_per_intent)
+    chain = list(table.items())
+    matcher = IntentMatcher(table)
+    corpus = synthetic_messages(table, messages)
+    results.append({
+        "case": f"synthetic {intents} intents",
+        "keywords": matcher.keyword_count,
+        "legacy_us": _time(lambda m: legacy_match(chain, m), corpus, repeat),
+        "compiled_us": _time(matcher.best, corpus, repeat),
+    })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--intents", type=int, default=200)
+    parser.add_argument("--keywords-per-intent", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lexicon", type=int, default=50000, help="fuzzy stage vocabulary size (0 to skip)")
+    args = parser.parse_args(argv)
+
+    for row in run(args.intents, args.keywords_per_intent, args.messages, args.repeat):
+        speedup = row["legacy_us"] / row["compiled_us"] if row["compiled_us"] else float("inf")
+        print(f"{row['case']:<28} {row['keywords']:>6} keywords  "
+              f"legacy {row['legacy_us']:9.2f} us/msg  compiled {row['compiled_us']:7.2f} us/msg  "
+              f"x{speedup:.1f}")
+
+    if args.lexicon:
+        fuzzy = run_fuzzy(args.lexicon)
+        print(f"{'fuzzy inflected lookup':<28} {fuzzy['lexicon']:>6} words     "
+              f"build {fuzzy['build_s']:.2f} s  lookup {fuzzy['lookup_us']:7.2f} us/word  "
+              f"recall {fuzzy['recall']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Offline benchmark suite for the assistant hot paths.
+
+Runs every benchmark against local fakes (no network), writes the results
+as JSON and optionally compares them with an earlier run:
+
+    python -m benchmarks.run                        # writes benchmarks/results/<commit>.json
+    python -m benchmarks.run --only intent,cache
+    python -m benchmarks.run --compare benchmarks/results/abc1234.json
+"""
+import os
+import tempfile
+
+# Keep everything the app touches offline and out of the working tree
+_SCRATCH = tempfile.mkdtemp(prefix="assistant-bench-")
+os.environ.setdefault("TTS_ENGINE", "fake")
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(_SCRATCH, "audio"))
+os.environ.setdefault("PRERENDER_DIR", os.path.join(_SCRATCH, "prerendered"))
+os.environ.setdefault("EVENT_LOG_DIR", os.path.join(_SCRATCH, "analytics"))
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import timeit  # noqa: E402
+
+from audio_cache import AudioCache  # noqa: E402
+from benchmarks.intent_matching import run_fuzzy, synthetic_messages, synthetic_table  # noqa: E402
+from engine import VoiceAssistantEngine  # noqa: E402
+from intent_matcher import IntentMatcher, MatcherIndex  # noqa: E402
+from prefetch import Prefetcher  # noqa: E402
+from resources import LANGUAGE_RESOURCES  # noqa: E402
+from tts import FakeSynthesizer  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+MULTILINGUAL_MESSAGES = [
+    ("Zulu", "Healthcare", "Ngicela usizo, nginezimpawu zomkhuhlane nobuhlungu"),
+    ("Zulu", "Agriculture", "Izinambuzane zidla izitshalo zami, ngenzenjani?"),
+    ("Zulu", "Agriculture", "Ngifuna ukwazi ngamanzi okunisela"),
+    ("Tswana", "Healthcare", "Ke na le matshwao a a sa tlwaelegang"),
+    ("Tswana", "Agriculture", "Disenyi di ja dimela tsa me"),
+    ("Tswana", "Healthcare", "Ke batla go itse ka dijo tse di nonneng"),
+    ("Zulu", "Healthcare", "Sawubona, unjani namuhla?"),
+    ("Tswana", "Agriculture", "Dumela, ke leboga thuso"),
+]
+
+# English words the stemmer would reduce to another keyword ("implant" -> "plant"); must match nothing
+NEAR_MISS_MESSAGES = [
+    ("Zulu", "Agriculture", "I have a dental implant"),
+    ("Zulu", "Healthcare", "The kitchen is unclean"),
+    ("Zulu", "Healthcare", "isifood"),
+]
+# Inflected or misspelt native forms that only the stem index can resolve
+INFLECTED_MESSAGES = [
+    ("Zulu", "Agriculture", "ezinambuzaneni", "pests"),
+    ("Zulu", "Healthcare", "izimpawuu", "symptoms"),
+]
+
+
+def _per_op(fn, number, repeat=5):
+    # Best-of-repeat time per call, in microseconds
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return best / number * 1e6
+
+
+def _engine(latency=0.0, cache_dir=None):
+    cache = AudioCache(FakeSynthesizer(latency), cache_dir=cache_dir)
+    return VoiceAssistantEngine(cache, matchers=MatcherIndex(LANGUAGE_RESOURCES))
+
+
+def bench_intent(quick=False):
+    results = {}
+    engine = _engine()
+    corpus = MULTILINGUAL_MESSAGES * (25 if quick else 250)
+
+    def run_corpus():
+        for language, domain, text in corpus:
+            engine.detect_intent(text, language, domain)
+
+    seconds = min(timeit.repeat(run_corpus, number=1, repeat=3 if quick else 5))
+    results["app_vocabulary_msgs_per_sec"] = len(corpus) / seconds
+    rejected = sum(engine.detect_intent(text, language, domain) is None
+                   for language, domain, text in NEAR_MISS_MESSAGES)
+    results["near_miss_reject_recall"] = rejected / len(NEAR_MISS_MESSAGES)
+    found = sum(engine.detect_intent(text, language, domain) == intent
+                for language, domain, text, intent in INFLECTED_MESSAGES)
+    results["inflected_recall"] = found / len(INFLECTED_MESSAGES)
+
+    for intents in (100,) if quick else (100, 500):
+        table = synthetic_table(intents, 20)
+        matcher = IntentMatcher(table)
+        messages = synthetic_messages(table, 200 if quick else 1000)
+        seconds = min(timeit.repeat(lambda: [matcher.best(m) for m in messages], number=1, repeat=3))
+        results[f"synthetic_{intents}_intents_msgs_per_sec"] = len(messages) / seconds
+
+    lexicon = 5000 if quick else 50000
+    fuzzy = run_fuzzy(lexicon, queries=500 if quick else 2000)
+    results[f"fuzzy_{lexicon}_lookup_us"] = fuzzy["lookup_us"]
+    results[f"fuzzy_{lexicon}_recall"] = fuzzy["recall"]
+    return results
+
+
+def bench_lookup(quick=False):
+    engine = _engine()
+    number = 2000 if quick else 20000
+    return {
+        "intent_us": _per_op(lambda: engine.lookup("Zulu", "Healthcare", "hygiene"), number),
+        "greeting_fallback_us": _per_op(lambda: engine.lookup("Tswana", "Agriculture", None), number),
+    }
+
+
+def bench_cache(quick=False):
+    number = 2000 if quick else 20000
+    with tempfile.TemporaryDirectory() as cache_dir:
+        synthesize = FakeSynthesizer()
+        cache = AudioCache(synthesize, cache_dir=cache_dir)
+        text = LANGUAGE_RESOURCES["Zulu"]["healthcare"]["hygiene"]
+        cache.get(text, "zu")
+        memory_hit = _per_op(lambda: cache.get(text, "zu"), number)
+
+        key = cache.key(text, "zu")
+
+        def disk_hit():
+            cache.clear()
+            cache.lookup(key)
+
+        disk = _per_op(disk_hit, number // 10)
+
+        counter = iter(range(10 ** 9))
+        miss = _per_op(lambda: cache.get(f"{text} {next(counter)}", "zu"), number // 10)
+    return {"memory_hit_us": memory_hit, "disk_hit_us": disk, "miss_fake_tts_us": miss}
+
+
+def bench_tts(quick=False, latency=0.02):
+    # Cold synthesis through the engine (sentence chunking included) vs a warm repeat
+    engine = _engine(latency)
+    text = " ".join(
+        LANGUAGE_RESOURCES["Zulu"]["agriculture"][intent] for intent in ("pests", "planting", "soil", "water")
+    )
+    started = time.perf_counter()
+    chunks = engine.stream_audio(text, "Zulu")
+    next(chunks)
+    first_chunk = time.perf_counter() - started
+    list(chunks)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.generate_audio_response(text, "Zulu")
+    warm = time.perf_counter() - started
+    return {
+        "fake_latency_ms": latency * 1000,
+        "cold_first_chunk_ms": first_chunk * 1000,
+        "cold_total_ms": cold * 1000,
+        "warm_total_ms": warm * 1000,
+    }
+
+
+def bench_prefetch(quick=False, latency=0.02):
+    # First Quick Action click: cold, after the selection was prefetched, and mid-prefetch
+    intents = ["hygiene", None, *LANGUAGE_RESOURCES["Zulu"]["healthcare"]]
+
+    def click(engine):
+        started = time.perf_counter()
+        engine.respond_intent("Zulu", "Healthcare", "hygiene")
+        return (time.perf_counter() - started) * 1000
+
+    cold = click(_engine(latency))
+
+    engine = _engine(latency)
+    prefetcher = Prefetcher(engine)
+    started = time.perf_counter()
+    prefetcher.select("bench", "Zulu", "Healthcare", intents)
+    select_ms = (time.perf_counter() - started) * 1000
+    while prefetcher.stats()["pending"]:
+        time.sleep(0.001)
+    prefetched = click(engine)
+    prefetcher.shutdown()
+
+    # A click while its job is running joins it instead of synthesizing again
+    engine = _engine(latency)
+    prefetcher = Prefetcher(engine)
+    prefetcher.select("bench", "Zulu", "Healthcare", intents[:1])
+    time.sleep(latency / 2)
+    joined = click(engine)
+    prefetcher.shutdown()
+    return {
+        "fake_latency_ms": latency * 1000,
+        "select_ms": select_ms,
+        "first_click_cold_ms": cold,
+        "first_click_prefetched_ms": prefetched,
+        "first_click_mid_prefetch_ms": joined,
+        "mid_prefetch_tts_calls": engine.audio_cache.synthesize.calls,
+    }
+
+
+def bench_app(quick=False):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {"skipped": "streamlit is not installed"}
+
+    app_path = os.path.join(ROOT, "app.py")
+    messages = MULTILINGUAL_MESSAGES[: 3 if quick else len(MULTILINGUAL_MESSAGES)]
+    results = {}
+    # Same session in both modes; bytes are what the app sends to the browser per interaction
+    for prefix, lite in (("", False), ("lite_", True)):
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.query_params["lite"] = "1" if lite else "0"
+
+        started = time.perf_counter()
+        at.run()
+        first_run = time.perf_counter() - started
+        first_run_bytes = at.session_state["last_interaction"]["bytes"]
+
+        rerun_times = []
+        rerun_bytes = []
+        for language, domain, text in messages:
+            at.text_area(key="user_input").input(text)
+            send = next(button for button in at.button if "Send" in button.label)
+            started = time.perf_counter()
+            send.click().run()
+            rerun_times.append(time.perf_counter() - started)
+            rerun_bytes.append(at.session_state["last_interaction"]["bytes"])
+
+        if not lite:
+            # Opening Analytics after new events rebuilds the figures once
+            started = time.perf_counter()
+            at.radio(key="active_section").set_value("Analytics").run()
+            open_analytics = time.perf_counter() - started
+
+        if at.exception:
+            return {"error": str(at.exception[0].message)}
+        if not lite:
+            results.update({
+                "first_run_ms": first_run * 1000,
+                "submit_mean_ms": sum(rerun_times) / len(rerun_times) * 1000,
+                "submit_max_ms": max(rerun_times) * 1000,
+                "open_analytics_ms": open_analytics * 1000,
+            })
+        results[f"{prefix}first_run_bytes"] = first_run_bytes
+        results[f"{prefix}submit_mean_bytes"] = sum(rerun_bytes) / len(rerun_bytes)
+    return results
+
+
+BENCHMARKS = {
+    "intent": bench_intent,
+    "lookup": bench_lookup,
+    "cache": bench_cache,
+    "tts": bench_tts,
+    "prefetch": bench_prefetch,
+    "app": bench_app,
+}
+
+# Metrics where a larger number is better; everything else is a latency
+HIGHER_IS_BETTER = ("_per_sec", "_recall")
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(names=None, quick=False, tts_latency=0.02):
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        options = {"latency": tts_latency} if bench in (bench_tts, bench_prefetch) else {}
+        started = time.perf_counter()
+        results[name] = bench(quick=quick, **options)
+        print(f"{name:<8} done in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "tts_latency": tts_latency,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    # Returns printable lines and whether any metric regressed by more than threshold
+    lines = []
+    regressed = False
+    for name, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressed = True
+            lines.append(f"{name}.{metric:<40} {old:12.2f} -> {value:12.2f} ({change:+.1%}){flag}")
+    return lines, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--only", help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="fewer iterations (CI smoke run)")
+    parser.add_argument("--tts-latency", type=float, default=0.02, help="fake TTS latency in seconds")
+    parser.add_argument("-o", "--output", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (fraction)")
+    args = parser.parse_args(argv)
+
+    names = set(args.only.split(",")) if args.only else None
+    report = run(names, quick=args.quick, tts_latency=args.tts_latency)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressed = compare(report, baseline, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Load test for service.py against a local fake TTS backend.
+
+Starts the service in-process on an ephemeral port, fires concurrent
+requests and reports throughput, latency percentiles and how many
+syntheses were shared through request coalescing.
+
+    python -m benchmarks.service_load --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+
+from engine import create_engine
+from service import AssistantService, serve
+from tts import FakeSynthesizer
+
+MESSAGES = [
+    ("Zulu", "Healthcare", "I have a fever"),
+    ("Zulu", "Agriculture", "izinambuzane on my maize"),
+    ("Tswana", "Healthcare", "ke batla dijo"),
+    ("Tswana", "Agriculture", "metsi a dimela"),
+    ("Zulu", "Healthcare", "Sawubona"),
+]
+
+
+async def _request(host, port, path, payload):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    data = await reader.read()
+    writer.close()
+    return int(status_line.split()[1]), len(data)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(requests=1000, concurrency=50, tts_latency=0.2, workers=4, path="/respond/audio", seed=3):
+    synthesize = FakeSynthesizer(tts_latency)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = AssistantService(create_engine(synthesize, cache_dir=cache_dir, prerender_dir=None),
+                                   max_workers=workers)
+        server = await serve(service, "127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+        rng = random.Random(seed)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        failures = 0
+
+        async def one():
+            nonlocal failures
+            language, domain, text = rng.choice(MESSAGES)
+            async with semaphore:
+                started = time.perf_counter()
+                status, _ = await _request(host, port, path,
+                                           {"text": text, "language": language, "domain": domain})
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+        server.close()
+        await server.wait_closed()
+        service.executor.shutdown(wait=False)
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "tts_calls": synthesize.calls,
+        "coalesced": service.stats["coalesced"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the HTTP service with a fake TTS backend.")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--path", default="/respond/audio", choices=["/respond", "/respond/audio"])
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args.requests, args.concurrency, args.tts_latency, args.workers, args.path))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
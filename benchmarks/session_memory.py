@@ -0,0 +1,148 @@
+"""Per-session memory of the Streamlit app with audio by value vs by reference.
+
+Drives real app sessions through AppTest: every session loads app.py and
+sends one of ``--responses`` messages, so sessions converge on the same few
+answers the way kiosk sessions do. All sessions stay alive and share one
+media file storage, as they share the Runtime's media manager on a server
+(AppTest would otherwise give each session a private one). Modes:
+
+* ``value``: the default; the player and download button get the clip bytes
+  from the BlobStore, and Streamlit's media manager serves them
+* ``reference``: AUDIO_BASE_URL is set, so the player and download link point
+  at service.py's /audio/<key> and no bytes pass through the app process
+
+The fake TTS backend is padded to ``--audio-kb`` per clip so audio dominates
+what a session could hold. Each mode runs in a fresh subprocess so RSS
+numbers don't bleed into each other.
+
+    python -m benchmarks.session_memory --sessions 200 --responses 8 --audio-kb 96
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak RSS; KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _configure(mode, audio_kb):
+    # Runs in the child before app.py or tts are imported
+    scratch = tempfile.mkdtemp(prefix="assistant-session-memory-")
+    os.environ["TTS_ENGINE"] = "fake"
+    os.environ["AUDIO_CACHE_DIR"] = os.path.join(scratch, "audio")
+    os.environ["PRERENDER_DIR"] = os.path.join(scratch, "prerendered")
+    os.environ["EVENT_LOG_DIR"] = os.path.join(scratch, "analytics")
+    if mode == "reference":
+        os.environ["AUDIO_BASE_URL"] = "http://127.0.0.1:8080"
+    else:
+        os.environ.pop("AUDIO_BASE_URL", None)
+
+    import tts
+
+    synthesize = tts.FakeSynthesizer.__call__
+
+    def padded(self, text, lang_code, slow=False):
+        # Same text, same bytes, like a real voice
+        data = synthesize(self, text, lang_code, slow)
+        return data + random.Random(data).randbytes(audio_kb * 1024)
+
+    tts.FakeSynthesizer.__call__ = padded
+
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    storage = MemoryMediaFileStorage("/media")
+    app_test.MemoryMediaFileStorage = lambda endpoint: storage
+    return storage
+
+
+def simulate(mode, sessions, responses, audio_kb, warmup=8):
+    storage = _configure(mode, audio_kb)
+
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.run import MULTILINGUAL_MESSAGES, ROOT
+
+    messages = MULTILINGUAL_MESSAGES[:responses]
+    app_path = os.path.join(ROOT, "app.py")
+
+    def session(index):
+        language, domain, text = messages[index % len(messages)]
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.session_state["selected_language"] = language
+        at.session_state["domain"] = domain
+        at.run()
+        at.text_area(key="user_input").input(text)
+        next(button for button in at.button if "Send" in button.label).click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at
+
+    # Caches, imports and the first clip of every response are paid before measuring
+    alive = [session(index) for index in range(warmup)]
+    gc.collect()
+    before = rss_bytes()
+    alive += [session(index) for index in range(sessions)]
+    gc.collect()
+    after = rss_bytes()
+
+    media = list(storage._files_by_id.values())
+    # The player and the download button register the same buffer under two ids
+    buffers = {id(file.content): len(file.content) for file in media}
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "rss_delta_mb": round((after - before) / 2 ** 20, 2),
+        "per_session_kb": round((after - before) / sessions / 1024, 1),
+        "media_files": len(media),
+        "media_buffers": len(buffers),
+        "media_mb": round(sum(buffers.values()) / 2 ** 20, 2),
+        "alive": len(alive),
+    }
+
+
+def run(sessions=200, responses=8, audio_kb=96):
+    results = []
+    for mode in ("value", "reference"):
+        output = subprocess.check_output([
+            sys.executable, "-m", "benchmarks.session_memory", "--child", mode,
+            "--sessions", str(sessions), "--responses", str(responses), "--audio-kb", str(audio_kb),
+        ], text=True)
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-session app memory with audio by value vs by reference.")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--responses", type=int, default=8, help="distinct messages the sessions send")
+    parser.add_argument("--audio-kb", type=int, default=96, help="size of one synthesized clip")
+    parser.add_argument("--child", choices=["value", "reference"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        print(json.dumps({"skipped": "streamlit is not installed"}))
+        return
+    if args.child:
+        print(json.dumps(simulate(args.child, args.sessions, args.responses, args.audio_kb)))
+        return
+    print(json.dumps(run(args.sessions, args.responses, args.audio_kb), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""TTS fault-injection scenario: deadlines, retries and the circuit breaker.
+
+Drives the engine through a local fake backend that injects latency, errors
+and hangs in three phases (healthy -> outage -> recovery) and reports, per
+phase, response latency percentiles, how many responses came back with
+audio or text-only, and the breaker's transitions. The same scenario runs
+against the bare backend for comparison, where every hung call holds the
+caller for the full hang.
+
+    python -m benchmarks.tts_faults --requests 40 --hang 0.5
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+
+from audio_cache import AudioCache
+from engine import VoiceAssistantEngine
+from intent_matcher import MatcherIndex
+from resilience import CircuitBreaker, ResilientBackend
+from resources import LANGUAGE_RESOURCES
+from tts import BackendRouter, FakeSynthesizer
+
+
+class FlakySynthesizer(FakeSynthesizer):
+    """FakeSynthesizer whose failure mode can be switched while it runs.
+
+    ``error_rate`` of calls raise, ``hang_rate`` of calls sleep for ``hang``
+    seconds before answering, the rest answer after ``latency``.
+    """
+
+    def __init__(self, latency=0.01, hang=0.5, seed=0):
+        super().__init__(latency)
+        self.hang = hang
+        self.error_rate = 0.0
+        self.hang_rate = 0.0
+        # Counted on entry, so calls still hanging after a deadline are included
+        self.attempts = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def __call__(self, text, lang_code, slow=False):
+        with self._random_lock:
+            self.attempts += 1
+            roll = self._random.random()
+        if roll < self.error_rate:
+            raise ConnectionError("injected upstream error")
+        if roll < self.error_rate + self.hang_rate:
+            time.sleep(self.hang)
+        return super().__call__(text, lang_code, slow)
+
+
+PHASES = [
+    # name, error_rate, hang_rate
+    ("healthy", 0.0, 0.0),
+    ("outage", 0.5, 0.5),
+    ("recovery", 0.0, 0.0),
+]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(resilient, requests, hang, timeout, reset_timeout):
+    flaky = FlakySynthesizer(hang=hang)
+    backend = flaky
+    if resilient:
+        breaker = CircuitBreaker("faults", failure_threshold=3, reset_timeout=reset_timeout)
+        backend = ResilientBackend("faults", flaky, timeout=timeout, retries=1, backoff=timeout / 4,
+                                   breaker=breaker)
+    router = BackendRouter([("faults", backend)])
+    engine = VoiceAssistantEngine(AudioCache(router), matchers=MatcherIndex(LANGUAGE_RESOURCES))
+
+    report = {}
+    counter = 0
+    for phase, error_rate, hang_rate in PHASES:
+        flaky.error_rate, flaky.hang_rate = error_rate, hang_rate
+        if phase == "recovery" and resilient:
+            # Let the open circuit reach half-open so the first request probes
+            time.sleep(reset_timeout)
+        latencies = []
+        audio = 0
+        attempts_before = flaky.attempts
+        for _ in range(requests):
+            counter += 1
+            started = time.perf_counter()
+            data, error = engine.generate_audio_response(f"Response number {counter}.", "Zulu")
+            latencies.append((time.perf_counter() - started) * 1000)
+            audio += data is not None
+        report[phase] = {
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(_percentile(latencies, 0.95), 2),
+            "max_ms": round(max(latencies), 2),
+            "total_s": round(sum(latencies) / 1000, 2),
+            "with_audio": audio,
+            "text_only": requests - audio,
+            "backend_calls": flaky.attempts - attempts_before,
+        }
+    report["backend"] = router.stats()["faults"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TTS latency and degradation under injected faults.")
+    parser.add_argument("--requests", type=int, default=40, help="requests per phase")
+    parser.add_argument("--hang", type=float, default=0.5, help="seconds a hung backend call takes")
+    parser.add_argument("--timeout", type=float, default=0.1, help="per-call deadline of the wrapped backend")
+    parser.add_argument("--reset", type=float, default=0.5, help="breaker reset timeout in seconds")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for label, resilient in (("resilient", True), ("bare", False)):
+        report[label] = run_scenario(resilient, args.requests, args.hang, args.timeout, args.reset)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
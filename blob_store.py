@@ -0,0 +1,119 @@
+"""Process-wide store for audio referenced from session state.
+
+Sessions keep only a content key; the bytes live here once, however many
+sessions play the same response. Every session holding a key has a lease
+that is renewed whenever it renders the audio. A blob is dropped once no
+session has touched it within ``ttl`` seconds (or every holder released
+it), so abandoned browser tabs don't pin audio forever.
+"""
+import hashlib
+import os
+import threading
+import time
+
+BLOB_TTL = float(os.environ.get("AUDIO_BLOB_TTL", "900"))
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class _Blob:
+    __slots__ = ("data", "leases", "released_at")
+
+    def __init__(self, data):
+        self.data = data
+        # holder -> monotonic time of the last acquire/touch
+        self.leases = {}
+        self.released_at = time.monotonic()
+
+
+class BlobStore:
+    def __init__(self, ttl=BLOB_TTL, sweep_interval=60.0):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._blobs = {}
+        self._bytes = 0
+        self._swept_at = time.monotonic()
+        self._counters = {"puts": 0, "deduplicated": 0, "evictions": 0}
+
+    def put(self, data, key=None, holder=None):
+        # Stores data (once per key) and optionally leases it to holder; returns the key
+        key = key or content_key(data)
+        with self._lock:
+            blob = self._blobs.get(key)
+            self._counters["puts"] += 1
+            if blob is None:
+                blob = self._blobs[key] = _Blob(data)
+                self._bytes += len(data)
+            else:
+                self._counters["deduplicated"] += 1
+            if holder is not None:
+                blob.leases[holder] = time.monotonic()
+        self._maybe_sweep()
+        return key
+
+    def get(self, key, holder=None):
+        # Returns the bytes (renewing holder's lease) or None if the blob expired
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                return None
+            if holder is not None:
+                blob.leases[holder] = time.monotonic()
+            return blob.data
+
+    def release(self, key, holder):
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is not None and blob.leases.pop(holder, None) is not None and not blob.leases:
+                blob.released_at = time.monotonic()
+
+    def refcount(self, key):
+        with self._lock:
+            blob = self._blobs.get(key)
+            return len(blob.leases) if blob is not None else 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._blobs
+
+    def __len__(self):
+        with self._lock:
+            return len(self._blobs)
+
+    def sweep(self, now=None):
+        # Expires stale leases and drops blobs nobody holds; returns the number dropped
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.ttl
+        dropped = 0
+        with self._lock:
+            for key, blob in list(self._blobs.items()):
+                if blob.leases:
+                    for holder, touched in list(blob.leases.items()):
+                        if touched < cutoff:
+                            del blob.leases[holder]
+                    if blob.leases:
+                        continue
+                    # Every lease lapsed a full ttl ago, so there is no grace period left
+                    blob.released_at = cutoff
+                if blob.released_at <= cutoff:
+                    del self._blobs[key]
+                    self._bytes -= len(blob.data)
+                    self._counters["evictions"] += 1
+                    dropped += 1
+            self._swept_at = now
+        return dropped
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["blobs"] = len(self._blobs)
+            stats["bytes"] = self._bytes
+            stats["leases"] = sum(len(blob.leases) for blob in self._blobs.values())
+        return stats
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._swept_at >= self.sweep_interval:
+            self.sweep()
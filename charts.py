@@ -0,0 +1,92 @@
+import pandas as pd
+import plotly.express as px
+
+ROLLUP_COLUMNS = ["bucket", "Language", "Domain", "Intent", "count", "latency_ms_sum", "cache_hits"]
+
+
+# Pre-aggregated usage from the event log (one row per bucket/language/domain/intent)
+def build_analytics_df(rollup_rows):
+    df = pd.DataFrame(rollup_rows, columns=["bucket", "language", "domain", "intent",
+                                            "count", "latency_ms_sum", "cache_hits"])
+    df.columns = ROLLUP_COLUMNS
+    df["Domain"] = df["Domain"].str.title()
+    df["Day"] = pd.to_datetime(df["bucket"], unit="s")
+    return df
+
+
+def language_distribution_figure(analytics_df):
+    lang_counts = analytics_df.groupby("Language")["count"].sum().reset_index()
+    fig = px.pie(
+        lang_counts,
+        names="Language",
+        values="count",
+        color="Language",
+        color_discrete_map={"Zulu": "#4DB6AC", "Tswana": "#263238"},
+        hole=0.3
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def intent_popularity_figure(analytics_df):
+    intent_counts = analytics_df.groupby("Intent")["count"].sum().reset_index()
+    intent_counts = intent_counts.sort_values("count", ascending=False)
+    fig = px.bar(
+        intent_counts,
+        x="Intent",
+        y="count",
+        color="Intent",
+        color_discrete_sequence=["#4CAF50", "#4DB6AC", "#C0CA33", "#263238", "#E0E0E0"],
+        title="Questions by Topic",
+        labels={"count": "Queries"},
+        height=350
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def domain_usage_figure(analytics_df):
+    domain_counts = analytics_df.groupby("Domain")["count"].sum().reset_index()
+    fig = px.pie(
+        domain_counts,
+        names="Domain",
+        values="count",
+        color="Domain",
+        color_discrete_map={"Healthcare": "#4CAF50", "Agriculture": "#4DB6AC"},
+        title="Usage by Application Domain",
+        hole=0.3
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def daily_growth_figure(analytics_df):
+    daily = analytics_df.groupby(["Day", "Language"])["count"].sum().reset_index()
+    fig = px.line(
+        daily,
+        x="Day",
+        y="count",
+        color="Language",
+        title="Daily Queries",
+        labels={"count": "Queries"},
+        color_discrete_map={"Zulu": "#4DB6AC", "Tswana": "#263238"}
+    )
+    fig.update_layout(
+        showlegend=True,
+        legend_title="Language",
+        yaxis_title="Queries",
+        xaxis_title="Day",
+        height=350
+    )
+    return fig
+
+
+def build_analytics_figures(analytics_df):
+    return {
+        "languages": language_distribution_figure(analytics_df),
+        "intents": intent_popularity_figure(analytics_df),
+        "domains": domain_usage_figure(analytics_df),
+        "growth": daily_growth_figure(analytics_df),
+    }
@@ -0,0 +1,243 @@
+"""Run several assistant workers behind a local load balancer.
+
+One Streamlit server executes scripts on a single core, so this starts
+``--workers`` copies of the app on consecutive ports and a small TCP
+balancer in front of them. Workers share state through the filesystem
+instead of each warming their own copy:
+
+* audio: one AUDIO_CACHE_DIR, with AUDIO_CACHE_SHARED=1 so a worker picks up
+  files another worker synthesized
+* analytics: rollups go to the SQLite database at EVENT_LOG_DB (WAL mode)
+* language resources: the JSON files in data/resources and the accepted
+  contribution keywords in RESOURCES_OVERLAY_DIR, reloaded by every worker
+  when they change
+
+A browser must talk to the same worker for its page, websocket and media
+requests, so the balancer pins each client with an ``lb_worker`` cookie and
+sends new clients to the worker with the fewest open connections.
+
+Usage:
+    python cluster.py --workers 4 --port 8501                    # Streamlit app
+    python cluster.py --workers 4 --port 8080 --app service      # HTTP service
+"""
+import argparse
+import asyncio
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COOKIE = "lb_worker"
+COOKIE_RE = re.compile(rb"(?:^|;)\s*" + COOKIE.encode() + rb"=(\d+)")
+MAX_HEAD = 64 * 1024
+PIPE_CHUNK = 64 * 1024
+
+
+class Balancer:
+    """Sticky TCP proxy: the first request on a connection picks the worker,
+    everything after it (keep-alive requests, websocket frames) is piped as-is."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.active = [0] * len(self.backends)
+        self._next = 0
+
+    def pick(self, head):
+        match = COOKIE_RE.search(_header(head, b"cookie") or b"")
+        if match and int(match.group(1)) < len(self.backends):
+            return int(match.group(1)), False
+        # Fewest open connections, rotating between ties
+        count = len(self.backends)
+        order = [(self._next + offset) % count for offset in range(count)]
+        index = min(order, key=lambda i: self.active[i])
+        self._next = (index + 1) % count
+        return index, True
+
+    async def handle(self, reader, writer):
+        upstream = None
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            index, new_client = self.pick(head)
+            for attempt in range(len(self.backends)):
+                candidate = (index + attempt) % len(self.backends)
+                try:
+                    upstream = await asyncio.open_connection(*self.backends[candidate])
+                except OSError:
+                    continue
+                index, new_client = candidate, new_client or attempt > 0
+                break
+            else:
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+
+            up_reader, up_writer = upstream
+            self.active[index] += 1
+            try:
+                up_writer.write(head)
+                # The request body may still be in flight while we wait for the response head
+                to_upstream = asyncio.ensure_future(_pipe(reader, up_writer))
+                try:
+                    if new_client:
+                        await self._forward_head(up_reader, writer, index)
+                    await asyncio.gather(to_upstream, _pipe(up_reader, writer))
+                finally:
+                    to_upstream.cancel()
+            finally:
+                self.active[index] -= 1
+        except ConnectionError:
+            pass
+        finally:
+            for stream_writer in (writer, upstream[1] if upstream else None):
+                if stream_writer is not None:
+                    stream_writer.close()
+
+    @staticmethod
+    async def _forward_head(up_reader, writer, index):
+        # Pin the client to this worker on the first response
+        try:
+            head = await up_reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            writer.write(e.partial)
+            return
+        cookie = f"Set-Cookie: {COOKIE}={index}; Path=/; HttpOnly; SameSite=Lax\r\n".encode("latin-1")
+        writer.write(head[:-2] + cookie + b"\r\n")
+        await writer.drain()
+
+
+def _header(head, name):
+    for line in head.split(b"\r\n")[1:]:
+        key, _, value = line.partition(b":")
+        if key.strip().lower() == name:
+            return value.strip()
+    return None
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        if writer.can_write_eof():
+            try:
+                writer.write_eof()
+            except (OSError, RuntimeError):
+                pass
+
+
+async def serve_balancer(backends, host="127.0.0.1", port=8501):
+    balancer = Balancer(backends)
+    server = await asyncio.start_server(balancer.handle, host, port, limit=MAX_HEAD)
+    return balancer, server
+
+
+def worker_env(index, shared_dir=None):
+    # Environment that makes every worker use the same caches and analytics store
+    env = dict(os.environ)
+    if shared_dir:
+        env["AUDIO_CACHE_DIR"] = os.path.join(shared_dir, ".audio_cache")
+        env["EVENT_LOG_DB"] = os.path.join(shared_dir, ".analytics", "rollups.db")
+    else:
+        env.setdefault("AUDIO_CACHE_DIR", os.path.join(BASE_DIR, ".audio_cache"))
+        env.setdefault("EVENT_LOG_DB", os.path.join(BASE_DIR, ".analytics", "rollups.db"))
+    env["AUDIO_CACHE_SHARED"] = "1"
+    env["WORKER_ID"] = str(index)
+    if env.get("METRICS_FILE"):
+        env["METRICS_FILE"] = f"{env['METRICS_FILE']}.{index}"
+    return env
+
+
+def worker_command(app, port, engine=None):
+    if app == "service":
+        command = [sys.executable, os.path.join(BASE_DIR, "service.py"), "--port", str(port)]
+        if engine:
+            command += ["--engine", engine]
+        return command
+    return [
+        sys.executable, "-m", "streamlit", "run", os.path.join(BASE_DIR, "app.py"),
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+        "--browser.gatherUsageStats", "false",
+    ]
+
+
+def start_workers(app, count, base_port, engine=None, shared_dir=None):
+    processes = []
+    for index in range(count):
+        env = worker_env(index, shared_dir)
+        if engine and app != "service":
+            env["TTS_ENGINE"] = engine
+        processes.append(subprocess.Popen(worker_command(app, base_port + index, engine), env=env,
+                                          stdout=subprocess.DEVNULL, cwd=BASE_DIR))
+    return processes
+
+
+def wait_ready(ports, host="127.0.0.1", timeout=60.0):
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=1.0).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Worker on port {port} did not start within {timeout:.0f}s")
+                time.sleep(0.2)
+
+
+def stop_workers(processes, timeout=10.0):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several workers behind a local load balancer.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="127.0.0.1", help="balancer address")
+    parser.add_argument("--port", type=int, default=8501, help="balancer port")
+    parser.add_argument("--base-port", type=int, default=9500, help="first worker port")
+    parser.add_argument("--app", choices=["streamlit", "service"], default="streamlit")
+    parser.add_argument("--engine", help="TTS backends for every worker (see tts.build_synthesizer)")
+    args = parser.parse_args(argv)
+
+    ports = [args.base_port + index for index in range(args.workers)]
+    processes = start_workers(args.app, args.workers, args.base_port, args.engine)
+    try:
+        wait_ready(ports)
+
+        async def run():
+            _, server = await serve_balancer([("127.0.0.1", port) for port in ports], args.host, args.port)
+            print(f"{args.workers} {args.app} workers behind http://{args.host}:{args.port}", file=sys.stderr)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(processes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
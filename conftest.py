@@ -0,0 +1,13 @@
+"""Keep the test run offline and out of the working tree.
+
+Lives at the repository root so pytest puts the root on sys.path and the
+top-level modules import the same way they do for the app and the CLIs.
+"""
+import os
+import tempfile
+
+_SCRATCH = tempfile.mkdtemp(prefix="assistant-tests-")
+os.environ.setdefault("TTS_ENGINE", "fake")
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(_SCRATCH, "audio"))
+os.environ.setdefault("PRERENDER_DIR", os.path.join(_SCRATCH, "prerendered"))
+os.environ.setdefault("EVENT_LOG_DIR", os.path.join(_SCRATCH, "analytics"))
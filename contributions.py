@@ -0,0 +1,370 @@
+"""Community contributions: an append-only log triaged by a background worker.
+
+Submitting only appends one JSON line to ``contributions.jsonl`` and wakes
+the worker, so it stays instant however long the backlog is. The worker
+tails the log off the request thread and:
+
+* marks near-duplicate phrases (character-shingle MinHash with LSH banding,
+  confirmed by exact Jaccard similarity) so reviewers only see each phrase
+  once per language
+* applies reviewer decisions, which are appended to the same log; the
+  keywords a reviewer picks from an accepted contribution are merged into
+  the language's resource overlay and the live intent matchers through
+  ``ResourceStore.add_keywords``, without a rebuild
+
+The log is the only state: on start the worker replays it, so every process
+sharing the directory (see cluster.py) ends up with the same triage.
+
+Review from the command line:
+    python contributions.py pending --language Zulu
+    python contributions.py accept <id> --domain healthcare --intent symptoms --keyword ikhwehlela --native
+    python contributions.py reject <id>
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+
+from intent_matcher import tokenize
+from resources import LANGUAGE_RESOURCES, ResourceError
+
+logger = logging.getLogger(__name__)
+
+CONTRIBUTIONS_DIR = os.environ.get(
+    "CONTRIBUTIONS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".contributions")
+)
+# Seconds between checks for entries appended by other processes
+POLL_SECONDS = 1.0
+
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a band
+LSH_BANDS = 16
+DUPLICATE_THRESHOLD = 0.7
+_PRIME = (1 << 61) - 1
+
+PENDING = "pending"
+DUPLICATE = "duplicate"
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+STATUSES = (PENDING, DUPLICATE, ACCEPTED, REJECTED)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    # Character shingles of the normalized words; short phrases still get several
+    text = " ".join(tokenize(text))
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(permutations)]
+
+    def signature(self, shingle_set):
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set] or [0]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.params)
+
+
+class NearDuplicateIndex:
+    """Finds an indexed text whose shingle set is at least ``threshold`` similar.
+
+    Signatures are split into bands; only texts sharing a whole band are
+    compared, so a query costs one signature plus a handful of exact checks
+    instead of a pass over every stored text.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, bands=LSH_BANDS, hasher=None):
+        self.hasher = hasher or MinHasher()
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = len(self.hasher.params) // bands
+        self._buckets = [{} for _ in range(bands)]
+        self._shingles = {}
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def _bands(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows] for band in range(self.bands)]
+
+    def query(self, shingle_set, signature=None):
+        # (key, similarity) of the closest indexed text above the threshold, or None
+        signature = signature or self.hasher.signature(shingle_set)
+        candidates = set()
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        best = None
+        for key in candidates:
+            similarity = jaccard(shingle_set, self._shingles[key])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def add(self, key, shingle_set, signature=None):
+        signature = signature or self.hasher.signature(shingle_set)
+        self._shingles[key] = shingle_set
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets.setdefault(band, []).append(key)
+
+
+class Contribution:
+    __slots__ = ("id", "submitted_at", "language", "text", "name", "email", "domain", "intent",
+                 "status", "duplicate_of")
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ContributionQueue:
+    def __init__(self, directory=CONTRIBUTIONS_DIR, store=LANGUAGE_RESOURCES, poll_seconds=POLL_SECONDS,
+                 threshold=DUPLICATE_THRESHOLD):
+        self.directory = directory
+        self.path = os.path.join(directory, "contributions.jsonl")
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.threshold = threshold
+        self._hasher = MinHasher()
+        self._indexes = {}
+        # (language, normalized text) -> first id, skips MinHash for verbatim repeats
+        self._exact = {}
+        self._contributions = {}
+        self._offset = 0
+        # _write_lock only guards appends so submit never waits on triage
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    # Writing (request thread)
+
+    def submit(self, language, text, name="", email="", domain=None, intent=None):
+        text = text.strip()
+        if not language or not text:
+            raise ValueError("A contribution needs a language and some text")
+        contribution_id = uuid.uuid4().hex[:12]
+        self._append({
+            "type": "submission",
+            "id": contribution_id,
+            "submitted_at": time.time(),
+            "language": language,
+            "text": text,
+            "name": name.strip(),
+            "email": email.strip(),
+            "domain": domain,
+            "intent": intent,
+        })
+        return contribution_id
+
+    def decide(self, contribution_id, status, domain=None, intent=None, keywords=None, native=False):
+        if status not in (ACCEPTED, REJECTED):
+            raise ValueError(f"Decision must be {ACCEPTED!r} or {REJECTED!r}")
+        self._append({
+            "type": "decision",
+            "id": contribution_id,
+            "decided_at": time.time(),
+            "status": status,
+            "domain": domain,
+            "intent": intent,
+            "keywords": list(keywords or ()),
+            "native": native,
+        })
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._write_lock:
+            # One O_APPEND write per record, so lines from several processes never interleave
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        self._wake.set()
+
+    # Triage (background worker)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="contributions", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.process()
+            except Exception:
+                logger.exception("Contribution worker failed")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def process(self):
+        """Apply every complete line appended since the last call; returns how many."""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return 0
+            end = data.rfind(b"\n") + 1
+            self._offset += end
+            count = 0
+            for line in data[:end].splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping malformed contribution record: %r", line[:80])
+                    continue
+                if record.get("type") == "submission":
+                    self._apply_submission(record)
+                elif record.get("type") == "decision":
+                    self._apply_decision(record)
+                count += 1
+            return count
+
+    def _apply_submission(self, record):
+        contribution = Contribution()
+        for field in ("id", "submitted_at", "language", "text", "name", "email", "domain", "intent"):
+            setattr(contribution, field, record.get(field))
+        contribution.status = PENDING
+        contribution.duplicate_of = None
+
+        normalized = (contribution.language, " ".join(tokenize(contribution.text)))
+        first = self._exact.get(normalized)
+        if first is not None:
+            contribution.status = DUPLICATE
+            contribution.duplicate_of = first
+            self._contributions[contribution.id] = contribution
+            return
+        self._exact[normalized] = contribution.id
+
+        shingle_set = shingles(contribution.text)
+        signature = self._hasher.signature(shingle_set)
+        index = self._indexes.get(contribution.language)
+        if index is None:
+            index = self._indexes[contribution.language] = NearDuplicateIndex(self.threshold, hasher=self._hasher)
+        match = index.query(shingle_set, signature)
+        if match is not None:
+            contribution.status = DUPLICATE
+            contribution.duplicate_of = match[0]
+        else:
+            index.add(contribution.id, shingle_set, signature)
+        self._contributions[contribution.id] = contribution
+
+    def _apply_decision(self, record):
+        contribution = self._contributions.get(record.get("id"))
+        if contribution is None:
+            return
+        contribution.status = record["status"]
+        if contribution.status != ACCEPTED or not record.get("keywords"):
+            return
+        domain = record.get("domain") or contribution.domain
+        intent = record.get("intent") or contribution.intent
+        try:
+            # Idempotent, so replaying the log on restart does not rewrite the file
+            self.store.add_keywords(contribution.language, domain, intent, record["keywords"],
+                                    native=record.get("native", False))
+        except (KeyError, OSError, ResourceError) as e:
+            logger.warning("Could not merge contribution %s: %s", contribution.id, e)
+
+    # Reading
+
+    def get(self, contribution_id):
+        with self._lock:
+            return self._contributions.get(contribution_id)
+
+    def pending(self, language=None):
+        with self._lock:
+            return [c for c in self._contributions.values()
+                    if c.status == PENDING and (language is None or c.language == language)]
+
+    def stats(self):
+        with self._lock:
+            counts = dict.fromkeys(STATUSES, 0)
+            for contribution in self._contributions.values():
+                counts[contribution.status] += 1
+            try:
+                counts["backlog_bytes"] = os.path.getsize(self.path) - self._offset
+            except OSError:
+                counts["backlog_bytes"] = 0
+        return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review community contributions.")
+    parser.add_argument("--dir", default=CONTRIBUTIONS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    pending = commands.add_parser("pending", help="list contributions awaiting review")
+    pending.add_argument("--language")
+    accept = commands.add_parser("accept", help="merge a contribution into an intent's keywords")
+    accept.add_argument("id")
+    accept.add_argument("--domain", help="defaults to the contributor's suggestion")
+    accept.add_argument("--intent", help="defaults to the contributor's suggestion")
+    # Keywords are picked by the reviewer: any word of the phrase ("your", "with") would become a trigger
+    accept.add_argument("--keyword", action="append", dest="keywords", required=True,
+                        help="keyword to add (repeatable)")
+    accept.add_argument("--native", action="store_true",
+                        help="the keywords are in the contribution's language and also match inflected forms")
+    reject = commands.add_parser("reject", help="reject a contribution")
+    reject.add_argument("id")
+    commands.add_parser("stats", help="counts per status")
+    args = parser.parse_args(argv)
+
+    queue = ContributionQueue(args.dir)
+    queue.process()
+    if args.command == "pending":
+        for contribution in queue.pending(args.language):
+            topic = f"{contribution.domain}.{contribution.intent}" if contribution.intent else "-"
+            print(f"{contribution.id}  {contribution.language:<10} {topic:<24} {contribution.text}")
+        return 0
+    if args.command == "stats":
+        print(json.dumps(queue.stats(), indent=2))
+        return 0
+
+    contribution = queue.get(args.id)
+    if contribution is None:
+        parser.error(f"unknown contribution {args.id}")
+    if args.command == "reject":
+        queue.decide(args.id, REJECTED)
+        return 0
+    domain = args.domain or contribution.domain
+    intent = args.intent or contribution.intent
+    if not domain or not intent:
+        parser.error("--domain and --intent are required when the contributor did not suggest them")
+    keywords = [token for keyword in args.keywords for token in tokenize(keyword)]
+    if not keywords:
+        parser.error("no usable keywords in --keyword")
+    queue.decide(args.id, ACCEPTED, domain, intent, keywords, native=args.native)
+    # Merge now so the file is updated even if no app is running
+    queue.process()
+    print(f"Added {', '.join(keywords)} to {contribution.language} {domain}.{intent}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
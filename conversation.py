@@ -0,0 +1,98 @@
+"""Bounded per-session conversation history.
+
+Turns live in a fixed-size ring buffer of ``__slots__`` records, so memory is
+capped and appending, indexing and fetching one page are O(1)/O(page) no
+matter how long a kiosk session has been running. Once the cap is reached
+the oldest turns are dropped.
+"""
+import os
+import time
+
+CONVERSATION_CAP = int(os.environ.get("CONVERSATION_CAP", "500"))
+PAGE_SIZE = int(os.environ.get("CONVERSATION_PAGE_SIZE", "20"))
+
+# Speakers are stored as small ints instead of repeating the label per turn
+USER = 0
+ASSISTANT = 1
+SPEAKERS = ("User", "Assistant")
+
+
+class Turn:
+    __slots__ = ("speaker", "text", "intent", "timestamp")
+
+    def __init__(self, speaker, text, intent=None, timestamp=None):
+        self.speaker = speaker
+        self.text = text
+        self.intent = intent
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    @property
+    def speaker_name(self):
+        return SPEAKERS[self.speaker]
+
+    def __repr__(self):
+        return f"Turn({self.speaker_name}, {self.text!r})"
+
+
+class ConversationHistory:
+    """Ring buffer of the last ``cap`` turns, oldest first."""
+
+    __slots__ = ("cap", "_turns", "_start", "_size", "total")
+
+    def __init__(self, cap=CONVERSATION_CAP):
+        if cap < 1:
+            raise ValueError("cap must be at least 1")
+        self.cap = cap
+        self._turns = [None] * cap
+        self._start = 0
+        self._size = 0
+        # Turns ever added, including ones that have since been dropped
+        self.total = 0
+
+    def append(self, speaker, text, intent=None):
+        turn = Turn(speaker, text, intent)
+        if self._size < self.cap:
+            self._turns[(self._start + self._size) % self.cap] = turn
+            self._size += 1
+        else:
+            self._turns[self._start] = turn
+            self._start = (self._start + 1) % self.cap
+        self.total += 1
+        return turn
+
+    def clear(self):
+        self._turns = [None] * self.cap
+        self._start = 0
+        self._size = 0
+        self.total = 0
+
+    @property
+    def dropped(self):
+        return self.total - self._size
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("conversation index out of range")
+        return self._turns[(self._start + index) % self.cap]
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self._turns[(self._start + index) % self.cap]
+
+    def page_count(self, page_size=PAGE_SIZE):
+        return max(1, -(-self._size // page_size))
+
+    def page(self, number=0, page_size=PAGE_SIZE):
+        # Page 0 is the newest window; higher numbers go back in time
+        number = min(max(number, 0), self.page_count(page_size) - 1)
+        end = self._size - number * page_size
+        start = max(0, end - page_size)
+        return [self[index] for index in range(start, end)]
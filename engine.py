@@ -0,0 +1,123 @@
+"""UI-free query pipeline: intent detection, response lookup and audio generation.
+
+The Streamlit app is a thin view over ``VoiceAssistantEngine``; batch jobs,
+services and benchmarks can import and drive it directly.
+"""
+import os
+import time
+from collections import namedtuple
+
+from audio_cache import AudioCache, ChunkedSynthesis
+from intent_matcher import MatcherIndex
+from languages import LANGUAGES, UnsupportedLanguage
+from metrics import TRACER
+from prerender import warm_cache
+from resilience import CircuitOpen
+from resources import LANGUAGE_RESOURCES
+from tts import build_synthesizer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", os.path.join(BASE_DIR, ".audio_cache"))
+PRERENDER_DIR = os.environ.get("PRERENDER_DIR", os.path.join(BASE_DIR, "prerendered"))
+# Set by cluster.py: several worker processes share AUDIO_CACHE_DIR
+AUDIO_CACHE_SHARED = os.environ.get("AUDIO_CACHE_SHARED", "0") == "1"
+# TTS backends in fallback order: "espeak" (offline), "gtts" (network), "fake" (CI, benchmarks)
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "espeak,gtts")
+
+# audio is None when synthesis failed; error then carries the reason
+Response = namedtuple("Response", ["text", "intent", "audio", "error"], defaults=(None,))
+
+
+class VoiceAssistantEngine:
+    def __init__(self, audio_cache, resources=LANGUAGE_RESOURCES, matchers=None, tts_workers=4, events=None,
+                 languages=LANGUAGES):
+        self.audio_cache = audio_cache
+        self.languages = languages
+        # Probed once here so requests never wait on a backend that can't voice their language
+        self.tts_capabilities = languages.probe(audio_cache.synthesize)
+        # Optional analytics.EventLog (anything with a record() method)
+        self.events = events
+        self.synthesis = ChunkedSynthesis(audio_cache, workers=tts_workers)
+        self.resources = resources
+        self.matchers = matchers if matchers is not None else MatcherIndex(resources)
+
+    def detect_intent(self, text, language, domain):
+        with TRACER.span("engine.intent"):
+            matcher = self.matchers.get((language, domain.lower()))
+            return matcher.best(text) if matcher else None
+
+    def detect_intents(self, texts, language, domain):
+        matcher = self.matchers.get((language, domain.lower()))
+        return matcher.best_many(texts) if matcher else [None] * len(texts)
+
+    def lookup(self, language, domain, intent=None):
+        # No intent (or an unknown one) falls back to the language greeting
+        with TRACER.span("engine.lookup"):
+            lang_data = self.resources[language]
+            if intent:
+                text = lang_data.get(domain.lower(), {}).get(intent)
+                if text is not None:
+                    return text
+            return lang_data["greeting"]
+
+    def tts_code(self, language):
+        # Voice to use for language (maybe a related language's); raises UnsupportedLanguage
+        return self.languages.tts_code(language, self.audio_cache.synthesize)
+
+    def audio_key(self, text, language):
+        # Key the audio is (or will first be looked up) under; None when no backend can voice the language
+        try:
+            lang_code = self.tts_code(language)
+        except UnsupportedLanguage:
+            return None
+        return self.audio_cache.cached_key(text, lang_code) or self.audio_cache.key(text, lang_code)
+
+    def generate_audio_response(self, text, language):
+        # Text-only response (audio None) when synthesis fails or every backend's circuit is open
+        try:
+            with TRACER.span("engine.audio"):
+                return self.synthesis.get(text, self.tts_code(language), slow=False), None
+        except CircuitOpen:
+            return None, "Audio is temporarily unavailable; showing the text response only"
+        except Exception as e:
+            return None, str(e)
+
+    def stream_audio(self, text, language):
+        # Yields audio chunks as they are synthesized; raises if the backend fails
+        return self.synthesis.stream(text, self.tts_code(language), slow=False)
+
+    def respond(self, text, language, domain):
+        started = time.perf_counter()
+        with TRACER.span("engine.respond"):
+            intent = self.detect_intent(text, language, domain)
+            return self._respond(language, domain, intent, started)
+
+    def respond_intent(self, language, domain, intent=None):
+        with TRACER.span("engine.respond"):
+            return self._respond(language, domain, intent, time.perf_counter())
+
+    def record_event(self, language, domain, intent, started, cache_hit):
+        if self.events is not None:
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.events.record(language, domain.lower(), intent or "greeting", latency_ms, cache_hit)
+
+    def _respond(self, language, domain, intent, started):
+        response_text = self.lookup(language, domain, intent)
+        cache_hit = self.audio_key(response_text, language) in self.audio_cache
+        audio, error = self.generate_audio_response(response_text, language)
+        self.record_event(language, domain, intent, started, cache_hit)
+        return Response(response_text, intent, audio, error)
+
+
+def default_synthesizer(spec=TTS_ENGINE):
+    return build_synthesizer(spec, fake_latency=float(os.environ.get("FAKE_TTS_LATENCY", "0")))
+
+
+def create_engine(synthesize=None, cache_dir=AUDIO_CACHE_DIR, prerender_dir=PRERENDER_DIR,
+                  events=None, **cache_options):
+    cache_options.setdefault("shared", AUDIO_CACHE_SHARED)
+    cache = AudioCache(synthesize or default_synthesizer(), cache_dir=cache_dir, **cache_options)
+    # Serve audio built by `python prerender.py` without any TTS in the request path
+    if prerender_dir and os.path.isdir(prerender_dir):
+        warm_cache(cache, prerender_dir)
+    return VoiceAssistantEngine(cache, events=events)
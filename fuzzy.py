@@ -0,0 +1,111 @@
+"""Bounded edit-distance lookup over a fixed vocabulary.
+
+``DeletionIndex`` is a SymSpell-style deletion dictionary: at build time
+every term is stored under each variant obtained by deleting up to
+``max_distance`` characters. A query generates its own deletion variants
+and only the terms sharing one are verified with a bounded edit distance,
+so lookup cost depends on the query length, not on the vocabulary size.
+"""
+
+
+def _within_one(a, b):
+    # Linear-time check for the common max_distance=1 case
+    if len(a) > len(b):
+        a, b = b, a
+    prefix = 0
+    limit = len(a)
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    if len(a) == len(b):
+        if a[prefix + 1:] == b[prefix + 1:]:
+            return True
+        # adjacent transposition
+        return a[prefix:prefix + 2] == b[prefix + 1::-1][:2] and a[prefix + 2:] == b[prefix + 2:]
+    return a[prefix:] == b[prefix + 1:]
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+    if max_distance == 1:
+        return 1 if _within_one(a, b) else 2
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def deletion_variants(word, max_distance):
+    variants = {word}
+    frontier = variants
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class DeletionIndex:
+    def __init__(self, terms=(), max_distance=1):
+        self.max_distance = max_distance
+        # variant -> term, or a list of terms once several share the variant
+        self._variants = {}
+        self._terms = set()
+        for term in terms:
+            self.add(term)
+
+    def add(self, term):
+        if term in self._terms:
+            return
+        self._terms.add(term)
+        for variant in deletion_variants(term, self.max_distance):
+            existing = self._variants.get(variant)
+            if existing is None:
+                self._variants[variant] = term
+            elif isinstance(existing, list):
+                existing.append(term)
+            else:
+                self._variants[variant] = [existing, term]
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def __len__(self):
+        return len(self._terms)
+
+    def lookup(self, word, max_distance=None):
+        # [(term, distance), ...] closest first
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if word in self._terms:
+            return [(word, 0)]
+        candidates = set()
+        for variant in deletion_variants(word, max_distance):
+            found = self._variants.get(variant)
+            if found is None:
+                continue
+            if isinstance(found, list):
+                candidates.update(found)
+            else:
+                candidates.add(found)
+        matches = []
+        for term in candidates:
+            distance = edit_distance(word, term, max_distance)
+            if distance <= max_distance:
+                matches.append((term, distance))
+        matches.sort(key=lambda item: (item[1], item[0]))
+        return matches
@@ -0,0 +1,207 @@
+import re
+import threading
+from collections import defaultdict
+
+from fuzzy import DeletionIndex
+from languages import LANGUAGES, UnsupportedLanguage
+from morphology import IDENTITY, normalize, stemmer_for
+from resources import LANGUAGE_RESOURCES
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_END = ""  # trie slot holding the intents whose keyword ends at this node
+
+# Shorter stems are too ambiguous to match on their own ("tse", "dla")
+MIN_STEM = 4
+MIN_FUZZY_STEM = 5
+# Words the trie missed and what they resolved to; filler words repeat a lot
+FUZZY_MEMO_SIZE = 8192
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+class IntentMatcher:
+    """Keyword trie compiled once from an ``{intent: [keywords]}`` table.
+
+    A keyword matches any word that starts with it ("plant" matches "planting"
+    but not "implant"). ``match`` walks each input word down the trie once,
+    so cost depends on the input length, not on the number of keywords.
+
+    Words the trie misses fall back to their morphological stem (noun-class
+    prefix and locative suffix stripped, see morphology.py), looked up in a
+    deletion index within ``max_distance`` edits, so inflected and misspelt
+    forms such as "ezinambuzaneni" still reach the "izinambuzane" intent.
+    Only keywords from ``native_table`` are indexed by stem: the stemmer's
+    rules mangle English ("implant" -> "plant"), so English keywords match
+    by prefix alone.
+    """
+
+    def __init__(self, keyword_table, stemmer=IDENTITY, max_distance=1, native_table=None):
+        self._root = {}
+        self._order = {}
+        self._stemmer = stemmer
+        self._stems = {}
+        self._stem_index = DeletionIndex(max_distance=max_distance)
+        self._fuzzy_memo = {}
+        self.keyword_count = 0
+        for intent, keywords in keyword_table.items():
+            for keyword in keywords:
+                self.add_keyword(intent, keyword)
+        for intent, keywords in (native_table or {}).items():
+            for keyword in keywords:
+                self.add_keyword(intent, keyword, native=True)
+
+    def add_keyword(self, intent, keyword, native=False):
+        tokens = tokenize(keyword)
+        if len(tokens) != 1:
+            raise ValueError(f"Intent keyword must be a single word: {keyword!r}")
+        self._order.setdefault(intent, len(self._order))
+
+        node = self._root
+        for ch in tokens[0]:
+            node = node.setdefault(ch, {})
+        intents = node.setdefault(_END, [])
+        if intent not in intents:
+            intents.append(intent)
+            self.keyword_count += 1
+        if not native:
+            return
+
+        stem = self._stemmer.stem(tokens[0])
+        if len(stem) >= MIN_STEM:
+            stem_intents = self._stems.setdefault(stem, [])
+            if intent not in stem_intents:
+                stem_intents.append(intent)
+            self._stem_index.add(stem)
+            self._fuzzy_memo.clear()
+
+    @property
+    def intents(self):
+        return list(self._order)
+
+    def match(self, text):
+        # Returns [(intent, score), ...] best first; ties keep table order
+        scores = defaultdict(int)
+        for token in tokenize(text):
+            node = self._root
+            hit = False
+            for ch in token:
+                node = node.get(ch)
+                if node is None:
+                    break
+                for intent in node.get(_END, ()):
+                    scores[intent] += 1
+                    hit = True
+            if not hit:
+                intents = self._fuzzy_memo.get(token)
+                if intents is None:
+                    if len(self._fuzzy_memo) >= FUZZY_MEMO_SIZE:
+                        self._fuzzy_memo.clear()
+                    intents = self._fuzzy_memo[token] = self._fuzzy(token)
+                for intent in intents:
+                    scores[intent] += 1
+        return sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+
+    def _fuzzy(self, token):
+        # Intents of the closest keyword stems to this word's stem
+        if len(token) < MIN_STEM:
+            return ()
+        stem = self._stemmer.stem(token)
+        if len(stem) < MIN_STEM:
+            return ()
+        intents = self._stems.get(stem)
+        if intents is not None:
+            return tuple(intents)
+        if len(stem) < MIN_FUZZY_STEM:
+            return ()
+        matches = self._stem_index.lookup(stem)
+        if not matches:
+            return ()
+        closest = matches[0][1]
+        found = []
+        for term, distance in matches:
+            if distance == closest:
+                found.extend(intent for intent in self._stems[term] if intent not in found)
+        return tuple(found)
+
+    def best(self, text):
+        ranked = self.match(text)
+        return ranked[0][0] if ranked else None
+
+    def best_many(self, texts):
+        # Batch form of best(): duplicate messages are matched once
+        memo = {}
+        results = []
+        for text in texts:
+            key = normalize(text)
+            if key not in memo:
+                memo[key] = self.best(key)
+            results.append(memo[key])
+        return results
+
+
+def language_stemmer(language):
+    try:
+        return stemmer_for(LANGUAGES.code(language))
+    except UnsupportedLanguage:
+        return IDENTITY
+
+
+def build_matchers(store=LANGUAGE_RESOURCES):
+    # One compiled matcher per (language, domain_key)
+    return {
+        (language, domain): IntentMatcher(table, language_stemmer(language),
+                                          native_table=store.native_keywords(language).get(domain))
+        for language in store
+        for domain, table in store.keywords(language).items()
+    }
+
+
+class MatcherIndex:
+    """Matchers compiled on first use per (language, domain_key).
+
+    A matcher is rebuilt only when the ResourceStore reloads that language's
+    file, so edited keywords take effect without a restart. Keywords added
+    through ``ResourceStore.add_keywords`` are inserted into the compiled
+    matcher directly.
+    """
+
+    def __init__(self, store=LANGUAGE_RESOURCES):
+        self.store = store
+        self._lock = threading.Lock()
+        self._matchers = {}
+        store.subscribe(self._keywords_added)
+
+    def _keywords_added(self, language, domain, intent, keywords, previous, version, native):
+        with self._lock:
+            cached = self._matchers.get((language, domain))
+            # A matcher built from anything but the previous version is rebuilt on next use
+            if cached is None or cached[0] != previous:
+                return
+            for keyword in keywords:
+                cached[1].add_keyword(intent, keyword, native=native)
+            self._matchers[(language, domain)] = (version, cached[1])
+
+    def clear(self):
+        # Recompile every matcher on next use
+        with self._lock:
+            self._matchers.clear()
+
+    def get(self, key, default=None):
+        language, domain = key
+        try:
+            version = self.store.version(language)
+        except KeyError:
+            return default
+        with self._lock:
+            cached = self._matchers.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            table = self.store.keywords(language).get(domain)
+            if table is None:
+                return default
+            matcher = IntentMatcher(table, language_stemmer(language),
+                                    native_table=self.store.native_keywords(language).get(domain))
+            self._matchers[key] = (version, matcher)
+            return matcher
@@ -0,0 +1,107 @@
+"""Registry of the South African official languages and their TTS voices.
+
+Each language records its ISO 639 codes and which related languages' voices
+may stand in when no backend speaks it (e.g. isiNdebele -> isiZulu). Backend
+capabilities are probed once per synthesizer and cached, so a language no
+backend can voice is rejected instantly instead of failing per request.
+"""
+import threading
+from collections import namedtuple
+
+Language = namedtuple("Language", ["name", "code", "iso639_3", "native_name", "aliases", "fallbacks"])
+
+# code is the ISO 639-1 code where one exists (Sepedi only has ISO 639-2/3 "nso")
+SOUTH_AFRICAN_LANGUAGES = (
+    Language("Afrikaans", "af", "afr", "Afrikaans", (), ()),
+    Language("English", "en", "eng", "English", (), ()),
+    Language("Ndebele", "nr", "nbl", "isiNdebele", ("Southern Ndebele",), ("zu", "xh")),
+    Language("Northern Sotho", "nso", "nso", "Sesotho sa Leboa", ("Sepedi", "Pedi"), ("st", "tn")),
+    Language("Sotho", "st", "sot", "Sesotho", ("Southern Sotho", "Sesotho"), ("nso", "tn")),
+    Language("Swati", "ss", "ssw", "siSwati", ("Swazi",), ("zu",)),
+    Language("Tsonga", "ts", "tso", "Xitsonga", (), ()),
+    Language("Tswana", "tn", "tsn", "Setswana", (), ("st", "nso")),
+    Language("Venda", "ve", "ven", "Tshivenḓa", (), ()),
+    Language("Xhosa", "xh", "xho", "isiXhosa", (), ("zu",)),
+    Language("Zulu", "zu", "zul", "isiZulu", (), ("xh",)),
+)
+
+# code actually synthesized (None if unsupported) and the backends that can voice it
+Capability = namedtuple("Capability", ["code", "backends"])
+UNSUPPORTED = Capability(None, ())
+
+
+class UnsupportedLanguage(LookupError):
+    pass
+
+
+class LanguageRegistry:
+    def __init__(self, languages=SOUTH_AFRICAN_LANGUAGES):
+        self.languages = tuple(languages)
+        self._by_name = {}
+        for language in self.languages:
+            for name in (language.name, language.native_name, language.code, language.iso639_3,
+                         *language.aliases):
+                self._by_name[name.lower()] = language
+        self._lock = threading.Lock()
+        self._probed = {}
+
+    def get(self, name):
+        # Accepts English or native names, aliases and ISO codes, case-insensitively
+        language = self._by_name.get(name.lower())
+        if language is None:
+            raise UnsupportedLanguage(f"Unknown language: {name}")
+        return language
+
+    def __contains__(self, name):
+        return name.lower() in self._by_name
+
+    def __iter__(self):
+        return iter(self.languages)
+
+    def __len__(self):
+        return len(self.languages)
+
+    def code(self, name):
+        return self.get(name).code
+
+    def probe(self, synthesize):
+        """{language name: Capability} for one synthesizer, computed once and cached.
+
+        Synthesizers without a ``supports(code)`` method (plain callables, fakes)
+        are assumed to speak every language in its own code.
+        """
+        with self._lock:
+            capabilities = self._probed.get(id(synthesize))
+            if capabilities is not None and capabilities[0] is synthesize:
+                return capabilities[1]
+
+        supports = getattr(synthesize, "supports", None)
+        backends_for = getattr(synthesize, "backends_for", None)
+        capabilities = {}
+        for language in self.languages:
+            capability = UNSUPPORTED
+            for code in (language.code, *language.fallbacks):
+                if supports is None or supports(code):
+                    backends = tuple(backends_for(code)) if backends_for else ()
+                    capability = Capability(code, backends)
+                    break
+            capabilities[language.name] = capability
+
+        with self._lock:
+            self._probed[id(synthesize)] = (synthesize, capabilities)
+        return capabilities
+
+    def tts_code(self, name, synthesize):
+        # Language code to synthesize name with (possibly a fallback voice)
+        language = self.get(name)
+        capability = self.probe(synthesize)[language.name]
+        if capability.code is None:
+            raise UnsupportedLanguage(f"No TTS voice available for {language.name}")
+        return capability.code
+
+    def clear(self):
+        with self._lock:
+            self._probed.clear()
+
+
+LANGUAGES = LanguageRegistry()
@@ -0,0 +1,218 @@
+"""Lightweight timing metrics: rolling timings, span histograms and Prometheus export.
+
+Tracing is on by default; set TRACING=0 to turn every span into a shared
+no-op context manager. Set PROFILE_DIR to keep cProfile dumps of profiled
+requests and METRICS_FILE to have export_if_due() write Prometheus text.
+"""
+import bisect
+import contextlib
+import cProfile
+import os
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Timings:
+    """Rolling window of durations (seconds) with percentile summaries."""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            last = self._samples[-1] if self._samples else 0.0
+            count = self.count
+        if not samples:
+            return {"count": count, "last_ms": 0.0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+
+        def pct(p):
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1000
+
+        return {
+            "count": count,
+            "last_ms": last * 1000,
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+        }
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are interpolated within a bucket."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def percentile(self, p):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return 0.0
+        rank = p * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "started")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    """Named spans feeding per-stage histograms."""
+
+    def __init__(self, enabled=True, profile_dir=None, metrics_file=None, export_interval=15.0):
+        self.enabled = enabled
+        self.profile_dir = profile_dir
+        self.metrics_file = metrics_file
+        self.export_interval = export_interval
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._exported_at = 0.0
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        histogram.observe(seconds)
+
+    def set_gauge(self, name, value):
+        # Latest value wins (e.g. circuit breaker state)
+        with self._lock:
+            self._gauges[name] = value
+
+    def gauges(self):
+        with self._lock:
+            return dict(self._gauges)
+
+    @contextlib.contextmanager
+    def profile(self, name, enabled=True):
+        # cProfile one request; returns the profiler (or None) via the context value
+        if not enabled:
+            yield None
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            if self.profile_dir:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{name}-{time.time():.0f}.prof"))
+
+    def summary(self):
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return {
+            name: {
+                "count": histogram.count,
+                "p50_ms": histogram.percentile(0.50) * 1000,
+                "p95_ms": histogram.percentile(0.95) * 1000,
+                "p99_ms": histogram.percentile(0.99) * 1000,
+            }
+            for name, histogram in items
+        }
+
+    def prometheus(self, metric="assistant_stage_seconds", gauge_metric="assistant_gauge"):
+        with self._lock:
+            items = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+        lines = [
+            f"# HELP {metric} Time spent in each request stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, histogram in items:
+            counts, count, total = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+        if gauges:
+            lines.append(f"# HELP {gauge_metric} Current value of a named gauge.")
+            lines.append(f"# TYPE {gauge_metric} gauge")
+            lines.extend(f'{gauge_metric}{{name="{name}"}} {value:g}' for name, value in gauges)
+        return "\n".join(lines) + "\n"
+
+    def export_if_due(self):
+        # Rewrite METRICS_FILE at most every export_interval seconds
+        if not self.metrics_file:
+            return False
+        now = time.monotonic()
+        if now - self._exported_at < self.export_interval:
+            return False
+        self._exported_at = now
+        tmp_path = f"{self.metrics_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, self.metrics_file)
+        return True
+
+
+# Process-wide tracer shared by the engine, the app and the HTTP service
+TRACER = Tracer(
+    enabled=os.environ.get("TRACING", "1") != "0",
+    profile_dir=os.environ.get("PROFILE_DIR"),
+    metrics_file=os.environ.get("METRICS_FILE"),
+)
@@ -0,0 +1,84 @@
+"""Light-weight normalization and stemming for Nguni and Sotho-Tswana words.
+
+Both families are agglutinative: the noun "izinambuzane" (insects) also
+shows up as "ezinambuzaneni" (among the insects) or "inambuzane". The
+stemmers here strip the noun-class / locative prefix and the locative
+suffix and final vowel, so every form above reduces to the same stem. The
+rules are deliberately coarse: keywords and user input go through the same
+stemmer, so all that matters is that related forms collide.
+"""
+import unicodedata
+
+# Longest prefix wins, so "izin" is tried before "izi" and "i"
+NGUNI_PREFIXES = (
+    # noun classes 1-15
+    "umu", "um", "u", "aba", "abe", "ba", "imi", "mi", "ili", "li", "i", "ama", "ma",
+    "isi", "si", "izi", "izin", "izim", "zi", "in", "im", "ulu", "lu", "ubu", "bu", "uku", "ku",
+    # the same prefixes fused with locative e-/o-
+    "emu", "em", "eba", "emi", "eli", "ema", "esi", "ezi", "ezin", "ezim", "en",
+    "olu", "obu", "oku", "kwa", "kwi", "ko",
+)
+NGUNI_SUFFIXES = ("weni", "wini", "eni", "ini", "ana", "kazi")
+
+SOTHO_TSWANA_PREFIXES = (
+    # noun classes 1-15 (Setswana go- / Sesotho ho- for class 15)
+    "mo", "ba", "me", "le", "ma", "se", "di", "bo", "lo", "go", "ho",
+)
+SOTHO_TSWANA_SUFFIXES = ("eng", "ng", "ana", "nyana")
+
+VOWELS = frozenset("aeiou")
+
+
+def normalize(text):
+    # Lower-case and drop diacritics (Tshivenḓa ḓ -> d, Sesotho sa Leboa š -> s)
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class Stemmer:
+    def __init__(self, prefixes=(), suffixes=(), min_stem=3):
+        # Bucketed by first/last letter so each word only tries the affixes it could carry
+        self.prefixes = {}
+        for prefix in sorted(set(prefixes), key=len, reverse=True):
+            self.prefixes.setdefault(prefix[0], []).append(prefix)
+        self.suffixes = {}
+        for suffix in sorted(set(suffixes), key=len, reverse=True):
+            self.suffixes.setdefault(suffix[-1], []).append(suffix)
+        self.min_stem = min_stem
+
+    def stem(self, word):
+        if not word:
+            return word
+        for prefix in self.prefixes.get(word[0], ()):
+            if word.startswith(prefix) and len(word) - len(prefix) >= self.min_stem:
+                word = word[len(prefix):]
+                break
+        for suffix in self.suffixes.get(word[-1], ()):
+            if word.endswith(suffix) and len(word) - len(suffix) >= self.min_stem:
+                word = word[:-len(suffix)]
+                break
+        # Locative suffixes replace the final vowel, so drop it on every form
+        if len(word) > self.min_stem and word[-1] in VOWELS:
+            word = word[:-1]
+        return word
+
+
+class _Identity:
+    def stem(self, word):
+        return word
+
+
+IDENTITY = _Identity()
+NGUNI = Stemmer(NGUNI_PREFIXES, NGUNI_SUFFIXES)
+SOTHO_TSWANA = Stemmer(SOTHO_TSWANA_PREFIXES, SOTHO_TSWANA_SUFFIXES)
+
+STEMMERS = {
+    "zu": NGUNI, "xh": NGUNI, "ss": NGUNI, "nr": NGUNI,
+    "tn": SOTHO_TSWANA, "st": SOTHO_TSWANA, "nso": SOTHO_TSWANA,
+}
+
+
+def stemmer_for(lang_code):
+    return STEMMERS.get(lang_code, IDENTITY)
@@ -0,0 +1,150 @@
+"""Speculative audio prefetch for the responses a session is likely to ask for next.
+
+When a session picks a language/domain, the Quick Action and greeting
+responses for it (then the domain's other intents) are synthesized into the
+audio cache in the background, so the first click plays from cache instead
+of waiting on TTS.
+
+Work runs on a small per-process pool (``PREFETCH_WORKERS``) with a cap on
+queued jobs, so prefetching never competes with live requests for more than
+a couple of TTS calls. A job wanted by several sessions runs once. When a
+session changes its selection, its queued jobs that no other session wants
+are cancelled; a job already running finishes and its audio stays cached.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from languages import UnsupportedLanguage
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", "2"))
+# Queued + running jobs across all sessions; further candidates are skipped
+PREFETCH_MAX_PENDING = int(os.environ.get("PREFETCH_MAX_PENDING", "32"))
+
+
+class _Job:
+    __slots__ = ("key", "future", "owners")
+
+
+class Prefetcher:
+    def __init__(self, engine, workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING):
+        self.engine = engine
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        # session id -> keys of its unfinished jobs
+        self._sessions = {}
+        self._counters = {
+            "scheduled": 0,
+            "cached": 0,
+            "skipped": 0,
+            "cancelled": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+
+    def select(self, session_id, language, domain, intents):
+        """Prefetch ``intents`` (None is the greeting) for a session's new selection.
+
+        Cancels what the session asked for before. Returns the number of jobs
+        this call queued or joined.
+        """
+        self.cancel(session_id)
+        try:
+            lang_code = self.engine.tts_code(language)
+        except UnsupportedLanguage:
+            return 0
+
+        wanted = {}
+        for intent in intents:
+            try:
+                text = self.engine.lookup(language, domain, intent)
+            except KeyError:
+                continue
+            key = self.engine.audio_key(text, language)
+            if key is not None:
+                wanted.setdefault(key, text)
+
+        queued = 0
+        new_jobs = []
+        with self._lock:
+            keys = self._sessions.setdefault(session_id, set())
+            for key, text in wanted.items():
+                job = self._jobs.get(key)
+                if job is None:
+                    if key in self.engine.audio_cache:
+                        self._counters["cached"] += 1
+                        continue
+                    if len(self._jobs) >= self.max_pending:
+                        self._counters["skipped"] += 1
+                        continue
+                    job = _Job()
+                    job.key = key
+                    job.future = None
+                    job.owners = set()
+                    self._jobs[key] = job
+                    new_jobs.append((job, text))
+                    self._counters["scheduled"] += 1
+                job.owners.add(session_id)
+                keys.add(key)
+                queued += 1
+            if not keys:
+                del self._sessions[session_id]
+        # Outside the lock: the callback runs right away if the job is already done
+        for job, text in new_jobs:
+            job.future = self._pool.submit(self._run, job, text, lang_code)
+            job.future.add_done_callback(lambda _, job=job: self._finished(job))
+        return queued
+
+    def cancel(self, session_id):
+        # Drop a session's interest; queued jobs nobody else wants never start
+        with self._lock:
+            keys = self._sessions.pop(session_id, ())
+            jobs = [self._jobs[key] for key in keys if key in self._jobs]
+            for job in jobs:
+                job.owners.discard(session_id)
+        for job in jobs:
+            if not job.owners and job.future is not None and job.future.cancel():
+                with self._lock:
+                    self._counters["cancelled"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, pending=len(self._jobs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, text, lang_code):
+        # False if every session lost interest while the job was queued
+        with self._lock:
+            if not job.owners:
+                return False
+        self.engine.synthesis.get(text, lang_code, slow=False)
+        return True
+
+    def _finished(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            for session_id in list(job.owners):
+                keys = self._sessions.get(session_id)
+                if keys is not None:
+                    keys.discard(job.key)
+                    if not keys:
+                        del self._sessions[session_id]
+            if job.future.cancelled():
+                return
+            error = job.future.exception()
+            if error is not None:
+                self._counters["failed"] += 1
+            elif job.future.result():
+                self._counters["completed"] += 1
+            else:
+                self._counters["cancelled"] += 1
+        if error is not None:
+            logger.warning("Prefetch failed: %s", error)
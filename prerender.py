@@ -0,0 +1,171 @@
+"""Offline pre-rendering of every fixed response in LANGUAGE_RESOURCES.
+
+Usage:
+    python prerender.py prerendered/ --workers 8
+    python prerender.py prerendered/ --engine fake   # CI, no network
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from audio_cache import cache_key
+from languages import LANGUAGES, UnsupportedLanguage
+from resources import LANGUAGE_RESOURCES
+from tts import build_synthesizer, synthesize_voiced, voice_id
+
+MANIFEST_NAME = "manifest.json"
+# 2: keys and entries carry the backend voice
+MANIFEST_VERSION = 2
+
+
+def iter_resource_strings(resources=LANGUAGE_RESOURCES):
+    # Yields (language, path, text) for each greeting and domain -> intent string
+    for language, lang_data in resources.items():
+        for name, value in lang_data.items():
+            if isinstance(value, str):
+                yield language, name, value
+            else:
+                for intent, text in value.items():
+                    yield language, f"{name}.{intent}", text
+
+
+def blob_path(out_dir, key):
+    return os.path.join(out_dir, f"{key}.mp3")
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "entries": []}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "entries": []}
+    return manifest
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build(out_dir, synthesize, resources=LANGUAGE_RESOURCES, workers=4, slow=False,
+          force=False, log=print):
+    os.makedirs(out_dir, exist_ok=True)
+    previous_entries = load_manifest(out_dir)["entries"]
+    previous = {entry["key"] for entry in previous_entries}
+
+    entries = []
+    pending = {}
+    for language, path, text in iter_resource_strings(resources):
+        try:
+            lang_code = LANGUAGES.tts_code(language, synthesize)
+        except UnsupportedLanguage as e:
+            log(f"skip {language} {path}: {e}")
+            continue
+        voice = voice_id(synthesize, lang_code)
+        key = cache_key(text, lang_code, slow, voice)
+        entries.append({
+            "language": language,
+            "path": path,
+            "lang_code": lang_code,
+            "voice": voice,
+            "slow": slow,
+            "text": text,
+            "key": key,
+        })
+        # Incremental rebuild: identical voice/text/lang/speed means identical key and blob
+        if force or key not in previous or not os.path.exists(blob_path(out_dir, key)):
+            pending[key] = (text, lang_code, voice)
+
+    started = time.perf_counter()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # Pinned to the voice in the key: a fallback backend's audio would be filed under the wrong one
+        futures = {
+            pool.submit(synthesize_voiced, synthesize, text, lang_code, slow, voice): key
+            for key, (text, lang_code, voice) in pending.items()
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                _write_atomic(blob_path(out_dir, key), future.result()[1])
+            except Exception as e:
+                failures += 1
+                log(f"failed {key}: {e}")
+
+    rendered = {entry["key"] for entry in entries if os.path.exists(blob_path(out_dir, entry["key"]))}
+    entries = [entry for entry in entries if entry["key"] in rendered]
+    for entry in entries:
+        entry["bytes"] = os.path.getsize(blob_path(out_dir, entry["key"]))
+    # Blobs rendered by other backends (a --engine fake run into the same directory) are kept
+    voices = {entry["voice"] for entry in entries}
+    kept = [
+        entry for entry in previous_entries
+        if entry["voice"] not in voices and os.path.exists(blob_path(out_dir, entry["key"]))
+    ]
+    rendered.update(entry["key"] for entry in kept)
+
+    # Drop blobs for strings that no longer exist
+    for name in os.listdir(out_dir):
+        if name.endswith(".mp3") and name[:-4] not in rendered:
+            os.remove(os.path.join(out_dir, name))
+
+    manifest = {"version": MANIFEST_VERSION, "generated_at": time.time(), "entries": entries + kept}
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    summary = {
+        "total": len(entries),
+        "rendered": len(pending) - failures,
+        "skipped": len(entries) - (len(pending) - failures),
+        "failed": failures,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    log(f"{summary['rendered']} rendered, {summary['skipped']} up to date, "
+        f"{summary['failed']} failed in {summary['seconds']}s")
+    return summary
+
+
+def warm_cache(cache, out_dir):
+    # Load pre-rendered blobs into an AudioCache so startup needs no TTS calls
+    loaded = 0
+    for entry in load_manifest(out_dir)["entries"]:
+        key = entry["key"]
+        if entry["voice"] != voice_id(cache.synthesize, entry["lang_code"]):
+            # Rendered by a backend this cache doesn't use; its key would never be looked up
+            continue
+        if key in cache:
+            continue
+        try:
+            with open(blob_path(out_dir, key), "rb") as f:
+                cache.put(key, f.read())
+        except OSError:
+            continue
+        loaded += 1
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render audio for all fixed responses.")
+    parser.add_argument("out_dir", nargs="?", default="prerendered")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--engine", default="espeak,gtts",
+                        help="TTS backends in fallback order (espeak, gtts, fake)")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--slow", action="store_true")
+    parser.add_argument("--force", action="store_true", help="re-render every string")
+    args = parser.parse_args(argv)
+
+    synthesize = build_synthesizer(args.engine, fake_latency=args.fake_latency)
+    summary = build(args.out_dir, synthesize, workers=args.workers, slow=args.slow, force=args.force)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
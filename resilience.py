@@ -0,0 +1,222 @@
+"""Deadlines, jittered retries and a circuit breaker around TTS backends.
+
+``ResilientBackend`` wraps one synthesize callable:
+
+* every call has a deadline; attempts run on a small bounded pool so a hung
+  upstream costs the caller at most the deadline, and at most ``workers``
+  threads in total
+* streams get the deadline for their first chunk and again for every chunk
+  after it, so a backend that stalls mid-stream is cut off too
+* failed or timed-out attempts (for streams: until the first chunk) are
+  retried with full-jitter exponential backoff while the deadline allows
+* a ``CircuitBreaker`` counts consecutive failures; once open, calls fail
+  immediately with ``CircuitOpen`` (so BackendRouter moves on to the next
+  backend, or the engine answers text-only) until a half-open probe succeeds
+
+Breaker state is exported as gauges (0 closed, 1 half-open, 2 open) through
+the process TRACER, next to the per-backend latency histograms.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from metrics import TRACER
+
+TTS_TIMEOUT = float(os.environ.get("TTS_TIMEOUT", "8"))
+TTS_RETRIES = int(os.environ.get("TTS_RETRIES", "1"))
+TTS_BREAKER_FAILURES = int(os.environ.get("TTS_BREAKER_FAILURES", "5"))
+TTS_BREAKER_RESET = float(os.environ.get("TTS_BREAKER_RESET", "30"))
+
+CLOSED = "closed"
+HALF_OPEN = "half-open"
+OPEN = "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one probe call is let through (half-open);
+    its success closes the circuit, its failure opens it for another period.
+    """
+
+    def __init__(self, name, failure_threshold=TTS_BREAKER_FAILURES, reset_timeout=TTS_BREAKER_RESET,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counters = {"opened": 0, "half_opened": 0, "closed": 0, "rejected": 0}
+        self._export()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self):
+        # False means fail fast; True in half-open hands out the single probe
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED, "closed")
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = self.clock()
+                self._transition(OPEN, "opened")
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            return dict(self._counters, state=self._state, failures=self._failures)
+
+    # Internals (caller holds the lock)
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN, "half_opened")
+
+    def _transition(self, state, counter):
+        self._state = state
+        self._counters[counter] += 1
+        self._export()
+
+    def _export(self):
+        TRACER.set_gauge(f"tts.circuit.{self.name}.state", STATE_VALUES[self._state])
+        TRACER.set_gauge(f"tts.circuit.{self.name}.opened", self._counters["opened"])
+
+
+class ResilientBackend:
+    def __init__(self, name, backend, timeout=TTS_TIMEOUT, retries=TTS_RETRIES, backoff=0.2,
+                 max_backoff=2.0, breaker=None, workers=4):
+        self.name = name
+        self.backend = backend
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker(name)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"tts-{name}")
+        self._lock = threading.Lock()
+        self._counters = {"retries": 0, "timeouts": 0}
+
+    # BackendRouter probes these once per language
+
+    @property
+    def voice(self):
+        return getattr(self.backend, "voice", None) or type(self.backend).__name__
+
+    def available(self):
+        return getattr(self.backend, "available", lambda: True)()
+
+    def supports(self, lang_code):
+        return getattr(self.backend, "supports", lambda code: True)(lang_code)
+
+    def __call__(self, text, lang_code, slow=False):
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+        data = self._with_retries(
+            lambda deadline: self._wait(self._pool.submit(self.backend, text, lang_code, slow), deadline)
+        )
+        self.breaker.record_success()
+        return data
+
+    def stream(self, text, lang_code, slow=False):
+        stream = getattr(self.backend, "stream", None)
+        if stream is None:
+            yield self(text, lang_code, slow)
+            return
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+
+        def first_chunk(deadline):
+            source = stream(text, lang_code, slow)
+            return source, self._wait(self._pool.submit(next, source, None), deadline)
+
+        # Nothing has reached the reader before the first chunk, so only that part is retried
+        source, chunk = self._with_retries(first_chunk)
+        try:
+            while chunk is not None:
+                yield chunk
+                chunk = self._wait(self._pool.submit(next, source, None), time.monotonic() + self.timeout)
+        except GeneratorExit:
+            # The reader stopped early; the backend itself was answering
+            source.close()
+            self.breaker.record_success()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+    def _with_retries(self, attempt):
+        # attempt(deadline) is retried with jittered backoff; the last error counts against the breaker
+        deadline = time.monotonic() + self.timeout
+        tries = 0
+        while True:
+            try:
+                return attempt(deadline)
+            except Exception:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** tries))
+                tries += 1
+                if tries > self.retries or time.monotonic() + delay >= deadline:
+                    self.breaker.record_failure()
+                    raise
+            self._count("retries")
+            time.sleep(delay)
+
+    def _wait(self, future, deadline):
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0.0))
+        except FutureTimeout:
+            # The attempt keeps its pool thread until the backend returns; the
+            # pool size bounds how many threads a hung upstream can hold
+            future.cancel()
+            self._count("timeouts")
+            raise DeadlineExceeded(f"{self.name} did not answer within {self.timeout:g}s") from None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        breaker = self.breaker.stats()
+        counters["circuit"] = breaker["state"]
+        counters["circuit_opened"] = breaker["opened"]
+        counters["rejected"] = breaker["rejected"]
+        return counters
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
@@ -0,0 +1,345 @@
+"""Language resources loaded lazily from versioned JSON files in data/resources/.
+
+Each ``<Language>.json`` file holds the greeting plus, per domain, each
+intent's response text and keywords: ``keywords`` (English, matched as
+word prefixes) and ``native_keywords`` (the language's own words, also
+matched through their stems, see morphology.py). Files are only read when their
+language is first used, validated once per change, and re-read when they
+change on disk, so content can be edited without restarting the server.
+Keywords added through ``add_keywords`` (accepted community contributions)
+go to a per-language overlay file under RESOURCES_OVERLAY_DIR, outside the
+source tree, which is merged over the shipped file on load. They are also
+handed to subscribers, so compiled intent matchers grow in place instead of
+being rebuilt.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+RESOURCES_DIR = os.environ.get(
+    "RESOURCES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "resources")
+)
+RESOURCES_OVERLAY_DIR = os.environ.get(
+    "RESOURCES_OVERLAY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".resource_overlays")
+)
+KEYWORD_FIELDS = ("keywords", "native_keywords")
+
+
+class ResourceError(ValueError):
+    pass
+
+
+def _signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _signature_or_none(path):
+    try:
+        return _signature(path)
+    except OSError:
+        return None
+
+
+def _write_json_atomic(path, payload):
+    # A temp name unique to this writer, so processes sharing the directory never collide
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def validate(data, source="<memory>"):
+    def fail(message):
+        raise ResourceError(f"{source}: {message}")
+
+    if not isinstance(data, dict):
+        fail("top level must be an object")
+    if data.get("schema_version") != SCHEMA_VERSION:
+        fail(f"unsupported schema_version {data.get('schema_version')!r} (expected {SCHEMA_VERSION})")
+    if not isinstance(data.get("language"), str) or not data["language"]:
+        fail("language must be a non-empty string")
+    if not isinstance(data.get("greeting"), str) or not data["greeting"]:
+        fail("greeting must be a non-empty string")
+    domains = data.get("domains")
+    if not isinstance(domains, dict):
+        fail("domains must be an object")
+    for domain, intents in domains.items():
+        if domain == "greeting" or not isinstance(intents, dict):
+            fail(f"domain {domain!r} must be an object of intents")
+        for intent, entry in intents.items():
+            where = f"{domain}.{intent}"
+            if not isinstance(entry, dict):
+                fail(f"{where} must be an object")
+            if not isinstance(entry.get("response"), str) or not entry["response"]:
+                fail(f"{where}.response must be a non-empty string")
+            for field in KEYWORD_FIELDS:
+                keywords = entry.get(field, [])
+                if not isinstance(keywords, list) or not all(isinstance(k, str) and k for k in keywords):
+                    fail(f"{where}.{field} must be a list of non-empty strings")
+    return data
+
+
+def validate_overlay(data, source="<memory>"):
+    # {"domains": {domain: {intent: {"keywords": [...], "native_keywords": [...]}}}}
+    def fail(message):
+        raise ResourceError(f"{source}: {message}")
+
+    if not isinstance(data, dict) or not isinstance(data.get("domains"), dict):
+        fail("overlay must be an object with a domains object")
+    for domain, intents in data["domains"].items():
+        if not isinstance(intents, dict):
+            fail(f"domain {domain!r} must be an object of intents")
+        for intent, entry in intents.items():
+            if not isinstance(entry, dict):
+                fail(f"{domain}.{intent} must be an object")
+            for field in KEYWORD_FIELDS:
+                keywords = entry.get(field, [])
+                if not isinstance(keywords, list) or not all(isinstance(k, str) and k for k in keywords):
+                    fail(f"{domain}.{intent}.{field} must be a list of non-empty strings")
+    return data
+
+
+def merge_overlay(data, overlay):
+    # Adds the overlay's keywords to intents the shipped file defines; others are ignored
+    for domain, intents in overlay["domains"].items():
+        for intent, extra in intents.items():
+            entry = data["domains"].get(domain, {}).get(intent)
+            if entry is None:
+                logger.warning("Ignoring overlay keywords for unknown intent %s.%s", domain, intent)
+                continue
+            for field in KEYWORD_FIELDS:
+                existing = entry.setdefault(field, [])
+                existing.extend(k for k in extra.get(field, []) if k not in existing)
+    return data
+
+
+class _Entry:
+    __slots__ = ("signature", "checked_at", "version", "responses", "keywords", "native_keywords")
+
+
+class ResourceStore(Mapping):
+    """Mapping of language -> ``{"greeting": ..., domain: {intent: response}}``.
+
+    Behaves like the old LANGUAGE_RESOURCES dict, but each language is loaded
+    on first access and reloaded when its file changes (checked at most every
+    ``check_interval`` seconds).
+    """
+
+    def __init__(self, directory=RESOURCES_DIR, check_interval=1.0, overlay_directory=RESOURCES_OVERLAY_DIR):
+        self.directory = directory
+        self.overlay_directory = overlay_directory
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._entries = {}
+        # Versions come from one counter for the whole store, so they never repeat,
+        # not even after invalidate() drops an entry
+        self._version = 0
+        self._languages = None
+        self._listed_at = 0.0
+        self._subscribers = []
+
+    def _path(self, language):
+        return os.path.join(self.directory, f"{language}.json")
+
+    def _overlay_path(self, language):
+        return os.path.join(self.overlay_directory, f"{language}.json")
+
+    def _signature(self, language):
+        # Changes whenever the shipped file or its overlay does; KeyError if the language has no file
+        try:
+            base = _signature(self._path(language))
+        except OSError:
+            raise KeyError(language)
+        return base, _signature_or_none(self._overlay_path(language))
+
+    def _read(self, language):
+        # (validated shipped data with the overlay merged in, overlay)
+        path = self._path(language)
+        with open(path, encoding="utf-8") as f:
+            data = validate(json.load(f), path)
+        overlay_path = self._overlay_path(language)
+        try:
+            with open(overlay_path, encoding="utf-8") as f:
+                overlay = validate_overlay(json.load(f), overlay_path)
+        except FileNotFoundError:
+            overlay = {"language": language, "domains": {}}
+        return merge_overlay(data, overlay), overlay
+
+    def languages(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._languages is None or now - self._listed_at >= self.check_interval:
+                try:
+                    names = sorted(os.listdir(self.directory))
+                except OSError:
+                    names = []
+                self._languages = [name[:-5] for name in names if name.endswith(".json")]
+                self._listed_at = now
+            return list(self._languages)
+
+    def _entry(self, language):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(language)
+            if entry is not None and now - entry.checked_at < self.check_interval:
+                return entry
+
+            try:
+                signature = self._signature(language)
+            except KeyError:
+                self._entries.pop(language, None)
+                raise
+            if entry is not None and entry.signature == signature:
+                entry.checked_at = now
+                return entry
+
+            try:
+                data, _ = self._read(language)
+            except (OSError, ValueError) as e:
+                if entry is None:
+                    raise
+                # Keep serving the last good version until the file is fixed
+                logger.warning("Ignoring invalid resource update: %s", e)
+                entry.signature = signature
+                entry.checked_at = now
+                return entry
+
+            fresh = _Entry()
+            fresh.signature = signature
+            fresh.checked_at = now
+            fresh.version = self._next_version()
+            fresh.responses = {"greeting": data["greeting"]}
+            fresh.keywords = {}
+            fresh.native_keywords = {}
+            for domain, intents in data["domains"].items():
+                fresh.responses[domain] = {intent: e["response"] for intent, e in intents.items()}
+                fresh.keywords[domain] = {
+                    intent: e.get("keywords", []) + e.get("native_keywords", []) for intent, e in intents.items()
+                }
+                fresh.native_keywords[domain] = {
+                    intent: list(e.get("native_keywords", [])) for intent, e in intents.items()
+                }
+            self._entries[language] = fresh
+            return fresh
+
+    def __getitem__(self, language):
+        return self._entry(language).responses
+
+    def __contains__(self, language):
+        return os.path.exists(self._path(language))
+
+    def __iter__(self):
+        return iter(self.languages())
+
+    def __len__(self):
+        return len(self.languages())
+
+    def keywords(self, language):
+        # {domain: {intent: [keywords]}} for one language, English and native
+        return self._entry(language).keywords
+
+    def native_keywords(self, language):
+        # The native-language subset of keywords(), the only ones matched by stem
+        return self._entry(language).native_keywords
+
+    def version(self, language):
+        # Changes every time the language is reloaded or gains keywords; never reused
+        return self._entry(language).version
+
+    def _next_version(self):
+        # Caller holds the lock
+        self._version += 1
+        return self._version
+
+    def subscribe(self, callback):
+        # callback(language, domain, intent, keywords, previous, version, native) after add_keywords;
+        # previous is the version the keywords were added on top of
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def add_keywords(self, language, domain, intent, keywords, native=False):
+        """Add keywords to one intent, in the overlay file and the loaded copy.
+
+        ``native`` keywords are in the language itself and also match by stem;
+        the others match as word prefixes only. Returns the keywords that were
+        actually new. If either file changed on disk since it was loaded, the
+        loaded copy is left alone and the next access reloads it as usual.
+        """
+        with self._lock:
+            before = self._signature(language)
+            data, overlay = self._read(language)
+            entry_data = data["domains"].get(domain, {}).get(intent)
+            if entry_data is None:
+                raise KeyError(f"{language}: unknown intent {domain}.{intent}")
+            existing = set(entry_data.get("keywords", [])) | set(entry_data.get("native_keywords", []))
+            added = [keyword for keyword in dict.fromkeys(keywords) if keyword and keyword not in existing]
+            if not added:
+                return []
+            field = "native_keywords" if native else "keywords"
+            overlay_entry = overlay["domains"].setdefault(domain, {}).setdefault(intent, {})
+            overlay_entry.setdefault(field, []).extend(added)
+            os.makedirs(self.overlay_directory, exist_ok=True)
+            _write_json_atomic(self._overlay_path(language), overlay)
+
+            entry = self._entries.get(language)
+            if entry is None or entry.signature != before:
+                self._entries.pop(language, None)
+                return added
+            intents = dict(entry.keywords[domain])
+            intents[intent] = intents.get(intent, []) + added
+            entry.keywords = {**entry.keywords, domain: intents}
+            if native:
+                native_intents = dict(entry.native_keywords[domain])
+                native_intents[intent] = native_intents.get(intent, []) + added
+                entry.native_keywords = {**entry.native_keywords, domain: native_intents}
+            entry.signature = self._signature(language)
+            previous = entry.version
+            entry.version = version = self._next_version()
+            subscribers = list(self._subscribers)
+        # Outside the lock: subscribers may call back into the store
+        for callback in subscribers:
+            callback(language, domain, intent, added, previous, version, native)
+        return added
+
+    def invalidate(self, language=None):
+        with self._lock:
+            if language is None:
+                self._entries.clear()
+                self._languages = None
+            else:
+                self._entries.pop(language, None)
+
+
+class KeywordIndex(Mapping):
+    """Read-only language -> ``{domain: {intent: [keywords]}}`` view of a ResourceStore."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, language):
+        return self.store.keywords(language)
+
+    def __iter__(self):
+        return iter(self.store)
+
+    def __len__(self):
+        return len(self.store)
+
+
+# Process-wide store shared by every session and rerun
+LANGUAGE_RESOURCES = ResourceStore()
+INTENT_KEYWORDS = KeywordIndex(LANGUAGE_RESOURCES)
+
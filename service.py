@@ -0,0 +1,346 @@
+"""Asyncio HTTP service exposing the assistant to USSD/WhatsApp gateways.
+
+Endpoints:
+    GET  /healthz
+    GET  /respond?text=...&language=Zulu&domain=Healthcare   -> JSON
+    POST /respond        {"text", "language", "domain"}        -> JSON
+    POST /respond/audio  {"text", "language", "domain"}        -> chunked MP3/WAV
+    GET  /audio/<key>                                          -> chunked MP3/WAV
+    GET  /metrics                                              -> Prometheus text
+
+Usage:
+    python service.py --port 8080 --workers 4
+    python service.py --engine fake     # local fake TTS, no network
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlsplit
+
+from analytics import open_event_log
+from engine import Response, create_engine
+from metrics import TRACER
+from resilience import CircuitOpen
+from tts import audio_mime, build_synthesizer
+
+CHUNK_SIZE = 16 * 1024
+MAX_BODY = 64 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResponseAborted(Exception):
+    # Raised once a response has started; the connection is dropped instead of answered
+    pass
+
+
+class AssistantService:
+    """Runs the engine off the event loop and coalesces identical in-flight syntheses."""
+
+    def __init__(self, engine, max_workers=4):
+        self.engine = engine
+        # /audio/<key> serves clips that other processes (the app with AUDIO_BASE_URL, cluster
+        # workers) wrote to the cache dir after this one started, so look for unindexed files
+        engine.audio_cache.shared = True
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self._inflight = {}
+        self.stats = {"requests": 0, "syntheses": 0, "coalesced": 0, "errors": 0}
+
+    async def respond(self, text, language, domain):
+        if language not in self.engine.resources:
+            raise HTTPError(400, f"Unsupported language: {language}")
+        started = time.perf_counter()
+        intent = self.engine.detect_intent(text, language, domain)
+        response_text = self.engine.lookup(language, domain, intent)
+        cache_hit = self.engine.audio_key(response_text, language) in self.engine.audio_cache
+        audio, error = await self.audio_for(response_text, language)
+        self.engine.record_event(language, domain, intent, started, cache_hit)
+        return Response(response_text, intent, audio, error)
+
+    async def audio_for(self, text, language):
+        key = self.engine.audio_key(text, language)
+        loop = asyncio.get_running_loop()
+        if key is None:
+            # No voice for the language: nothing to coalesce, the engine answers text-only
+            return await loop.run_in_executor(self.executor, self.engine.generate_audio_response, text, language)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = loop.run_in_executor(self.executor, self.engine.generate_audio_response, text, language)
+        self._inflight[key] = task
+        self.stats["syntheses"] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    async def stream_audio(self, text, language):
+        # Async chunk iterator; a fresh synthesis is streamed while duplicates wait for it
+        key = self.engine.audio_key(text, language)
+        if key is None:
+            raise HTTPError(400, f"No TTS voice available for {language}")
+        if key in self._inflight or key in self.engine.audio_cache:
+            audio, error = await self.audio_for(text, language)
+            if audio is None:
+                raise HTTPError(500, error or "Audio generation failed")
+            for start in range(0, len(audio), CHUNK_SIZE):
+                yield audio[start:start + CHUNK_SIZE]
+            return
+
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._inflight[key] = done
+        self.stats["syntheses"] += 1
+        received = []
+        try:
+            chunks = self.engine.stream_audio(text, language)
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+                if chunk is None:
+                    break
+                received.append(chunk)
+                yield chunk
+            done.set_result((b"".join(received), None))
+        except Exception as e:
+            if not done.done():
+                done.set_result((None, str(e)))
+            raise
+        finally:
+            if not done.done():
+                done.set_result((None, "Synthesis cancelled"))
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+
+    # HTTP plumbing
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, headers, body = await self._read_request(reader)
+            self.stats["requests"] += 1
+            with TRACER.span("http.request"):
+                await self._dispatch(method, target, headers, body, writer)
+        except HTTPError as e:
+            self.stats["errors"] += 1
+            await self._send_json(writer, e.status, {"error": e.message})
+        except ResponseAborted:
+            self.stats["errors"] += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            self.stats["errors"] += 1
+            try:
+                await self._send_json(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, method, target, headers, body, writer):
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+
+        if path == "/healthz":
+            await self._send_json(writer, 200, {"status": "ok", **self.stats})
+        elif path == "/metrics":
+            body = TRACER.prometheus().encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        elif path == "/respond":
+            if method == "GET":
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            elif method == "POST":
+                params = self._parse_json(body)
+            else:
+                raise HTTPError(405, "Use GET or POST")
+            response = await self.respond(*self._query_args(params))
+            await self._send_json(writer, 200, {
+                "text": response.text,
+                "intent": response.intent,
+                "audio_url": f"/audio/{self.engine.audio_key(response.text, params['language'])}"
+                if response.audio is not None else None,
+                "error": response.error,
+            })
+        elif path == "/respond/audio":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            text, language, domain = self._query_args(self._parse_json(body))
+            if language not in self.engine.resources:
+                raise HTTPError(400, f"Unsupported language: {language}")
+            started = time.perf_counter()
+            intent = self.engine.detect_intent(text, language, domain)
+            response_text = self.engine.lookup(language, domain, intent)
+            cache_hit = self.engine.audio_key(response_text, language) in self.engine.audio_cache
+            chunks = self.stream_audio(response_text, language)
+            # Pull the first chunk before sending headers so failures still get a status code
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = b""
+            except HTTPError:
+                raise
+            except CircuitOpen as e:
+                raise HTTPError(503, f"Audio generation failed: {e}")
+            except Exception as e:
+                raise HTTPError(500, f"Audio generation failed: {e}")
+            await self._send_chunks(writer, first, chunks, {
+                "X-Intent": intent or "",
+                "X-Response-Text": quote(response_text),
+            })
+            self.engine.record_event(language, domain, intent, started, cache_hit)
+        elif path.startswith("/audio/"):
+            loop = asyncio.get_running_loop()
+            audio = await loop.run_in_executor(self.executor, self.engine.audio_cache.lookup, path[7:])
+            if audio is None:
+                raise HTTPError(404, "Unknown audio key")
+            await self._send_audio(writer, audio)
+        else:
+            raise HTTPError(404, f"No route for {path}")
+
+    @staticmethod
+    def _parse_json(body):
+        try:
+            params = json.loads(body.decode("utf-8") or "{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(params, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return params
+
+    @staticmethod
+    def _query_args(params):
+        text = params.get("text")
+        language = params.get("language")
+        if not text or not language:
+            raise HTTPError(400, "text and language are required")
+        return text, language, params.get("domain", "Healthcare")
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = headers.get("content-length") or "0"
+        # int() would also take "+5", " 5" or "1_0"; only plain digits are a valid length
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "Malformed Content-Length")
+        length = int(length)
+        if length > MAX_BODY:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    async def _send_json(writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _send_audio(writer, audio, extra_headers=None):
+        async def rest():
+            for start in range(CHUNK_SIZE, len(audio), CHUNK_SIZE):
+                yield audio[start:start + CHUNK_SIZE]
+
+        await AssistantService._send_chunks(writer, audio[:CHUNK_SIZE], rest(), extra_headers)
+
+    @staticmethod
+    async def _send_chunks(writer, first, chunks, extra_headers=None):
+        content_type = audio_mime(first) if first else "audio/mpeg"
+        head = f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n"
+        for name, value in (extra_headers or {}).items():
+            head += f"{name}: {value}\r\n"
+        writer.write((head + "Connection: close\r\n\r\n").encode("latin-1"))
+        if first:
+            writer.write(f"{len(first):x}\r\n".encode("latin-1") + first + b"\r\n")
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    writer.write(f"{len(chunk):x}\r\n".encode("latin-1") + chunk + b"\r\n")
+                    await writer.drain()
+        except Exception as e:
+            # The 200 head is already out; cutting the connection before the last chunk
+            # is the only way left to tell the client the body is incomplete
+            writer.transport.abort()
+            raise ResponseAborted(str(e)) from e
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    return await asyncio.start_server(service.handle, host, port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the assistant as an HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="TTS executor threads")
+    parser.add_argument("--engine", default="espeak,gtts",
+                        help="TTS backends in fallback order (espeak, gtts, fake)")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    synthesize = build_synthesizer(args.engine, fake_latency=args.fake_latency)
+    service = AssistantService(create_engine(synthesize, events=open_event_log()), max_workers=args.workers)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"Listening on http://{args.host}:{args.port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
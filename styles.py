@@ -0,0 +1,314 @@
+import re
+from urllib.parse import quote
+
+
+def minify_css(css):
+    # Whitespace only; every rerun re-sends the sheet, so each byte counts
+    css = re.sub(r"\s+", " ", css).strip()
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return re.sub(r":\s", ":", css).replace(";}", "}")
+
+
+# Modern UI with new color scheme, built once per process and shared by every session
+APP_CSS = minify_css("""
+<style>
+    :root {
+        --primary: #4CAF50;
+        --secondary: #4DB6AC;
+        --accent: #C0CA33;
+        --vibrant1: #4DB6AC;
+        --vibrant2: #263238;
+        --background: #FFFFFF;
+        --card: #FFFFFF;
+        --text: #263238;
+        --success: #4CAF50;
+        --warning: #FFC107;
+    }
+    
+    [data-testid="stAppViewContainer"] {
+        background-color: var(--background);
+        background-image: linear-gradient(135deg, #FFFFFF 0%, #E0E0E0 100%);
+        animation: gradientBG 15s ease infinite;
+        background-size: 400% 400%;
+    }
+    
+    @keyframes gradientBG {
+        0% { background-position: 0% 50%; }
+        50% { background-position: 100% 50%; }
+        100% { background-position: 0% 50%; }
+    }
+    
+    .st-bb {background-color: var(--card);}
+    
+    header[data-testid="stHeader"] {
+        background: rgba(255,255,255,0.9);
+        backdrop-filter: blur(10px);
+        box-shadow: 0 4px 20px rgba(0,0,0,0.1);
+    }
+    
+    .stButton>button {
+        background: linear-gradient(135deg, var(--primary), var(--secondary));
+        color: white;
+        border-radius: 15px;
+        padding: 12px 24px;
+        font-weight: 600;
+        transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
+        border: none;
+        box-shadow: 0 6px 12px rgba(76, 175, 80, 0.3);
+        position: relative;
+        overflow: hidden;
+    }
+    
+    .stButton>button:hover {
+        transform: translateY(-4px) scale(1.02);
+        box-shadow: 0 12px 20px rgba(76, 175, 80, 0.4);
+    }
+    
+    .stButton>button:after {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: -100%;
+        width: 100%;
+        height: 100%;
+        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
+        transition: 0.5s;
+    }
+    
+    .stButton>button:hover:after {
+        left: 100%;
+    }
+    
+    .stTextInput>div>div>input, .stTextArea>div>div>textarea {
+        border-radius: 15px;
+        padding: 14px 18px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.05);
+        border: 2px solid #e0e0e0;
+        transition: all 0.3s ease;
+    }
+    
+    .stTextInput>div>div>input:focus, .stTextArea>div>div>textarea:focus {
+        border-color: var(--primary);
+        box-shadow: 0 0 0 3px rgba(76, 175, 80, 0.2);
+        transform: scale(1.01);
+    }
+    
+    .stRadio>div {
+        flex-direction: row;
+        gap: 20px;
+    }
+    
+    .stRadio>div>label {
+        background: var(--card);
+        padding: 18px 24px;
+        border-radius: 15px;
+        box-shadow: 0 6px 15px rgba(0,0,0,0.08);
+        transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
+        border: 2px solid transparent;
+        cursor: pointer;
+    }
+    
+    .stRadio>div>label:hover {
+        transform: translateY(-5px) scale(1.03);
+        box-shadow: 0 10px 25px rgba(0,0,0,0.15);
+        border-color: var(--primary);
+    }
+    
+    .stRadio>div>label[data-baseweb="radio"]:has(> div:first-child[aria-checked="true"]) {
+        background: linear-gradient(135deg, rgba(76, 175, 80, 0.1), rgba(77, 182, 172, 0.15));
+        border-color: var(--primary);
+        transform: translateY(-3px);
+    }
+    
+    .card {
+        background: var(--card);
+        border-radius: 20px;
+        padding: 30px;
+        box-shadow: 0 8px 30px rgba(0,0,0,0.08);
+        margin-bottom: 30px;
+        transition: all 0.5s cubic-bezier(0.175, 0.885, 0.32, 1.275);
+        border: 1px solid rgba(0,0,0,0.03);
+        overflow: hidden;
+        position: relative;
+    }
+    
+    .card:before {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: 0;
+        width: 5px;
+        height: 100%;
+        background: linear-gradient(to bottom, var(--vibrant1), var(--vibrant2));
+        transition: width 0.5s ease;
+    }
+    
+    .card:hover {
+        transform: translateY(-8px) scale(1.01);
+        box-shadow: 0 15px 40px rgba(0,0,0,0.15);
+    }
+    
+    .card:hover:before {
+        width: 8px;
+    }
+    
+    .language-badge {
+        padding: 10px 22px;
+        border-radius: 50px;
+        font-weight: bold;
+        display: inline-block;
+        margin-bottom: 20px;
+        background: linear-gradient(135deg, var(--vibrant1), var(--vibrant2));
+        color: white;
+        box-shadow: 0 6px 15px rgba(77, 182, 172, 0.3);
+        animation: pulse 2s infinite;
+    }
+    
+    @keyframes pulse {
+        0% { box-shadow: 0 0 0 0 rgba(77, 182, 172, 0.5); }
+        70% { box-shadow: 0 0 0 15px rgba(77, 182, 172, 0); }
+        100% { box-shadow: 0 0 0 0 rgba(77, 182, 172, 0); }
+    }
+    
+    .user-msg {
+        background: linear-gradient(135deg, var(--primary), var(--secondary));
+        color: white;
+        border-radius: 22px 22px 5px 22px;
+        padding: 18px 24px;
+        margin: 15px 0;
+        max-width: 80%;
+        align-self: flex-end;
+        box-shadow: 0 8px 20px rgba(76, 175, 80, 0.25);
+        animation: slideInRight 0.5s ease;
+    }
+    
+    .assistant-msg {
+        background: white;
+        color: var(--text);
+        border-radius: 22px 22px 22px 5px;
+        padding: 18px 24px;
+        margin: 15px 0;
+        max-width: 80%;
+        align-self: flex-start;
+        box-shadow: 0 8px 20px rgba(0,0,0,0.08);
+        border: 1px solid #f0f0f0;
+        animation: slideInLeft 0.5s ease;
+    }
+    
+    @keyframes slideInLeft {
+        from { opacity: 0; transform: translateX(-30px); }
+        to { opacity: 1; transform: translateX(0); }
+    }
+    
+    @keyframes slideInRight {
+        from { opacity: 0; transform: translateX(30px); }
+        to { opacity: 1; transform: translateX(0); }
+    }
+    
+    .tab-content {
+        animation: fadeIn 0.5s ease;
+    }
+    
+    @keyframes fadeIn {
+        from { opacity: 0; transform: translateY(20px); }
+        to { opacity: 1; transform: translateY(0); }
+    }
+    
+    .glowing-border {
+        position: relative;
+        box-shadow: 0 0 10px var(--accent);
+        animation: glow 1.5s infinite alternate;
+    }
+    
+    @keyframes glow {
+        from { box-shadow: 0 0 10px -10px var(--accent); }
+        to { box-shadow: 0 0 10px 10px rgba(192, 202, 51, 0.3); }
+    }
+    
+    .floating {
+        animation: float 6s ease-in-out infinite;
+    }
+    
+    @keyframes float {
+        0% { transform: translateY(0px); }
+        50% { transform: translateY(-20px); }
+        100% { transform: translateY(0px); }
+    }
+    
+    .icon-hover {
+        transition: all 0.5s ease;
+    }
+    
+    .icon-hover:hover {
+        transform: rotate(15deg) scale(1.2);
+        filter: drop-shadow(0 5px 15px rgba(0,0,0,0.2));
+    }
+</style>
+""")
+
+# Low-bandwidth mode: the same layout without gradients, shadows, transitions
+# or animations (the infinite ones keep low-end phones repainting)
+LITE_CSS = minify_css("""
+<style>
+    :root {
+        --primary: #4CAF50;
+        --secondary: #4DB6AC;
+        --text: #263238;
+    }
+    .stRadio>div {
+        flex-direction: row;
+        gap: 12px;
+    }
+    .stButton>button {
+        background: var(--primary);
+        color: white;
+        border: none;
+        border-radius: 8px;
+    }
+    .card {
+        border: 1px solid #e0e0e0;
+        border-left: 4px solid var(--secondary);
+        border-radius: 8px;
+        padding: 16px;
+        margin-bottom: 16px;
+    }
+    .language-badge {
+        display: inline-block;
+        padding: 6px 14px;
+        border-radius: 50px;
+        margin-bottom: 12px;
+        font-weight: bold;
+        background: var(--secondary);
+        color: white;
+    }
+    .user-msg, .assistant-msg {
+        border-radius: 12px;
+        padding: 10px 14px;
+        margin: 8px 0;
+        max-width: 80%;
+    }
+    .user-msg {
+        background: var(--primary);
+        color: white;
+        margin-left: auto;
+    }
+    .assistant-msg {
+        background: #f5f5f5;
+        color: var(--text);
+    }
+</style>
+""")
+
+# Flag of South Africa (3:2), inlined so the sidebar never fetches an image
+FLAG_SVG = minify_css("""
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 9 6">
+    <clipPath id="t"><path d="M0 0 4.5 3 0 6z"/></clipPath>
+    <path fill="#E03C31" d="M0 0h9v3H0z"/>
+    <path fill="#001489" d="M0 3h9v3H0z"/>
+    <path fill="none" stroke="#FFF" stroke-width="2" d="M0 0 4.5 3 0 6M4.5 3H9"/>
+    <path d="M0 0 4.5 3 0 6z"/>
+    <path fill="none" stroke="#FFB81C" stroke-width="2" clip-path="url(#t)" d="M0 0 4.5 3 0 6"/>
+    <path fill="none" stroke="#007749" stroke-width="1.2" d="M0 0 4.5 3 0 6M4.5 3H9"/>
+</svg>
+""")
+FLAG_DATA_URI = "data:image/svg+xml," + quote(FLAG_SVG, safe=" :/=\"")
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import analytics
+from analytics import EventLog, SqliteEventLog
+
+DAY = 86400
+
+
+def _record(log, timestamp, intent="hygiene"):
+    log.record("Zulu", "healthcare", intent, 12.0, True, timestamp=timestamp)
+
+
+def test_checkpoints_are_written_off_the_request_thread(tmp_path, monkeypatch):
+    writes = []
+    written = threading.Event()
+    write = analytics._write_json_atomic
+
+    def tracking_write(path, payload):
+        write(path, payload)
+        if path.endswith("rollups.json"):
+            writes.append(threading.current_thread().name)
+            written.set()
+
+    monkeypatch.setattr(analytics, "_write_json_atomic", tracking_write)
+    log = EventLog(str(tmp_path), checkpoint_every=50, checkpoint_seconds=60)
+    # Opening the log writes a checkpoint on this thread; only later ones count
+    writes.clear()
+    written.clear()
+    now = time.time()
+    for index in range(120):
+        _record(log, now + index)
+    assert written.wait(5)
+    assert set(writes) == {"event-log-checkpoint"}
+    log.close()
+
+
+def test_old_hourly_buckets_are_pruned_and_daily_totals_kept(tmp_path):
+    now = time.time()
+    log = EventLog(str(tmp_path), hour_retention=7 * DAY)
+    for age_days in (30, 20, 1, 0):
+        _record(log, now - age_days * DAY)
+    log.flush()
+
+    assert len(log.rollups("hour")) == 2
+    assert min(row["bucket"] for row in log.rollups("hour")) >= now - 7 * DAY - 3600
+    assert log.totals()["events"] == 4
+    log.close()
+
+    reopened = EventLog(str(tmp_path), hour_retention=7 * DAY)
+    assert len(reopened.rollups("hour")) == 2
+    assert sum(row["count"] for row in reopened.rollups("day")) == 4
+    reopened.close()
+
+
+def test_events_after_the_last_checkpoint_are_replayed(tmp_path):
+    now = time.time()
+    log = EventLog(str(tmp_path), checkpoint_every=10 ** 6, checkpoint_seconds=60)
+    log.flush()
+    for index in range(25):
+        _record(log, now + index)
+    # No close(): the next process finds a checkpoint that predates these events
+    replayed = EventLog(str(tmp_path))
+    assert replayed.totals()["events"] == 25
+    replayed.close()
+    log.close()
+
+
+def test_sqlite_log_prunes_old_hourly_rows(tmp_path):
+    now = time.time()
+    log = SqliteEventLog(str(tmp_path / "events.db"), hour_retention=7 * DAY)
+    for age_days in (30, 0):
+        _record(log, now - age_days * DAY)
+    assert len(log.rollups("hour")) == 1
+    assert log.totals()["events"] == 2
+    log.close()
+
+
+def test_idle_sqlite_worker_flushes_in_the_background(tmp_path):
+    path = str(tmp_path / "events.db")
+    idle = SqliteEventLog(path, flush_every=1000, flush_seconds=0.05)
+    dashboard = SqliteEventLog(path, flush_seconds=60)
+    now = time.time()
+    for index in range(3):
+        _record(idle, now + index)
+
+    # No further appends, reads or close() on the idle worker
+    deadline = time.monotonic() + 5
+    while dashboard.totals()["events"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert dashboard.totals()["events"] == 3
+    assert dashboard.version == 3
+    idle.close()
+    dashboard.close()
+
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _button(at, text):
+    return next(button for button in at.button if text in button.label)
+
+
+@pytest.mark.parametrize("fragments", ["1", "0"])
+def test_send_quick_action_and_clear(monkeypatch, fragments):
+    monkeypatch.setenv("FRAGMENTS", fragments)
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    assert not at.exception
+
+    at.text_area(key="user_input").input("Ngicela usizo, nginomkhuhlane")
+    _button(at, "Send").click().run()
+    assert not at.exception
+    assert len(at.session_state["conversation"]) == 2
+    assert at.session_state["audio_key"]
+
+    _button(at, "Ask about").click().run()
+    assert not at.exception
+    assert len(at.session_state["conversation"]) == 3
+
+    _button(at, "Clear Conversation").click().run()
+    assert not at.exception
+    assert len(at.session_state["conversation"]) == 0
+    assert at.session_state["audio_key"] is None
+
+
+def test_refresh_shared_data_then_send():
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    _button(at, "Refresh shared data").click().run()
+    assert not at.exception
+
+    at.text_area(key="user_input").input("Ngicela usizo, nginomkhuhlane")
+    _button(at, "Send").click().run()
+    assert not at.exception
+    assert len(at.session_state["conversation"]) == 2
@@ -0,0 +1,236 @@
+import os
+import struct
+import threading
+import time
+
+import pytest
+
+import prerender
+from audio_cache import AudioCache, ChunkedSynthesis, cache_key
+from tts import BackendRouter, FakeSynthesizer, audio_mime, split_wav, wav_bytes
+
+
+class RealVoice(FakeSynthesizer):
+    # Stands in for espeak/gTTS: different audio for the same text
+    voice = "espeak"
+
+    def __call__(self, text, lang_code, slow=False):
+        return b"RIFF" + super().__call__(text, lang_code, slow)
+
+
+TEXT = "Geza izandla zakho ngensipho."
+
+
+def test_backends_sharing_a_cache_dir_keep_their_own_audio(tmp_path):
+    real = AudioCache(BackendRouter([("espeak", RealVoice())]), cache_dir=str(tmp_path), shared=True)
+    fake = AudioCache(BackendRouter([("fake", FakeSynthesizer())]), cache_dir=str(tmp_path), shared=True)
+
+    speech = real.get(TEXT, "zu")
+    assert fake.key(TEXT, "zu") != real.key(TEXT, "zu")
+    assert fake.get(TEXT, "zu") != speech
+    # The fake write didn't replace the real clip on disk
+    real.clear()
+    assert real.get(TEXT, "zu") == speech
+    assert real.stats()["disk_hits"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used_past_its_budget():
+    cache = AudioCache(FakeSynthesizer(), memory_budget=250)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.lookup("a") is not None  # a is now the most recent
+    cache.put("c", b"c" * 100)
+
+    assert cache.lookup("b") is None
+    assert "a" in cache and "c" in cache
+    # Clips bigger than the whole budget are never held in memory
+    cache.put("huge", b"h" * 300)
+    assert "huge" not in cache
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_bytes"] == 200 and stats["memory_entries"] == 2
+
+
+def test_disk_tier_evicts_oldest_files_first_after_a_restart(tmp_path):
+    writer = AudioCache(FakeSynthesizer(), cache_dir=str(tmp_path))
+    for key in "abc":
+        writer.put(key, key.encode() * 100)
+    # Last access times from an earlier run: b is the oldest, then a, then c
+    now = time.time()
+    for age, key in [(300, "b"), (200, "a"), (100, "c")]:
+        os.utime(tmp_path / f"{key}.mp3", (now - age, now - age))
+
+    cache = AudioCache(FakeSynthesizer(), cache_dir=str(tmp_path), disk_budget=250)
+    assert sorted(os.listdir(tmp_path)) == ["a.mp3", "c.mp3"]
+    cache.put("d", b"d" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["c.mp3", "d.mp3"]
+    stats = cache.stats()
+    assert stats["disk_evictions"] == 2
+    assert stats["disk_bytes"] == 200 and stats["disk_entries"] == 2
+
+
+def test_stats_count_hits_misses_and_evictions(tmp_path):
+    synthesize = FakeSynthesizer()
+    cache = AudioCache(synthesize, cache_dir=str(tmp_path))
+    speech = cache.get(TEXT, "zu")
+    assert cache.get(TEXT, "zu") == speech
+    cache.clear()
+    assert cache.get(TEXT, "zu") == speech
+
+    assert synthesize.calls == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"], stats["disk_hits"], stats["hits"]) == (1, 1, 1, 2)
+    assert stats["memory_evictions"] == stats["disk_evictions"] == 0
+
+
+def test_keys_are_separated_by_voice():
+    cache = AudioCache(BackendRouter([("espeak", RealVoice()), ("fake", FakeSynthesizer())]))
+    espeak = cache.key(TEXT, "zu", voice="espeak")
+    fake = cache.key(TEXT, "zu", voice="fake")
+    assert espeak != fake
+    assert cache.key(TEXT, "zu") == espeak == cache_key(TEXT, "zu", voice="espeak")
+    assert cache.key(TEXT, "zu", slow=True) != espeak
+
+    # Only the fallback has voiced the text so far: that is the key to serve
+    assert cache.render(TEXT, "zu", voice="fake")[0] == "fake"
+    assert cache.cached_key(TEXT, "zu") == fake
+    # Once the preferred voice has it, its clip wins
+    assert cache.render(TEXT, "zu", voice="espeak")[0] == "espeak"
+    assert cache.cached_key(TEXT, "zu") == espeak
+    assert cache.get(TEXT, "zu").startswith(b"RIFF")
+
+
+def test_fake_prerender_keeps_real_blobs(tmp_path):
+    out_dir = str(tmp_path / "prerendered")
+    resources = {"Zulu": {"greeting": TEXT}}
+    real = BackendRouter([("espeak", RealVoice())])
+    fake = BackendRouter([("fake", FakeSynthesizer())])
+
+    prerender.build(out_dir, real, resources=resources, log=lambda message: None)
+    prerender.build(out_dir, fake, resources=resources, log=lambda message: None)
+
+    voices = sorted(entry["voice"] for entry in prerender.load_manifest(out_dir)["entries"])
+    assert voices == ["espeak", "fake"]
+    cache = AudioCache(real)
+    assert prerender.warm_cache(cache, out_dir) == 1
+    assert cache.get(TEXT, "zu") == real(TEXT, "zu")
+    assert cache.stats()["misses"] == 0
+
+
+# 16 kHz mono 16-bit PCM
+WAV_FMT = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+FIRST = "Geza izandla zakho njalo."
+SECOND = "Sebenzisa insipho namanzi ahlanzekile."
+
+
+class WavVoice:
+    """Local WAV backend that fails sentences containing a marker, always or only once."""
+
+    voice = "espeak"
+
+    def __init__(self, fail=None, fail_once=None):
+        self.fail = fail
+        self.fail_once = fail_once
+        self._lock = threading.Lock()
+
+    def __call__(self, text, lang_code, slow=False):
+        if self.fail and self.fail in text:
+            raise RuntimeError("voice failed")
+        with self._lock:
+            if self.fail_once and self.fail_once in text:
+                self.fail_once = None
+                raise RuntimeError("voice failed once")
+        return wav_bytes(WAV_FMT, text.encode("utf-8"))
+
+
+def _mixed(wav_voice):
+    cache = AudioCache(BackendRouter([("espeak", wav_voice), ("fake", FakeSynthesizer())]))
+    return cache, ChunkedSynthesis(cache, min_chars=10)
+
+
+def test_mixed_backend_response_is_voiced_by_one_backend():
+    cache, synthesis = _mixed(WavVoice(fail="insipho"))
+    text = f"{FIRST} {SECOND}"
+
+    data = synthesis.get(text, "zu")
+    assert data == FakeSynthesizer()(text, "zu")
+    # The fallback's sentence is filed under its own voice, never under the espeak key
+    assert cache.lookup(cache.key(SECOND, "zu", voice="espeak")) is None
+    assert cache.lookup(cache.key(SECOND, "zu", voice="fake")) is not None
+    assert cache.cached(text, "zu") == ("fake", data)
+
+
+def test_stream_keeps_the_first_sentences_voice_after_a_fallback():
+    cache, synthesis = _mixed(WavVoice(fail_once="insipho"))
+    text = f"{FIRST} {SECOND}"
+
+    data = b"".join(synthesis.stream(text, "zu"))
+    assert audio_mime(data) == "audio/wav"
+    fmt, pcm = split_wav(data)
+    assert (fmt, pcm) == (WAV_FMT, FIRST.encode("utf-8") + SECOND.encode("utf-8"))
+    assert split_wav(cache.cached(text, "zu")[1])[1] == pcm
+
+
+def test_stream_that_cannot_keep_its_format_leaves_one_clip_for_the_retry():
+    cache, synthesis = _mixed(WavVoice(fail="insipho"))
+    text = f"{FIRST} {SECOND}"
+
+    with pytest.raises(RuntimeError):
+        b"".join(synthesis.stream(text, "zu"))
+    assert b"".join(synthesis.stream(text, "zu")) == FakeSynthesizer()(text, "zu")
+
+
+SENTENCES = ["Geza izandla zakho njalo.", "Sebenzisa insipho namanzi.", "Omisa izandla ngendwangu."]
+
+
+class SlowFirstSentence(FakeSynthesizer):
+    # Later sentences finish first, so order has to come from the stream, not the pool
+    def __call__(self, text, lang_code, slow=False):
+        time.sleep(0.05 if text == SENTENCES[0] else 0.0)
+        return super().__call__(text, lang_code, slow)
+
+
+class FormatFlip:
+    # One voice that answers one sentence in MP3 and everything else in WAV
+    voice = "flip"
+
+    def __call__(self, text, lang_code, slow=False):
+        if text == SENTENCES[1]:
+            return FakeSynthesizer()(text, lang_code, slow)
+        return wav_bytes(WAV_FMT, text.encode("utf-8"))
+
+
+def test_stream_yields_sentences_in_order_and_caches_the_stitched_text():
+    synthesize = SlowFirstSentence()
+    cache = AudioCache(synthesize)
+    synthesis = ChunkedSynthesis(cache, min_chars=10)
+    text = " ".join(SENTENCES)
+
+    assert list(synthesis.stream(text, "zu")) == [synthesize(sentence, "zu") for sentence in SENTENCES]
+    calls = synthesize.calls
+    assert cache.lookup(cache.key(text, "zu")) == b"".join(synthesize(s, "zu") for s in SENTENCES)
+    assert synthesis.get(text, "zu") == cache.lookup(cache.key(text, "zu"))
+    assert synthesize.calls == calls + len(SENTENCES)
+
+
+def test_wav_stream_sends_one_header_then_pcm():
+    cache = AudioCache(WavVoice())
+    synthesis = ChunkedSynthesis(cache, min_chars=10)
+    chunks = list(synthesis.stream(" ".join(SENTENCES), "zu"))
+
+    assert len(chunks) == len(SENTENCES)
+    assert split_wav(chunks[0]) == (WAV_FMT, SENTENCES[0].encode("utf-8"))
+    assert chunks[1:] == [sentence.encode("utf-8") for sentence in SENTENCES[1:]]
+
+
+def test_parts_in_different_formats_fall_back_to_one_shot_synthesis():
+    cache = AudioCache(FormatFlip())
+    synthesis = ChunkedSynthesis(cache, min_chars=10)
+    text = " ".join(SENTENCES)
+
+    data = synthesis.get(text, "zu")
+    assert split_wav(data) == (WAV_FMT, text.encode("utf-8"))
+    cache.clear()
+    # The stream is already WAV when the MP3 sentence arrives: the rest is voiced in one piece
+    streamed = b"".join(synthesis.stream(text, "zu"))
+    assert split_wav(streamed) == (WAV_FMT, (SENTENCES[0] + " ".join(SENTENCES[1:])).encode("utf-8"))
@@ -0,0 +1,56 @@
+from batch import BatchProcessor
+from engine import create_engine
+from tts import FakeSynthesizer
+
+ROWS = [
+    ("Zulu", "Healthcare", "Ngicela usizo, nginomkhuhlane"),
+    ("Zulu", "Healthcare", "Ngicela usizo, nginomkhuhlane"),
+    ("Zulu", "Healthcare", "hygiene"),
+    ("Zulu", "Agriculture", "pests"),
+    ("Tswana", "Healthcare", "hygiene"),
+    ("Tswana", "Healthcare", "clean"),
+    ("Zulu", "Healthcare", "nothing to match here"),
+    ("Zulu", "Healthcare", "Sawubona"),
+]
+
+
+class NoZuluSynthesizer(FakeSynthesizer):
+    # Voices everything except isiZulu and its isiXhosa fallback
+    def supports(self, lang_code):
+        return lang_code not in ("zu", "xh")
+
+
+def _processor(synthesize, tmp_path):
+    engine = create_engine(synthesize, cache_dir=str(tmp_path), prerender_dir=None)
+    calls = []
+    generate = engine.generate_audio_response
+
+    def counted(text, language):
+        calls.append((text, language))
+        return generate(text, language)
+
+    engine.generate_audio_response = counted
+    return BatchProcessor(engine, workers=4, chunk_size=3), calls
+
+
+def test_one_synthesis_per_distinct_response(tmp_path):
+    processor, calls = _processor(FakeSynthesizer(), tmp_path)
+    rows = ROWS * 25
+    results = sorted(processor.process(rows))
+
+    assert [result.index for result in results] == list(range(len(rows)))
+    assert all(result.audio is not None and result.error is None for result in results)
+    keys = {result.audio_key for result in results}
+    assert len(calls) == len(keys) == processor.stats["syntheses"]
+    assert len(keys) < len(set(ROWS))
+
+
+def test_unvoiced_rows_are_text_only_and_not_synthesized(tmp_path):
+    processor, calls = _processor(NoZuluSynthesizer(), tmp_path)
+    results = list(processor.process(ROWS))
+
+    zulu = [result for result in results if result.language == "Zulu"]
+    assert all(result.audio_key is None and result.audio is None for result in zulu)
+    assert all(result.response and "No TTS voice" in result.error for result in zulu)
+    assert {language for _, language in calls} == {"Tswana"}
+    assert processor.stats["syntheses"] == len(calls) == 1
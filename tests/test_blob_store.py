@@ -0,0 +1,94 @@
+import pytest
+
+import blob_store
+from blob_store import BlobStore, content_key
+
+CLIP = b"ID3" + b"\0" * 32
+OTHER = b"ID3" + b"\1" * 32
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(blob_store.time, "monotonic", clock)
+    return clock
+
+
+def test_leases_are_counted_per_holder_and_bytes_stored_once(clock):
+    store = BlobStore(ttl=60)
+    key = store.put(CLIP, holder="a")
+    assert key == content_key(CLIP)
+    assert store.put(CLIP, holder="b") == key
+    assert store.put(CLIP, holder="b") == key
+    assert store.refcount(key) == 2
+    assert store.stats() == {"puts": 3, "deduplicated": 2, "evictions": 0, "blobs": 1,
+                             "bytes": len(CLIP), "leases": 2}
+
+    store.release(key, "a")
+    store.release(key, "a")
+    assert store.refcount(key) == 1
+    assert store.get(key, holder="b") == CLIP
+
+
+def test_released_blob_is_kept_for_one_ttl(clock):
+    store = BlobStore(ttl=60)
+    key = store.put(CLIP, holder="a")
+    clock.now += 30
+    store.release(key, "a")
+
+    clock.now += 59
+    assert store.sweep() == 0
+    clock.now += 1
+    assert store.sweep() == 1
+    assert key not in store
+    assert store.get(key, holder="a") is None
+    assert store.stats()["bytes"] == 0
+
+
+def test_leases_not_touched_within_ttl_expire(clock):
+    store = BlobStore(ttl=60)
+    stale = store.put(CLIP, holder="abandoned tab")
+    live = store.put(OTHER, holder="active tab")
+
+    for _ in range(3):
+        clock.now += 40
+        # Rendering the audio renews the lease
+        assert store.get(live, holder="active tab") == OTHER
+    assert store.sweep() == 1
+    assert stale not in store
+    assert store.refcount(live) == 1
+
+
+def test_expired_blob_can_be_leased_again(clock):
+    store = BlobStore(ttl=60)
+    key = store.put(CLIP, holder="a")
+    clock.now += 61
+    store.sweep()
+    assert store.get(key, holder="a") is None
+
+    # The session re-reads the clip (from the audio cache) and leases it afresh
+    assert store.put(CLIP, key=key, holder="a") == key
+    assert store.refcount(key) == 1
+    clock.now += 59
+    assert store.sweep() == 0
+    assert store.get(key) == CLIP
+
+
+def test_puts_sweep_once_per_interval(clock):
+    store = BlobStore(ttl=60, sweep_interval=120)
+    key = store.put(CLIP)
+    clock.now += 100
+    store.put(OTHER)
+    assert key in store
+    clock.now += 20
+    store.put(OTHER)
+    assert key not in store
+    assert store.stats()["evictions"] == 1
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+from contributions import ACCEPTED, ContributionQueue, main
+from intent_matcher import MatcherIndex
+from resources import RESOURCES_DIR, ResourceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    # A copy of the shipped resources, with the overlay in its own directory
+    shutil.copytree(RESOURCES_DIR, tmp_path / "resources")
+    return ResourceStore(str(tmp_path / "resources"), check_interval=0.0,
+                         overlay_directory=str(tmp_path / "overlay"))
+
+
+def test_accepted_keywords_go_to_the_overlay_not_the_shipped_file(store, tmp_path):
+    shipped = (tmp_path / "resources" / "Zulu.json").read_bytes()
+    matchers = MatcherIndex(store)
+    matcher = matchers.get(("Zulu", "healthcare"))
+
+    added = store.add_keywords("Zulu", "healthcare", "symptoms", ["ikhwehlela"], native=True)
+
+    assert added == ["ikhwehlela"]
+    assert (tmp_path / "resources" / "Zulu.json").read_bytes() == shipped
+    overlay = json.loads((tmp_path / "overlay" / "Zulu.json").read_text(encoding="utf-8"))
+    assert overlay["domains"]["healthcare"]["symptoms"]["native_keywords"] == ["ikhwehlela"]
+    # Patched in place, and native keywords also match misspelt forms
+    assert matchers.get(("Zulu", "healthcare")) is matcher
+    assert matcher.best("nginwe ikwehlela") == "symptoms"
+
+    # A fresh store (another worker, or a restart) sees the overlay too
+    fresh = ResourceStore(store.directory, overlay_directory=store.overlay_directory)
+    assert "ikhwehlela" in fresh.native_keywords("Zulu")["healthcare"]["symptoms"]
+    assert store.add_keywords("Zulu", "healthcare", "symptoms", ["ikhwehlela"]) == []
+
+
+def test_concurrent_writers_do_not_share_a_temp_file(store, tmp_path):
+    errors = []
+
+    def accept(worker_store, keyword):
+        try:
+            worker_store.add_keywords("Zulu", "agriculture", "pests", [keyword])
+        except Exception as e:
+            errors.append(e)
+
+    # Separate stores stand in for separate worker processes sharing the directories
+    stores = [ResourceStore(store.directory, overlay_directory=store.overlay_directory) for _ in range(8)]
+    threads = [threading.Thread(target=accept, args=(worker_store, f"word{index}"))
+               for index, worker_store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not [name for name in os.listdir(store.overlay_directory) if name.endswith(".tmp")]
+    json.loads((tmp_path / "overlay" / "Zulu.json").read_text(encoding="utf-8"))
+
+
+def test_accept_requires_explicit_keywords(store, tmp_path, capsys):
+    directory = str(tmp_path / "contributions")
+    queue = ContributionQueue(directory, store=store)
+    contribution_id = queue.submit("Zulu", "Ngicela usizo with your help", domain="healthcare",
+                                   intent="symptoms")
+
+    with pytest.raises(SystemExit):
+        main(["--dir", directory, "accept", contribution_id])
+    assert "--keyword" in capsys.readouterr().err
+
+    queue.decide(contribution_id, ACCEPTED, "healthcare", "symptoms", ["usizo"], native=True)
+    queue.process()
+    keywords = store.keywords("Zulu")["healthcare"]["symptoms"]
+    assert "usizo" in keywords
+    assert not {"your", "with", "help"} & set(keywords)
@@ -0,0 +1,89 @@
+import copy
+import pickle
+
+import pytest
+
+from conversation import ASSISTANT, USER, ConversationHistory
+
+
+def _history(turns, cap):
+    history = ConversationHistory(cap)
+    for index in range(turns):
+        history.append(USER if index % 2 == 0 else ASSISTANT, f"turn {index}")
+    return history
+
+
+def _texts(turns):
+    return [turn.text for turn in turns]
+
+
+def test_oldest_turns_are_dropped_at_capacity():
+    history = _history(7, cap=5)
+    assert len(history) == 5
+    assert history.total == 7
+    assert history.dropped == 2
+    assert _texts(history) == [f"turn {index}" for index in range(2, 7)]
+    assert history[0].text == "turn 2"
+    assert history[-1].text == "turn 6"
+    with pytest.raises(IndexError):
+        history[5]
+
+
+def test_wraparound_keeps_order_over_many_laps():
+    history = _history(23, cap=4)
+    assert _texts(history) == ["turn 19", "turn 20", "turn 21", "turn 22"]
+    assert [turn.speaker_name for turn in history] == ["Assistant", "User", "Assistant", "User"]
+
+
+def test_pages_run_from_newest_back_in_time():
+    history = _history(7, cap=10)
+    assert history.page_count(page_size=3) == 3
+    assert _texts(history.page(0, page_size=3)) == ["turn 4", "turn 5", "turn 6"]
+    assert _texts(history.page(1, page_size=3)) == ["turn 1", "turn 2", "turn 3"]
+    # The last page is short, and out-of-range page numbers are clamped
+    assert _texts(history.page(2, page_size=3)) == ["turn 0"]
+    assert history.page(9, page_size=3) == history.page(2, page_size=3)
+    assert history.page(-1, page_size=3) == history.page(0, page_size=3)
+
+
+def test_page_boundaries_at_exact_multiples_and_after_wraparound():
+    history = _history(6, cap=10)
+    assert history.page_count(page_size=3) == 2
+    assert _texts(history.page(1, page_size=3)) == ["turn 0", "turn 1", "turn 2"]
+
+    wrapped = _history(12, cap=5)
+    assert wrapped.page_count(page_size=2) == 3
+    assert [_texts(wrapped.page(number, page_size=2)) for number in range(3)] == [
+        ["turn 10", "turn 11"], ["turn 8", "turn 9"], ["turn 7"],
+    ]
+
+
+def test_empty_history_has_one_empty_page():
+    history = ConversationHistory(3)
+    assert not history
+    assert history.page_count() == 1
+    assert history.page(0) == []
+    with pytest.raises(ValueError):
+        ConversationHistory(0)
+
+
+@pytest.mark.parametrize("round_trip", [
+    lambda history: pickle.loads(pickle.dumps(history)),
+    copy.deepcopy,
+], ids=["pickle", "deepcopy"])
+def test_session_state_round_trip(round_trip):
+    # Streamlit may pickle session state (enforceSerializableSessionState) or copy it
+    history = _history(8, cap=5)
+    history.append(ASSISTANT, "Geza izandla zakho.", intent="hygiene")
+    restored = round_trip(history)
+
+    assert _texts(restored) == _texts(history)
+    assert (restored.total, restored.dropped, restored.cap) == (history.total, history.dropped, history.cap)
+    assert restored[-1].intent == "hygiene"
+    assert restored[-1].timestamp == history[-1].timestamp
+    restored.append(USER, "next")
+    assert _texts(restored)[-2:] == ["Geza izandla zakho.", "next"]
+    assert len(history) == 5 and history[-1].text == "Geza izandla zakho."
+
+    restored.clear()
+    assert len(restored) == 0 and restored.total == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from audio_cache import AudioCache
+from benchmarks.run import INFLECTED_MESSAGES, NEAR_MISS_MESSAGES
+from engine import VoiceAssistantEngine
+from intent_matcher import IntentMatcher, MatcherIndex
+from morphology import NGUNI
+from resources import LANGUAGE_RESOURCES
+from tts import FakeSynthesizer
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    cache = AudioCache(FakeSynthesizer(), cache_dir=str(tmp_path_factory.mktemp("audio")))
+    return VoiceAssistantEngine(cache, matchers=MatcherIndex(LANGUAGE_RESOURCES))
+
+
+@pytest.mark.parametrize("language, domain, text", NEAR_MISS_MESSAGES)
+def test_english_words_are_not_stemmed_into_keywords(engine, language, domain, text):
+    assert engine.detect_intent(text, language, domain) is None
+
+
+@pytest.mark.parametrize("language, domain, text, intent", INFLECTED_MESSAGES)
+def test_inflected_native_words_match_by_stem(engine, language, domain, text, intent):
+    assert engine.detect_intent(text, language, domain) == intent
+
+
+def test_keyword_prefix_matches_but_not_infix():
+    matcher = IntentMatcher({"planting": ["plant"]}, NGUNI)
+    assert matcher.best("when is planting season") == "planting"
+    assert matcher.best("a dental implant") is None
+
+
+def test_added_native_keyword_matches_inflections():
+    matcher = IntentMatcher({"pests": ["pest"]}, NGUNI)
+    matcher.add_keyword("pests", "izinambuzane", native=True)
+    matcher.add_keyword("pests", "implant")
+    assert matcher.best("ezinambuzaneni") == "pests"
+    assert matcher.best("plant") is None
+
+
+def test_cleared_index_recompiles_matchers():
+    matchers = MatcherIndex(LANGUAGE_RESOURCES)
+    matcher = matchers.get(("Zulu", "healthcare"))
+    assert matchers.get(("Zulu", "healthcare")) is matcher
+    matchers.clear()
+    rebuilt = matchers.get(("Zulu", "healthcare"))
+    assert rebuilt is not matcher
+    assert rebuilt.best("hygiene") == "hygiene"
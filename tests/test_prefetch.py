@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from engine import create_engine
+from prefetch import Prefetcher
+from tts import FakeSynthesizer
+
+HEALTHCARE = ["symptoms", "medication", "hygiene", "nutrition"]
+
+
+class GatedSynthesizer(FakeSynthesizer):
+    """Counts calls per text and holds every call until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.texts = Counter()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, text, lang_code, slow=False):
+        with self._lock:
+            self.texts[text] += 1
+        self.entered.set()
+        assert self.release.wait(5)
+        return super().__call__(text, lang_code, slow)
+
+
+@pytest.fixture
+def synthesize():
+    synthesize = GatedSynthesizer()
+    yield synthesize
+    synthesize.release.set()
+
+
+def _prefetcher(synthesize, tmp_path, **options):
+    engine = create_engine(synthesize, cache_dir=str(tmp_path), prerender_dir=None)
+    return engine, Prefetcher(engine, workers=1, **options)
+
+
+def _settle(prefetcher):
+    deadline = time.monotonic() + 5
+    while prefetcher.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert prefetcher.stats()["pending"] == 0
+
+
+def test_new_selection_cancels_queued_jobs(synthesize, tmp_path):
+    engine, prefetcher = _prefetcher(synthesize, tmp_path)
+    assert prefetcher.select("a", "Zulu", "Healthcare", HEALTHCARE) == 4
+    assert synthesize.entered.wait(5)
+
+    # The first job is already synthesizing; the three behind it are superseded
+    prefetcher.select("a", "Zulu", "Agriculture", [])
+    synthesize.release.set()
+    _settle(prefetcher)
+
+    stats = prefetcher.stats()
+    assert (stats["completed"], stats["cancelled"]) == (1, 3)
+    first = engine.lookup("Zulu", "Healthcare", HEALTHCARE[0])
+    assert synthesize.texts and all(text in first for text in synthesize.texts)
+    prefetcher.shutdown()
+
+
+def test_job_shared_by_sessions_survives_one_cancelling(synthesize, tmp_path):
+    engine, prefetcher = _prefetcher(synthesize, tmp_path)
+    prefetcher.select("a", "Zulu", "Healthcare", ["symptoms", "hygiene"])
+    assert synthesize.entered.wait(5)
+    prefetcher.select("b", "Zulu", "Healthcare", ["hygiene"])
+    prefetcher.cancel("a")
+    synthesize.release.set()
+    _settle(prefetcher)
+
+    hygiene = engine.lookup("Zulu", "Healthcare", "hygiene")
+    assert prefetcher.stats()["scheduled"] == 2
+    assert engine.audio_key(hygiene, "Zulu") in engine.audio_cache
+    prefetcher.shutdown()
+
+
+def test_click_during_prefetch_waits_instead_of_synthesizing_again(synthesize, tmp_path):
+    engine, prefetcher = _prefetcher(synthesize, tmp_path)
+    text = engine.lookup("Zulu", "Healthcare", "hygiene")
+    prefetcher.select("a", "Zulu", "Healthcare", ["hygiene"])
+    assert synthesize.entered.wait(5)
+
+    clicked = []
+    click = threading.Thread(target=lambda: clicked.append(engine.generate_audio_response(text, "Zulu")))
+    click.start()
+    time.sleep(0.05)
+    synthesize.release.set()
+    click.join(5)
+    _settle(prefetcher)
+
+    audio, error = clicked[0]
+    assert error is None and audio is not None
+    assert synthesize.texts and all(count == 1 for count in synthesize.texts.values())
+    calls = synthesize.calls
+    assert engine.respond_intent("Zulu", "Healthcare", "hygiene").audio == audio
+    assert synthesize.calls == calls
+    prefetcher.shutdown()
+
+
+def test_pending_jobs_are_capped(synthesize, tmp_path):
+    engine, prefetcher = _prefetcher(synthesize, tmp_path, max_pending=2)
+    assert prefetcher.select("a", "Zulu", "Healthcare", HEALTHCARE) == 2
+    assert prefetcher.stats()["skipped"] == 2
+    assert prefetcher.select("b", "Zulu", "Agriculture", ["pests"]) == 0
+    synthesize.release.set()
+    _settle(prefetcher)
+
+    assert prefetcher.stats()["completed"] == 2
+    # Once the queue drains, already cached responses are not queued again
+    assert prefetcher.select("a", "Zulu", "Healthcare", HEALTHCARE[:2]) == 0
+    assert prefetcher.stats()["cached"] == 2
+    prefetcher.shutdown()
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import pytest
+
+from audio_cache import AudioCache
+from engine import VoiceAssistantEngine
+from intent_matcher import MatcherIndex
+from metrics import TRACER
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, DeadlineExceeded, ResilientBackend
+from resources import LANGUAGE_RESOURCES
+from tts import BackendRouter, FakeSynthesizer
+
+
+class ScriptedSynthesizer(FakeSynthesizer):
+    """Fake backend that plays a script of outcomes, one per call.
+
+    "ok" answers, "error" raises, "hang" blocks until released (or the test
+    ends). Once the script runs out every call answers.
+    """
+
+    def __init__(self, *script, stall_after_first_chunk=False):
+        super().__init__()
+        self.script = list(script)
+        self.stall_after_first_chunk = stall_after_first_chunk
+        self.release = threading.Event()
+
+    def __call__(self, text, lang_code, slow=False):
+        outcome = self.script.pop(0) if self.script else "ok"
+        if outcome == "error":
+            with self._lock:
+                self.calls += 1
+            raise ConnectionError("injected upstream error")
+        if outcome == "hang":
+            self.release.wait(5)
+        return super().__call__(text, lang_code, slow)
+
+    def stream(self, text, lang_code, slow=False, chunk_size=32):
+        chunks = super().stream(text, lang_code, slow, chunk_size)
+        yield next(chunks)
+        if self.stall_after_first_chunk:
+            self.release.wait(5)
+        yield from chunks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def released():
+    # Lets hung fake calls return once the test is over
+    backends = []
+    yield backends.append
+    for backend in backends:
+        backend.release.set()
+
+
+def _wrap(backend, threshold=5, reset_timeout=30.0, clock=time.monotonic, **options):
+    options.setdefault("timeout", 0.1)
+    options.setdefault("backoff", 0.0)
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_timeout=reset_timeout, clock=clock)
+    return ResilientBackend("test", backend, breaker=breaker, **options)
+
+
+def test_deadline_cuts_off_a_hung_call(released):
+    backend = ScriptedSynthesizer("hang")
+    released(backend)
+    resilient = _wrap(backend, retries=0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        resilient("Sawubona", "zu")
+    assert time.monotonic() - started < 0.5
+    assert resilient.stats()["timeouts"] == 1
+
+
+def test_retry_after_an_error_succeeds():
+    backend = ScriptedSynthesizer("error", "ok")
+    resilient = _wrap(backend, retries=1, timeout=1.0)
+    assert resilient("Sawubona", "zu").startswith(b"ID3")
+    stats = resilient.stats()
+    assert stats["retries"] == 1
+    assert stats["circuit"] == CLOSED
+
+
+def test_breaker_opens_and_fails_fast():
+    backend = ScriptedSynthesizer(*["error"] * 3)
+    resilient = _wrap(backend, threshold=3, retries=0)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            resilient("Sawubona", "zu")
+    calls = backend.calls
+    with pytest.raises(CircuitOpen):
+        resilient("Sawubona", "zu")
+    assert backend.calls == calls
+    stats = resilient.stats()
+    assert stats["circuit"] == OPEN
+    assert stats["circuit_opened"] == 1
+    assert stats["rejected"] == 1
+    assert TRACER.gauges()["tts.circuit.test.state"] == 2
+
+
+def test_breaker_half_opens_and_closes_after_a_good_probe():
+    clock = Clock()
+    backend = ScriptedSynthesizer("error", "error")
+    resilient = _wrap(backend, threshold=1, reset_timeout=30.0, clock=clock, retries=0)
+    with pytest.raises(ConnectionError):
+        resilient("Sawubona", "zu")
+    assert resilient.breaker.state == OPEN
+
+    # A failed probe opens the circuit for another period
+    clock.now = 30.0
+    assert resilient.breaker.state == HALF_OPEN
+    with pytest.raises(ConnectionError):
+        resilient("Sawubona", "zu")
+    assert resilient.breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        resilient("Sawubona", "zu")
+
+    clock.now = 60.0
+    assert resilient("Sawubona", "zu").startswith(b"ID3")
+    stats = resilient.breaker.stats()
+    assert stats["state"] == CLOSED
+    assert (stats["opened"], stats["half_opened"], stats["closed"]) == (2, 2, 1)
+
+
+def test_half_open_lets_a_single_probe_through():
+    clock = Clock()
+    breaker = CircuitBreaker("probe", failure_threshold=1, reset_timeout=1.0, clock=clock)
+    breaker.record_failure()
+    clock.now = 1.0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_stream_deadline_applies_to_the_first_chunk(released):
+    backend = ScriptedSynthesizer("hang")
+    released(backend)
+    resilient = _wrap(backend, threshold=1, retries=0)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        list(resilient.stream("Sawubona", "zu"))
+    assert time.monotonic() - started < 0.5
+    assert resilient.stats()["circuit"] == OPEN
+
+
+def test_stream_deadline_applies_to_every_chunk(released):
+    backend = ScriptedSynthesizer(stall_after_first_chunk=True)
+    released(backend)
+    resilient = _wrap(backend, threshold=1, retries=0)
+    chunks = resilient.stream("Sawubona, ngingakusiza ngani namuhla?", "zu")
+    assert next(chunks).startswith(b"ID3")
+    with pytest.raises(DeadlineExceeded):
+        list(chunks)
+    assert resilient.stats()["timeouts"] == 1
+    assert resilient.stats()["circuit"] == OPEN
+
+
+def test_stream_retries_until_the_first_chunk():
+    backend = ScriptedSynthesizer("error", "ok")
+    resilient = _wrap(backend, retries=1, timeout=1.0)
+    assert b"".join(resilient.stream("Sawubona", "zu")).startswith(b"ID3")
+    assert resilient.stats()["retries"] == 1
+
+
+def test_engine_answers_text_only_while_every_circuit_is_open(tmp_path):
+    backend = ScriptedSynthesizer(*["error"] * 2)
+    router = BackendRouter([("test", _wrap(backend, threshold=1, retries=0))])
+    engine = VoiceAssistantEngine(AudioCache(router, cache_dir=str(tmp_path)),
+                                  matchers=MatcherIndex(LANGUAGE_RESOURCES))
+    audio, error = engine.generate_audio_response("First reply.", "Zulu")
+    assert audio is None and "injected" in error
+    audio, error = engine.generate_audio_response("Second reply.", "Zulu")
+    assert audio is None and error.startswith("Audio is temporarily unavailable")
+    assert router.stats()["test"]["errors"] == 1
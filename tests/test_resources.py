@@ -0,0 +1,105 @@
+import json
+import shutil
+
+import pytest
+
+from intent_matcher import MatcherIndex
+from resources import RESOURCES_DIR, ResourceError, ResourceStore, merge_overlay, validate, validate_overlay
+
+
+@pytest.fixture
+def store(tmp_path):
+    shutil.copytree(RESOURCES_DIR, tmp_path / "resources")
+    return ResourceStore(str(tmp_path / "resources"), check_interval=0.0,
+                         overlay_directory=str(tmp_path / "overlay"))
+
+
+def _edit(store, language, change):
+    path = store._path(language)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    change(data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _add_keyword(keyword):
+    def change(data):
+        data["domains"]["healthcare"]["hygiene"]["keywords"].append(keyword)
+    return change
+
+
+def test_edited_file_is_reloaded(store):
+    before = store.version("Zulu")
+    _edit(store, "Zulu", lambda data: data.update(greeting="Sanibonani!"))
+    assert store["Zulu"]["greeting"] == "Sanibonani!"
+    assert store.version("Zulu") != before
+
+
+def test_invalid_edit_keeps_the_last_good_version(store, caplog):
+    greeting = store["Zulu"]["greeting"]
+    version = store.version("Zulu")
+    _edit(store, "Zulu", lambda data: data.update(greeting=""))
+    assert store["Zulu"]["greeting"] == greeting
+    assert store.version("Zulu") == version
+    assert "greeting must be a non-empty string" in caplog.text
+
+
+def test_versions_never_repeat_across_invalidate(store):
+    matchers = MatcherIndex(store)
+    store.version("Zulu")
+    _edit(store, "Zulu", _add_keyword("soap"))
+    assert matchers.get(("Zulu", "healthcare")).best("soap") == "hygiene"
+
+    store.invalidate()
+    store.version("Zulu")
+    _edit(store, "Zulu", _add_keyword("sanitizer"))
+    # Used to be served the matcher compiled before invalidate(), whose version number came round again
+    assert matchers.get(("Zulu", "healthcare")).best("sanitizer") == "hygiene"
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda data: data.update(schema_version=2), "unsupported schema_version 2"),
+    (lambda data: data.pop("language"), "language must be a non-empty string"),
+    (lambda data: data.update(domains=[]), "domains must be an object"),
+    (lambda data: data["domains"].update(greeting={}), "domain 'greeting' must be an object of intents"),
+    (lambda data: data["domains"]["healthcare"]["hygiene"].update(response=""),
+     "healthcare.hygiene.response must be a non-empty string"),
+    (lambda data: data["domains"]["healthcare"]["hygiene"].update(native_keywords=["ok", ""]),
+     "healthcare.hygiene.native_keywords must be a list of non-empty strings"),
+])
+def test_schema_errors_name_the_field(change, message):
+    with open(f"{RESOURCES_DIR}/Zulu.json", encoding="utf-8") as f:
+        data = json.load(f)
+    validate(data)
+    change(data)
+    with pytest.raises(ResourceError, match=message):
+        validate(data, "Zulu.json")
+
+
+def test_overlay_keywords_merge_into_known_intents_only(caplog):
+    with open(f"{RESOURCES_DIR}/Zulu.json", encoding="utf-8") as f:
+        data = json.load(f)
+    overlay = validate_overlay({"domains": {
+        "healthcare": {
+            "hygiene": {"keywords": ["soap", "wash"], "native_keywords": ["insipho"]},
+            "surgery": {"keywords": ["scalpel"]},
+        },
+    }})
+    merged = merge_overlay(data, overlay)["domains"]["healthcare"]
+    assert merged["hygiene"]["keywords"] == ["hygiene", "clean", "wash", "soap"]
+    assert merged["hygiene"]["native_keywords"] == ["hlanza", "ukuhlanza", "insipho"]
+    assert "surgery" not in merged
+    assert "unknown intent healthcare.surgery" in caplog.text
+    with pytest.raises(ResourceError):
+        validate_overlay({"domains": {"healthcare": {"hygiene": {"keywords": "soap"}}}})
+
+
+def test_overlay_file_is_merged_on_load(store, tmp_path):
+    (tmp_path / "overlay").mkdir()
+    (tmp_path / "overlay" / "Zulu.json").write_text(json.dumps(
+        {"language": "Zulu", "domains": {"healthcare": {"hygiene": {"native_keywords": ["insipho"]}}}}
+    ), encoding="utf-8")
+    assert "insipho" in store.native_keywords("Zulu")["healthcare"]["hygiene"]
+    assert "insipho" in store.keywords("Zulu")["healthcare"]["hygiene"]
+    assert "insipho" not in store.keywords("Zulu")["healthcare"]["symptoms"]
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+from audio_cache import AudioCache
+from engine import create_engine
+from service import AssistantService, serve
+from tts import FakeSynthesizer
+
+
+class NoZuluSynthesizer(FakeSynthesizer):
+    # Voices everything except isiZulu and its isiXhosa fallback
+    def supports(self, lang_code):
+        return lang_code not in ("zu", "xh")
+
+
+class BrokenStreamSynthesizer(FakeSynthesizer):
+    def stream(self, text, lang_code, slow=False, chunk_size=32):
+        yield b"ID3" + b"\0" * chunk_size
+        raise RuntimeError("upstream dropped")
+
+
+async def _send(port, request, timeout=5.0):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    data = await asyncio.wait_for(reader.read(), timeout)
+    writer.close()
+    return data
+
+
+async def _post(port, path, payload, timeout=5.0):
+    body = json.dumps(payload).encode("utf-8")
+    head = f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+    return await _send(port, head.encode("latin-1") + body, timeout)
+
+
+def _run(synthesize, scenario, tmp_path):
+    async def main():
+        service = AssistantService(create_engine(synthesize, cache_dir=str(tmp_path), prerender_dir=None))
+        server = await serve(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(service, port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.executor.shutdown(wait=False)
+
+    return asyncio.run(main())
+
+
+def test_unvoiced_language_is_rejected_every_time(tmp_path):
+    payload = {"text": "Sawubona", "language": "Zulu", "domain": "Healthcare"}
+
+    async def scenario(service, port):
+        first = await _post(port, "/respond/audio", payload)
+        second = await _post(port, "/respond/audio", payload)
+        text_only = await _post(port, "/respond", payload)
+        return first, second, text_only, dict(service._inflight)
+
+    first, second, text_only, inflight = _run(NoZuluSynthesizer(), scenario, tmp_path)
+    assert first.startswith(b"HTTP/1.1 400")
+    assert second.startswith(b"HTTP/1.1 400")
+    assert text_only.startswith(b"HTTP/1.1 200")
+    assert json.loads(text_only.split(b"\r\n\r\n", 1)[1])["audio_url"] is None
+    assert inflight == {}
+
+
+def test_stream_failure_after_headers_cuts_the_body(tmp_path):
+    payload = {"text": "Sawubona", "language": "Zulu", "domain": "Healthcare"}
+
+    async def scenario(service, port):
+        return await _post(port, "/respond/audio", payload), dict(service._inflight)
+
+    response, inflight = _run(BrokenStreamSynthesizer(), scenario, tmp_path)
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    # No JSON error spliced into the chunked body, and no terminating chunk
+    assert b'"error"' not in body
+    assert not body.endswith(b"0\r\n\r\n")
+    assert inflight == {}
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "+5", "1e3"])
+def test_malformed_content_length_is_a_bad_request(tmp_path, length):
+    async def scenario(service, port):
+        request = f"POST /respond HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n\r\n{{}}"
+        return await _send(port, request.encode("latin-1")), service.stats["errors"]
+
+    response, errors = _run(FakeSynthesizer(), scenario, tmp_path)
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"Content-Length" in response.split(b"\r\n\r\n", 1)[1]
+    assert errors == 1
+
+
+def test_audio_written_by_another_process_is_served(tmp_path):
+    async def scenario(service, port):
+        # The Streamlit app, in its own process, voices a response after the service started
+        writer = AudioCache(FakeSynthesizer(), cache_dir=str(tmp_path))
+        audio = writer.get("Geza izandla zakho.", "zu")
+        key = writer.key("Geza izandla zakho.", "zu")
+        request = f"GET /audio/{key} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1")
+        return audio, await _send(port, request)
+
+    audio, response = _run(FakeSynthesizer(), scenario, tmp_path)
+    assert response.startswith(b"HTTP/1.1 200")
+    assert audio in response
@@ -0,0 +1,107 @@
+import base64
+import json
+import os
+import struct
+import tempfile
+
+import pytest
+
+from audio_cache import AudioCache
+from engine import VoiceAssistantEngine
+from intent_matcher import MatcherIndex
+from resources import LANGUAGE_RESOURCES
+from tts import GTTSSynthesizer, audio_mime, join_audio, same_format, split_sentences, split_wav, wav_bytes
+
+FAKE_MP3 = b"ID3" + b"\0" * 64
+WAV_FMT = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+
+
+class EnglishVoice:
+    """GTTSSynthesizer pinned to a voice gTTS has, for languages it has none for."""
+
+    def __init__(self):
+        self.backend = GTTSSynthesizer()
+
+    def __call__(self, text, lang_code, slow=False):
+        return self.backend(text, "en", slow)
+
+    def stream(self, text, lang_code, slow=False):
+        return self.backend.stream(text, "en", slow)
+
+
+@pytest.fixture
+def offline_gtts(monkeypatch):
+    # Answers gTTS's batchexecute requests locally with one audio part each
+    pytest.importorskip("gtts")
+    import requests
+
+    sent = []
+    audio = json.dumps([base64.b64encode(FAKE_MP3).decode("ascii")])
+    line = json.dumps([["wrb.fr", "jQ1olc", audio]], separators=(",", ":"))
+
+    def send(session, request, **kwargs):
+        sent.append(request)
+        response = requests.models.Response()
+        response.status_code = 200
+        response.request = request
+        response._content = b")]}'\n\n" + line.encode("utf-8") + b"\n"
+        response._content_consumed = True
+        return response
+
+    monkeypatch.setattr(requests.Session, "send", send)
+    return sent
+
+
+def test_gtts_requests_leave_no_temp_files(offline_gtts):
+    engine = VoiceAssistantEngine(AudioCache(EnglishVoice()), matchers=MatcherIndex(LANGUAGE_RESOURCES))
+    temp_dir = tempfile.gettempdir()
+    before = set(os.listdir(temp_dir))
+
+    # Every intent's response is a cache miss, so each one goes through gTTS
+    responses = [engine.respond_intent("Zulu", domain, intent)
+                 for domain in ("Agriculture", "Healthcare")
+                 for intent in LANGUAGE_RESOURCES["Zulu"][domain.lower()]]
+    responses.append(engine.respond("Sawubona", "Zulu", "Healthcare"))
+
+    assert set(os.listdir(temp_dir)) - before == set()
+    assert all(response.audio and response.audio.startswith(b"ID3") for response in responses)
+    assert len(offline_gtts) >= len(responses)
+
+
+def test_split_sentences_merges_short_fragments():
+    assert split_sentences("Yebo. Ngiyabonga kakhulu, mngane wami! Sizobonana kusasa ekuseni.", min_chars=20) == [
+        "Yebo. Ngiyabonga kakhulu, mngane wami!",
+        "Sizobonana kusasa ekuseni.",
+    ]
+    assert split_sentences("Ngiyabonga kakhulu, mngane wami! Hamba kahle.", min_chars=20) == [
+        "Ngiyabonga kakhulu, mngane wami! Hamba kahle.",
+    ]
+    assert split_sentences("  Sawubona.  ") == ["Sawubona."]
+
+
+def test_split_sentences_breaks_long_sentences_at_commas_then_spaces():
+    sentence = "Geza izandla zakho, " + " ".join(["njalo"] * 12) + "."
+    chunks = split_sentences(sentence, min_chars=5, max_chars=30)
+    assert chunks[0] == "Geza izandla zakho,"
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert " ".join(chunks) == sentence
+
+
+def test_join_audio_rewrites_the_wav_header():
+    parts = [wav_bytes(WAV_FMT, b"\1\1" * 10), wav_bytes(WAV_FMT, b"\2\2" * 5)]
+    joined = join_audio(parts)
+    assert split_wav(joined) == (WAV_FMT, b"\1\1" * 10 + b"\2\2" * 5)
+    assert struct.unpack_from("<I", joined, 4)[0] == len(joined) - 8
+    assert join_audio([FAKE_MP3, FAKE_MP3]) == FAKE_MP3 * 2
+
+
+def test_join_audio_refuses_mixed_formats():
+    wav = wav_bytes(WAV_FMT, b"\0\0")
+    stereo = wav_bytes(struct.pack("<HHIIHH", 1, 2, 16000, 64000, 4, 16), b"\0\0\0\0")
+    assert audio_mime(wav) == "audio/wav" and audio_mime(FAKE_MP3) == "audio/mpeg"
+    assert not same_format([wav, FAKE_MP3])
+    assert not same_format([wav, stereo])
+    with pytest.raises(ValueError):
+        join_audio([wav, FAKE_MP3])
+    with pytest.raises(ValueError):
+        join_audio([FAKE_MP3, wav])
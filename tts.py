@@ -0,0 +1,454 @@
+import hashlib
+import queue
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from itertools import chain
+
+from metrics import TRACER, Histogram
+from resilience import CircuitOpen, ResilientBackend
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+")
+PHRASE_END_RE = re.compile(r"(?<=[,:])\s+")
+
+
+def voice_id(synthesize, lang_code):
+    # Which backend speaks lang_code; part of every audio cache key, so audio from one
+    # backend (say, the fake one in CI) is never served in place of another's
+    voice_for = getattr(synthesize, "voice_for", None)
+    if voice_for is not None:
+        return voice_for(lang_code)
+    return getattr(synthesize, "voice", None) or type(synthesize).__name__
+
+
+def voice_ids(synthesize, lang_code):
+    # Every voice that may answer for lang_code, preferred first
+    voices_for = getattr(synthesize, "voices_for", None)
+    if voices_for is not None:
+        return voices_for(lang_code)
+    return [voice_id(synthesize, lang_code)]
+
+
+def synthesize_voiced(synthesize, text, lang_code, slow=False, voice=None):
+    """Returns ``(voice, audio)`` with the voice that actually produced the audio.
+
+    A BackendRouter may answer from a fallback; ``voice`` pins the call to one
+    backend instead. Plain synthesizers have a single voice.
+    """
+    render = getattr(synthesize, "render", None)
+    if render is not None:
+        return render(text, lang_code, slow, voice=voice)
+    return voice_id(synthesize, lang_code), synthesize(text, lang_code, slow)
+
+
+def stream_voiced(synthesize, text, lang_code, slow=False):
+    # (voice, chunk iterator); a BackendRouter has settled on a backend by the time it returns
+    open_stream = getattr(synthesize, "open_stream", None)
+    if open_stream is not None:
+        return open_stream(text, lang_code, slow)
+    return voice_id(synthesize, lang_code), iter(synthesize.stream(text, lang_code, slow))
+
+
+def split_sentences(text, min_chars=20, max_chars=200):
+    """Split text into sentence-sized chunks for parallel synthesis.
+
+    Fragments shorter than ``min_chars`` are merged into the previous chunk and
+    sentences longer than ``max_chars`` are broken at commas, then at spaces.
+    """
+    pieces = []
+    for sentence in SENTENCE_END_RE.split(text.strip()):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for phrase in PHRASE_END_RE.split(sentence):
+            while len(phrase) > max_chars:
+                cut = phrase.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                pieces.append(phrase[:cut])
+                phrase = phrase[cut:].lstrip()
+            pieces.append(phrase)
+
+    chunks = []
+    for piece in pieces:
+        if not piece:
+            continue
+        if chunks and (len(piece) < min_chars or len(chunks[-1]) < min_chars) \
+                and len(chunks[-1]) + len(piece) + 1 <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+# Audio format sniffing: backends return MP3 (gTTS) or WAV (local engines)
+
+AUDIO_EXTENSIONS = {"audio/mpeg": "mp3", "audio/wav": "wav", "audio/ogg": "ogg"}
+WAV_STREAMING_SIZE = 0xFFFFFFFF
+
+
+def audio_mime(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "audio/wav"
+    if data[:4] == b"OggS":
+        return "audio/ogg"
+    return "audio/mpeg"
+
+
+def split_wav(data):
+    # Returns (fmt chunk payload, PCM bytes); tolerates the open-ended sizes streaming writers use
+    fmt = None
+    position = 12
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        (size,) = struct.unpack_from("<I", data, position + 4)
+        body = position + 8
+        if chunk_id == b"data":
+            return fmt, data[body:body + size]
+        if chunk_id == b"fmt ":
+            fmt = data[body:body + size]
+        position = body + size + (size & 1)
+    raise ValueError("WAV data chunk not found")
+
+
+def wav_bytes(fmt, pcm, streaming=False):
+    data_size = WAV_STREAMING_SIZE if streaming else len(pcm)
+    riff_size = WAV_STREAMING_SIZE if streaming else 4 + 8 + len(fmt) + 8 + len(pcm)
+    return (b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+            + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+            + b"data" + struct.pack("<I", data_size) + pcm)
+
+
+def same_format(parts):
+    # True if every part can be stitched onto the first: one container, and for WAV one fmt chunk
+    mimes = {audio_mime(part) for part in parts}
+    if len(mimes) > 1:
+        return False
+    if mimes != {"audio/wav"}:
+        return True
+    try:
+        return len({split_wav(part)[0] for part in parts}) == 1
+    except ValueError:
+        return False
+
+
+def join_audio(parts):
+    # MP3 frames concatenate as-is; WAV parts are merged under a single header
+    if len(parts) < 2:
+        return b"".join(parts)
+    if not same_format(parts):
+        raise ValueError(f"Cannot join audio of different formats: {sorted({audio_mime(p) for p in parts})}")
+    if audio_mime(parts[0]) != "audio/wav":
+        return b"".join(parts)
+    fmt = None
+    pcm = []
+    for part in parts:
+        part_fmt, part_pcm = split_wav(part)
+        fmt = fmt or part_fmt
+        pcm.append(part_pcm)
+    return wav_bytes(fmt, b"".join(pcm))
+
+
+class GTTSSynthesizer:
+    """Google Text-to-Speech backend (imported lazily so CI can run without gTTS).
+
+    Audio is streamed straight from the HTTP responses; nothing touches disk.
+    """
+
+    voice = "gtts"
+
+    def available(self):
+        try:
+            import gtts  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def supports(self, lang_code):
+        try:
+            from gtts.lang import tts_langs
+        except ImportError:
+            return False
+        return lang_code in tts_langs()
+
+    def __call__(self, text, lang_code, slow=False):
+        return b"".join(self.stream(text, lang_code, slow))
+
+    def stream(self, text, lang_code, slow=False):
+        from gtts import gTTS
+
+        # gTTS splits long text into parts and yields one MP3 chunk per part
+        yield from gTTS(text=text, lang=lang_code, slow=slow).stream()
+
+
+gtts_synthesize = GTTSSynthesizer()
+
+
+class EspeakSynthesizer:
+    """Offline espeak-ng backend: WAV audio from a local process, no network needed.
+
+    The installed voices are probed once per instance, so languages espeak-ng
+    can't speak are skipped by the router without spawning anything.
+    """
+
+    EXECUTABLES = ("espeak-ng", "espeak")
+    voice = "espeak"
+
+    def __init__(self, executable=None, speed=160, timeout=10.0):
+        self.executable = executable or next(
+            (path for path in map(shutil.which, self.EXECUTABLES) if path), None
+        )
+        self.speed = speed
+        self.timeout = timeout
+        self._voices = None
+
+    def available(self):
+        return self.executable is not None
+
+    def voices(self):
+        if self._voices is None:
+            voices = set()
+            if self.executable:
+                try:
+                    listing = subprocess.run([self.executable, "--voices"], capture_output=True,
+                                             text=True, timeout=self.timeout).stdout
+                except (OSError, subprocess.SubprocessError):
+                    listing = ""
+                # "Pty Language Age/Gender VoiceName File Other Languages"
+                for line in listing.splitlines()[1:]:
+                    fields = line.split()
+                    if len(fields) > 1:
+                        voices.add(fields[1])
+            self._voices = frozenset(voices)
+        return self._voices
+
+    def supports(self, lang_code):
+        return lang_code in self.voices()
+
+    def __call__(self, text, lang_code, slow=False):
+        if not self.available():
+            raise RuntimeError("espeak-ng is not installed")
+        speed = self.speed * 2 // 3 if slow else self.speed
+        result = subprocess.run(
+            [self.executable, "-v", lang_code, "-s", str(speed), "--stdout", "--stdin"],
+            input=text.encode("utf-8"), capture_output=True, timeout=self.timeout,
+        )
+        if result.returncode != 0 or not result.stdout:
+            message = result.stderr.decode("utf-8", "replace").strip() or f"exit status {result.returncode}"
+            raise RuntimeError(f"espeak-ng failed: {message}")
+        return result.stdout
+
+
+class SynthesizerPool:
+    """Fixed set of warm backend instances shared by all threads.
+
+    Instances are created (and optionally warmed with one synthesis) up front,
+    so per-instance setup such as loading a voice model is paid once per
+    process. Callers block until an instance is free, which also caps how many
+    synthesis processes run at once.
+    """
+
+    def __init__(self, factory, size=2, warmup=None):
+        self.workers = [factory() for _ in range(size)]
+        self._idle = queue.Queue()
+        for worker in self.workers:
+            if warmup is not None and getattr(worker, "available", lambda: True)():
+                try:
+                    worker(*warmup)
+                except Exception:
+                    pass
+            self._idle.put(worker)
+
+    @property
+    def voice(self):
+        return voice_id(self.workers[0], None)
+
+    def available(self):
+        return getattr(self.workers[0], "available", lambda: True)()
+
+    def supports(self, lang_code):
+        return getattr(self.workers[0], "supports", lambda code: True)(lang_code)
+
+    @contextmanager
+    def _worker(self):
+        worker = self._idle.get()
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def __call__(self, text, lang_code, slow=False):
+        with self._worker() as worker:
+            return worker(text, lang_code, slow)
+
+
+class BackendRouter:
+    """Routes each synthesis to the first backend that can speak the language.
+
+    Backends are tried in order; unavailable ones and ones that don't support
+    the language code are skipped without a call, and a failing backend falls
+    through to the next one. Which backends can voice a code is probed once
+    and cached. Latency and error counts are kept per backend.
+    """
+
+    def __init__(self, backends):
+        # backends: [(name, synthesize)] in preference order
+        self.backends = list(backends)
+        self._lock = threading.Lock()
+        self._stats = {name: {"calls": 0, "errors": 0, "fallbacks": 0} for name, _ in self.backends}
+        self._latency = {name: Histogram() for name, _ in self.backends}
+        self._routes = {}
+
+    def route(self, lang_code, voice=None):
+        route = self._routes.get(lang_code)
+        if route is None:
+            route = self._routes[lang_code] = [
+                (name, backend) for name, backend in self.backends
+                if getattr(backend, "available", lambda: True)()
+                and getattr(backend, "supports", lambda code: True)(lang_code)
+            ]
+        if voice is not None:
+            return [(name, backend) for name, backend in route if voice_id(backend, lang_code) == voice]
+        return route
+
+    def supports(self, lang_code):
+        return bool(self.route(lang_code))
+
+    def backends_for(self, lang_code):
+        return [name for name, _ in self.route(lang_code)]
+
+    def voice_for(self, lang_code):
+        # The preferred backend's voice: the cache key looked up first
+        voices = self.voices_for(lang_code)
+        return voices[0] if voices else ""
+
+    def voices_for(self, lang_code):
+        return [voice_id(backend, lang_code) for _, backend in self.route(lang_code)]
+
+    def __call__(self, text, lang_code, slow=False):
+        return self.render(text, lang_code, slow)[1]
+
+    def render(self, text, lang_code, slow=False, voice=None):
+        # (voice, audio) from the first backend that answers; only ``voice`` when given
+        errors = []
+        for name, backend in self.route(lang_code, voice):
+            started = time.perf_counter()
+            try:
+                data = backend(text, lang_code, slow)
+            except Exception as e:
+                self._failed(name, e, errors)
+                continue
+            self._observe(name, time.perf_counter() - started, fallback=bool(errors))
+            return voice_id(backend, lang_code), data
+        self._raise(lang_code, errors)
+
+    def stream(self, text, lang_code, slow=False):
+        _, chunks = self.open_stream(text, lang_code, slow)
+        yield from chunks
+
+    def open_stream(self, text, lang_code, slow=False):
+        # (voice, chunks) once a backend has produced its first chunk; falls back only until then
+        errors = []
+        for name, backend in self.route(lang_code):
+            started = time.perf_counter()
+            stream = getattr(backend, "stream", None)
+            source = stream(text, lang_code, slow) if stream else iter((backend(text, lang_code, slow),))
+            try:
+                first = next(source, None)
+            except Exception as e:
+                self._failed(name, e, errors)
+                continue
+            self._observe(name, time.perf_counter() - started, fallback=bool(errors))
+            return voice_id(backend, lang_code), chain(() if first is None else (first,), source)
+        self._raise(lang_code, errors)
+
+    def stats(self):
+        with self._lock:
+            stats = {name: dict(counters) for name, counters in self._stats.items()}
+        for name, histogram in self._latency.items():
+            stats[name]["p50_ms"] = histogram.percentile(0.5) * 1000
+            stats[name]["p95_ms"] = histogram.percentile(0.95) * 1000
+        # Backends wrapped by resilience.ResilientBackend add retry and circuit state
+        for name, backend in self.backends:
+            backend_stats = getattr(backend, "stats", None)
+            if backend_stats is not None:
+                stats[name].update(backend_stats())
+        return stats
+
+    def _failed(self, name, error, errors):
+        # An open circuit is a skip, not a call; the backend counts those itself
+        if not isinstance(error, CircuitOpen):
+            self._count(name, "errors")
+        errors.append((name, error))
+
+    @staticmethod
+    def _raise(lang_code, errors):
+        if not errors:
+            raise RuntimeError(f"No TTS backend supports language {lang_code!r}")
+        message = "; ".join(f"{name}: {error}" for name, error in errors)
+        # Every backend failing fast lets callers degrade without logging an outage per request
+        if all(isinstance(error, CircuitOpen) for _, error in errors):
+            raise CircuitOpen(message)
+        raise RuntimeError(message)
+
+    def _count(self, name, counter):
+        with self._lock:
+            self._stats[name][counter] += 1
+
+    def _observe(self, name, seconds, fallback):
+        with self._lock:
+            self._stats[name]["calls"] += 1
+            if fallback:
+                self._stats[name]["fallbacks"] += 1
+        self._latency[name].observe(seconds)
+        if TRACER.enabled:
+            TRACER.observe(f"tts.backend.{name}", seconds)
+
+
+class FakeSynthesizer:
+    """Local stand-in for gTTS that returns deterministic bytes without network access."""
+
+    voice = "fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text, lang_code, slow=False):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha256(f"{lang_code}:{slow}:{text}".encode("utf-8")).digest()
+        # Fake ID3 header so the payload looks like an MP3 to sniffers
+        return b"ID3" + digest + text.encode("utf-8")
+
+    def stream(self, text, lang_code, slow=False, chunk_size=32):
+        data = self(text, lang_code, slow)
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+
+def build_synthesizer(spec="espeak,gtts", pool_size=2, fake_latency=0.0, resilient=True):
+    """Router over a comma-separated list of backends in fallback order.
+
+    Known backends: ``espeak`` (offline, pooled), ``gtts`` (network) and
+    ``fake`` (deterministic, for CI and benchmarks). Each one gets a deadline,
+    retries and a circuit breaker (resilience.py) unless ``resilient`` is False.
+    """
+    factories = {
+        "espeak": lambda: SynthesizerPool(EspeakSynthesizer, pool_size, warmup=("ok", "en", False)),
+        "gtts": lambda: gtts_synthesize,
+        "fake": lambda: FakeSynthesizer(fake_latency),
+    }
+    backends = []
+    for name in (part.strip() for part in spec.split(",")):
+        if name not in factories:
+            raise ValueError(f"Unknown TTS backend {name!r} (expected one of {', '.join(factories)})")
+        backend = factories[name]()
+        backends.append((name, ResilientBackend(name, backend) if resilient else backend))
+    return BackendRouter(backends)